@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_session import Session
 from flask_bcrypt import Bcrypt
@@ -12,6 +12,11 @@ from routes.route_optimization import route_optimization_blueprint
 from routes.download import download_blueprint
 from routes.delivery import delivery_blueprint
 from routes.visualization import visualization_blueprint
+from utils.model_provider import rl_model_provider, DEFAULT_MODEL_PATH
+from models.route_model import ensure_route_indexes
+from utils.route_cache import route_cache
+from utils.optimization_utils import OPTIMIZATION_CONFIG
+from utils.road_network import road_network_provider
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True)
@@ -24,17 +29,34 @@ app.config['SESSION_PERMANENT'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)
 Session(app)
 
+# RL model used to seed the genetic algorithm (loaded in the background)
+app.config['RL_MODEL_PATH'] = os.environ.get('RL_MODEL_PATH', DEFAULT_MODEL_PATH)
+
+# Persistent warehouse/distributor distance store reused across uploads (file-locked,
+# so workers can share it); resolved next to this file rather than the working directory
+app.config['DISTANCE_STORE_DIR'] = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.environ.get('DISTANCE_STORE_DIR', 'distance_store')
+)
+OPTIMIZATION_CONFIG["distance_store_dir"] = app.config['DISTANCE_STORE_DIR']
+
+# Optional offline OSM extract behind the "road" distance metric (loaded on first use)
+app.config['ROAD_NETWORK_PATH'] = os.environ.get('ROAD_NETWORK_PATH')
+if app.config['ROAD_NETWORK_PATH']:
+    road_network_provider.configure(app.config['ROAD_NETWORK_PATH'])
+
 # MongoDB setup
 client = MongoClient("mongodb://localhost:27017/")
 db = client.RouteSync
 users_collection = db.users
 routes_collection = db.routes
 
+# Persist optimized tours so unchanged vehicles are not re-optimized across restarts
+route_cache.set_backing_collection(db.route_cache)
+
 # Folders
 UPLOAD_FOLDER = 'uploads'
-DOWNLOAD_FOLDER = 'downloads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
 
 # Logging
 logging.basicConfig(level=logging.DEBUG)
@@ -58,6 +80,12 @@ def initialize_admin():
 
 initialize_admin()
 
+# Unique (vehicle_id, date) index backing the bulk route upserts
+try:
+    ensure_route_indexes()
+except Exception as e:
+    logging.error(f"Could not create routes index (duplicate vehicle/date routes?): {e}")
+
 # Register Blueprints
 app.register_blueprint(auth_blueprint, url_prefix='/auth')
 app.register_blueprint(route_optimization_blueprint, url_prefix='/route_optimization')
@@ -65,5 +93,14 @@ app.register_blueprint(download_blueprint, url_prefix='/download')
 app.register_blueprint(delivery_blueprint, url_prefix='/delivery')
 app.register_blueprint(visualization_blueprint, url_prefix='/visualization')
 
+# Warm up the RL model without blocking startup; uploads use GA-only until it is ready
+rl_model_provider.configure(app.config['RL_MODEL_PATH'])
+rl_model_provider.warm_up()
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Report service health and whether RL seeding is available yet."""
+    return jsonify({"status": "ok", **rl_model_provider.status()}), 200
+
 if __name__ == '__main__':
     app.run(port=3001, debug=True)
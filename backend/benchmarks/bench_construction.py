@@ -0,0 +1,52 @@
+"""
+Benchmark: construction heuristics (cost and tour quality) and how seeding part
+of the population with them changes array-GA convergence.
+
+Run from the backend directory:
+    python -m benchmarks.bench_construction
+"""
+import timeit
+import numpy as np
+
+from utils.routing_algorithm import build_distance_matrix, route_distance, genetic_algorithm_array
+from utils.construction import nearest_neighbour_tours, savings_tour, hilbert_tour, construction_routes
+
+STOP_COUNTS = [50, 200, 1000]
+REPEATS = 5
+GA_STOPS = 100
+GA_GENERATIONS = [0, 10, 50, 200]
+POPULATION_SIZE = 100
+
+def run():
+    rng = np.random.default_rng(42)
+    print(f"{'stops':>6} {'method':>10} {'ms':>9} {'tour (km)':>10}")
+    for num_stops in STOP_COUNTS:
+        points_coordinates = rng.uniform([31.3, 72.9], [31.6, 73.2], size=(num_stops + 1, 2))
+        distance_matrix = build_distance_matrix(points_coordinates, "haversine")
+        methods = {
+            "random": lambda: rng.permutation(np.arange(1, num_stops + 1)),
+            "nn x8": lambda: nearest_neighbour_tours(distance_matrix, np.arange(1, 9))[0],
+            "savings": lambda: savings_tour(distance_matrix),
+            "hilbert": lambda: hilbert_tour(points_coordinates, distance_matrix),
+        }
+        for name, build in methods.items():
+            elapsed = timeit.timeit(build, number=REPEATS) / REPEATS
+            print(f"{num_stops:>6} {name:>10} {elapsed * 1e3:>9.2f} {route_distance(build(), distance_matrix):>10.1f}")
+
+    points_coordinates = rng.uniform([31.3, 72.9], [31.6, 73.2], size=(GA_STOPS + 1, 2))
+    distance_matrix = build_distance_matrix(points_coordinates, "haversine")
+    seeds = construction_routes(points_coordinates, distance_matrix, POPULATION_SIZE // 10)
+    print(f"\n{'generations':>11} {'random (km)':>12} {'seeded (km)':>12}")
+    for generations in GA_GENERATIONS:
+        results = []
+        for seed_routes in (None, seeds):
+            np.random.seed(0)
+            route = genetic_algorithm_array(
+                POPULATION_SIZE, generations, 0.1, GA_STOPS + 1, points_coordinates[0], points_coordinates,
+                crossover_operator="ox", distance_matrix=distance_matrix, seed_routes=seed_routes
+            )
+            results.append(route.distance)
+        print(f"{generations:>11} {results[0]:>12.1f} {results[1]:>12.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,35 @@
+"""
+Benchmark: cost of building the full N x N matrix with each distance kernel.
+Graph metrics (road) are only timed when ROAD_NETWORK_PATH points at an OSM
+extract covering the Faisalabad region; their first call includes loading it.
+
+Run from the backend directory:
+    python -m benchmarks.bench_distance_kernels
+"""
+import os
+import timeit
+import numpy as np
+
+from utils.distance_metrics import DISTANCE_METRICS, GRAPH_METRICS, haversine_matrix
+
+POINT_COUNTS = [10, 50, 100, 500, 1000]
+
+def run():
+    rng = np.random.default_rng(42)
+    names = [name for name in DISTANCE_METRICS if name not in GRAPH_METRICS or os.environ.get("ROAD_NETWORK_PATH")]
+    print(f"{'points':>7} " + " ".join(f"{name + ' (ms)':>20}" for name in names) + f" {'equirect. max err':>18}")
+    for num_points in POINT_COUNTS:
+        # Points spread over the Faisalabad region
+        points = rng.uniform([31.2, 72.5], [32.3, 73.3], size=(num_points, 2))
+        repeats = max(3, 2000 // num_points)
+        timings = [
+            timeit.timeit(lambda: builder(points), number=repeats) / repeats * 1e3
+            for builder in map(DISTANCE_METRICS.get, names)
+        ]
+        exact = haversine_matrix(points)
+        approx = DISTANCE_METRICS["equirectangular"](points)
+        relative_error = np.max(np.abs(approx - exact) / np.where(exact > 0, exact, 1))
+        print(f"{num_points:>7} " + " ".join(f"{t:>20.3f}" for t in timings) + f" {relative_error:>17.2e}")
+
+if __name__ == "__main__":
+    run()
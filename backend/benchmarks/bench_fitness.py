@@ -0,0 +1,34 @@
+"""
+Benchmark: per-leg np.linalg.norm fitness vs. precomputed distance-matrix fitness.
+
+Run from the backend directory:
+    python -m benchmarks.bench_fitness
+"""
+import timeit
+import numpy as np
+
+from utils.routing_algorithm import Route, build_distance_matrix
+
+STOP_COUNTS = [10, 50, 200]
+REPEATS = 200
+
+def run():
+    rng = np.random.default_rng(42)
+    print(f"{'stops':>6} {'per-leg (us)':>14} {'matrix (us)':>12} {'speedup':>8}")
+    for num_stops in STOP_COUNTS:
+        points_coordinates = rng.uniform([31.3, 72.9], [31.6, 73.2], size=(num_stops + 1, 2))
+        start_point = points_coordinates[0]
+        route = rng.permutation(np.arange(1, num_stops + 1))
+        distance_matrix = build_distance_matrix(points_coordinates)
+
+        legacy = Route(route, start_point, points_coordinates)
+        fast = Route(route, start_point, points_coordinates, distance_matrix)
+        assert np.isclose(legacy.distance, fast.distance)
+
+        legacy_time = timeit.timeit(legacy.calculate_distance, number=REPEATS) / REPEATS
+        fast_time = timeit.timeit(fast.calculate_distance, number=REPEATS) / REPEATS
+        print(f"{num_stops:>6} {legacy_time * 1e6:>14.1f} {fast_time * 1e6:>12.1f} "
+              f"{legacy_time / fast_time:>7.1f}x")
+
+if __name__ == "__main__":
+    run()
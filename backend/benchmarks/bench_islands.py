@@ -0,0 +1,55 @@
+"""
+Benchmark: single-population array GA vs. island-model GA on one large route,
+both given the same wall-clock budget.
+
+Run from the backend directory:
+    python -m benchmarks.bench_islands
+"""
+import time
+import numpy as np
+
+from utils.routing_algorithm import (
+    build_distance_matrix, population_distances, initial_population_array, evolve_generation_array,
+)
+from utils.permutation_operators import get_crossover_operator
+from utils.island_ga import genetic_algorithm_islands
+from utils.stopping import StoppingCriteria
+
+NUM_STOPS = 150
+POPULATION_SIZE = 100
+MUTATION_RATE = 0.1
+TIME_BUDGET = 10.0
+ISLAND_COUNTS = [2, 4, 8, 16]
+
+def single_population(distance_matrix, time_budget):
+    """Array GA run generation by generation until the budget is spent."""
+    crossover_fn = get_crossover_operator("ox")
+    population = initial_population_array(POPULATION_SIZE, len(distance_matrix) - 1)
+    fitness = population_distances(population, distance_matrix)
+    deadline = time.monotonic() + time_budget
+    while time.monotonic() < deadline:
+        population, fitness = evolve_generation_array(
+            population, fitness, crossover_fn, MUTATION_RATE, distance_matrix
+        )
+    return fitness.min()
+
+def run():
+    rng = np.random.default_rng(42)
+    points_coordinates = rng.uniform([31.3, 72.9], [31.6, 73.2], size=(NUM_STOPS + 1, 2))
+    distance_matrix = build_distance_matrix(points_coordinates, "haversine")
+
+    np.random.seed(0)
+    print(f"{'islands':>8} {'tour (km)':>10} {'wall (s)':>9}")
+    start = time.perf_counter()
+    print(f"{1:>8} {single_population(distance_matrix, TIME_BUDGET):>10.2f} {time.perf_counter() - start:>9.1f}")
+    for islands in ISLAND_COUNTS:
+        start = time.perf_counter()
+        route = genetic_algorithm_islands(
+            POPULATION_SIZE, 10 ** 9, MUTATION_RATE, NUM_STOPS + 1, points_coordinates[0],
+            points_coordinates, crossover_operator="ox", distance_matrix=distance_matrix,
+            stopping=StoppingCriteria(time_budget=TIME_BUDGET), islands=islands
+        )
+        print(f"{islands:>8} {route.distance:>10.2f} {time.perf_counter() - start:>9.1f}")
+
+if __name__ == "__main__":
+    run()
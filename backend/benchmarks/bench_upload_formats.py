@@ -0,0 +1,80 @@
+"""
+Benchmark: read_upload time and file size per upload format on a synthetic
+sheet, reading from an in-memory stream (as a request body) and from a path
+(columnar formats are memory-mapped).
+Needs the optional pyarrow and zstandard packages.
+
+Run from the backend directory:
+    python -m benchmarks.bench_upload_formats
+"""
+import io
+import os
+import gzip
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather
+import zstandard
+
+from utils.ingest import read_upload
+
+ROW_COUNT = 1_000_000
+VEHICLE_COUNT = 2_000
+REPEATS = 3
+
+def synthetic_sheet(num_rows, rng):
+    vehicles = rng.integers(1, VEHICLE_COUNT + 1, size=num_rows)
+    days = rng.integers(1, 29, size=num_rows)
+    return pd.DataFrame({
+        "dispatch_id": np.arange(num_rows),
+        "Vehicle Id": vehicles,
+        "dispatch_created_on": [f"2024-01-{day:02d} 09:00:00" for day in days],
+        "expected_delivery_date": [f"2024-02-{day:02d}" for day in days],
+        "Origin Id": vehicles % 20,
+        "Origin Label": [f"Warehouse {origin}" for origin in vehicles % 20],
+        "Origin Geo Lat": 31.4 + (vehicles % 20) / 100,
+        "Origin Geo Lon": 73.0 + (vehicles % 20) / 100,
+        "Dest Geo Lat": rng.uniform(31.3, 31.6, size=num_rows),
+        "Dest Geo Lon": rng.uniform(72.9, 73.2, size=num_rows),
+    })
+
+def encode(data):
+    csv = data.to_csv(index=False).encode()
+    parquet = io.BytesIO()
+    data.to_parquet(parquet, index=False)
+    feather = io.BytesIO()
+    pyarrow.feather.write_feather(pa.Table.from_pandas(data, preserve_index=False), feather)
+    return {
+        "csv": csv,
+        "csv.gz": gzip.compress(csv, compresslevel=6),
+        "csv.zst": zstandard.ZstdCompressor().compress(csv),
+        "parquet": parquet.getvalue(),
+        "feather": feather.getvalue(),
+    }
+
+def best_of(read):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        read()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run():
+    rng = np.random.default_rng(42)
+    files = encode(synthetic_sheet(ROW_COUNT, rng))
+    print(f"{ROW_COUNT:,} rows")
+    print(f"{'format':>8} {'MB':>8} {'stream (s)':>11} {'path (s)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, content in files.items():
+            path = os.path.join(directory, f"upload.{name}")
+            with open(path, "wb") as file:
+                file.write(content)
+            from_stream = best_of(lambda: read_upload(io.BytesIO(content)))
+            from_path = best_of(lambda: read_upload(path))
+            print(f"{name:>8} {len(content) / 1e6:>8.1f} {from_stream:>11.2f} {from_path:>9.2f}")
+
+if __name__ == "__main__":
+    run()
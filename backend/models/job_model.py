@@ -0,0 +1,84 @@
+from pymongo import MongoClient
+from datetime import datetime
+import uuid
+
+client = MongoClient("mongodb://127.0.0.1:27017/")
+db = client["RouteSync"]
+jobs_collection = db["optimization_jobs"]
+
+# Job lifecycle: queued -> running -> completed | failed | cancelled
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+def create_job(filename, vehicle_filter="all"):
+    """Create a queued optimization job and return its id."""
+    job_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    jobs_collection.insert_one({
+        "job_id": job_id,
+        "status": "queued",
+        "filename": filename,
+        "vehicle_filter": vehicle_filter,
+        "total_vehicles": None,
+        "completed_vehicles": 0,
+        "routes": [],
+        "saved": None,
+        "error": None,
+        "cancel_requested": False,
+        "created_at": now,
+        "updated_at": now
+    })
+    return job_id
+
+def get_job(job_id):
+    """Fetch a job's state (without the Mongo _id)."""
+    return jobs_collection.find_one({"job_id": job_id}, {"_id": 0})
+
+def start_job(job_id):
+    """
+    Move a queued job to running. Returns False if it is no longer queued
+    (e.g. cancelled before a worker picked it up).
+    """
+    now = datetime.utcnow()
+    result = jobs_collection.update_one(
+        {"job_id": job_id, "status": "queued"},
+        {"$set": {"status": "running", "started_at": now, "updated_at": now}}
+    )
+    return result.modified_count == 1
+
+def update_job(job_id, **fields):
+    """Set top-level fields on a job."""
+    fields["updated_at"] = datetime.utcnow()
+    jobs_collection.update_one({"job_id": job_id}, {"$set": fields})
+
+def record_vehicle_route(job_id, vehicle_id, route_sequence):
+    """Append one finished vehicle's route to the job's partial results."""
+    jobs_collection.update_one(
+        {"job_id": job_id},
+        {
+            "$push": {"routes": {"Vehicle": vehicle_id, "Route": route_sequence}},
+            "$inc": {"completed_vehicles": 1},
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+    )
+
+def request_cancel(job_id):
+    """
+    Flag a job for cancellation. Queued jobs are cancelled immediately;
+    running jobs stop after their current vehicle.
+    Returns the updated job, or None if the job does not exist.
+    """
+    now = datetime.utcnow()
+    jobs_collection.update_one(
+        {"job_id": job_id, "status": {"$nin": list(FINISHED_STATUSES)}},
+        {"$set": {"cancel_requested": True, "updated_at": now}}
+    )
+    jobs_collection.update_one(
+        {"job_id": job_id, "status": "queued"},
+        {"$set": {"status": "cancelled", "updated_at": now}}
+    )
+    return get_job(job_id)
+
+def is_cancel_requested(job_id):
+    """True if cancellation was requested for the job (checked between vehicles)."""
+    job = jobs_collection.find_one({"job_id": job_id}, {"cancel_requested": 1})
+    return bool(job and job.get("cancel_requested"))
@@ -1,29 +1,165 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, UpdateOne
+from datetime import datetime
+import base64
+import json
 
 client = MongoClient("mongodb://127.0.0.1:27017/")
 db = client["RouteSync"]
 routes_collection = db["routes"]
 
-def save_route(vehicle_id, date, route_sequence):
-    """Save optimized route to the database, ensuring no duplication."""
-    # Check if the route for this vehicle and date already exists
-    existing_route = routes_collection.find_one({"vehicle_id": vehicle_id, "date": date})
-    
-    if existing_route:
-        # If a route already exists, update it instead of creating a duplicate
-        routes_collection.update_one(
-            {"vehicle_id": vehicle_id, "date": date},
-            {"$set": {"route_sequence": route_sequence, "status": "In Progress"}}
-        )
-    else:
-        # Insert a new route if it doesn't exist
-        routes_collection.insert_one({
-            "vehicle_id": vehicle_id,
-            "date": date,
-            "route_sequence": route_sequence,
-            "status": "In Progress"
-        })
+def ensure_route_indexes():
+    """
+    Create the unique (vehicle_id, date) index that save_route/save_routes upsert
+    on, and the (date, vehicle_id) index that paginated listings walk.
+    Called once at startup; a no-op if the indexes already exist.
+    """
+    routes_collection.create_index(
+        [("vehicle_id", ASCENDING), ("date", ASCENDING)],
+        unique=True,
+        name="vehicle_id_date_unique"
+    )
+    routes_collection.create_index(
+        [("date", ASCENDING), ("vehicle_id", ASCENDING)],
+        name="date_vehicle_id"
+    )
+
+def _route_upsert(vehicle_id, date, route_sequence, extra_fields=None, unset_fields=()):
+    """Upsert operation for one vehicle's route, keyed on (vehicle_id, date)."""
+    update = {"$set": {**(extra_fields or {}), "route_sequence": route_sequence, "status": "In Progress"}}
+    if unset_fields:
+        update["$unset"] = {field: "" for field in unset_fields}
+    return UpdateOne({"vehicle_id": vehicle_id, "date": date}, update, upsert=True)
+
+def save_route(vehicle_id, date, route_sequence, extra_fields=None, unset_fields=()):
+    """
+    Save optimized route to the database, ensuring no duplication.
+    `unset_fields` are removed from an existing document (fields that no longer
+    describe the new route_sequence).
+    """
+    # A single atomic upsert: updates the existing (vehicle_id, date) route or inserts a new one
+    save_routes([(vehicle_id, date, route_sequence, extra_fields, unset_fields)])
+
+def save_routes(routes):
+    """
+    Save all optimized routes from one upload in a single unordered bulk write.
+    :param routes: iterable of (vehicle_id, date, route_sequence) or
+                   (vehicle_id, date, route_sequence, extra_fields) tuples, where
+                   extra_fields (e.g. total_distance_km) are stored alongside the route
+    :return: {"inserted": n, "updated": n}
+    """
+    operations = [_route_upsert(*route) for route in routes]
+    if not operations:
+        return {"inserted": 0, "updated": 0}
+
+    result = routes_collection.bulk_write(operations, ordered=False)
+    return {"inserted": result.upserted_count, "updated": result.matched_count}
 
 def get_routes_by_date(date):
     """Retrieve optimized routes for a specific date."""
     return list(routes_collection.find({"date": date}, {"_id": 0}))
+
+# Format of the stored route "date" (the upload's expected_delivery_date)
+ROUTE_DATE_FORMAT = "%d/%m/%Y"
+
+def _parse_route_date(value):
+    for date_format in (ROUTE_DATE_FORMAT, "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{value}'; use DD/MM/YYYY or YYYY-MM-DD.")
+
+def route_query(args):
+    """
+    Mongo filter for route documents from request arguments; usable in find()
+    and in an aggregation $match:
+      - vehicleId: one id or a comma-separated list
+      - status:    one status or a comma-separated list
+      - date:      an exact stored date
+      - dateFrom / dateTo: inclusive range (DD/MM/YYYY or YYYY-MM-DD); stored
+        dates are parsed server-side, so unparseable ones ("Unknown Date") never match
+    Raises ValueError for malformed values.
+    """
+    query = {}
+    if args.get("vehicleId") not in (None, "", "all"):
+        try:
+            query["vehicle_id"] = {"$in": [int(value) for value in args["vehicleId"].split(",")]}
+        except ValueError:
+            raise ValueError("'vehicleId' must be a number or a comma-separated list of numbers.")
+    if args.get("status"):
+        query["status"] = {"$in": args["status"].split(",")}
+    if args.get("date"):
+        query["date"] = args["date"]
+
+    bounds = [(name, operator) for name, operator in (("dateFrom", "$gte"), ("dateTo", "$lte")) if args.get(name)]
+    if bounds:
+        # Mongo's date format specifiers match Python's for ROUTE_DATE_FORMAT
+        stored_date = {"$dateFromString": {"dateString": "$date", "format": ROUTE_DATE_FORMAT, "onError": None}}
+        # Unparseable dates become null, which $lte would otherwise accept
+        query["$expr"] = {"$and": [{"$eq": [{"$type": stored_date}, "date"]}] + [
+            {operator: [stored_date, _parse_route_date(args[name])]} for name, operator in bounds
+        ]}
+    return query
+
+def find_route_dates():
+    """
+    Distinct stored route dates, sorted the way find_routes_page orders them;
+    read from the date_vehicle_id index. For date pickers that then page
+    through one date's routes with find_routes_page.
+    """
+    return sorted(routes_collection.distinct("date"))
+
+# Route listing page sizes
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Listings leave out the (large) stop list unless include=route_sequence is asked for
+ROUTE_SUMMARY_PROJECTION = {"_id": 0, "route_sequence": 0}
+
+def encode_page_cursor(document):
+    """Opaque cursor pointing just after `document` in (date, vehicle_id) order."""
+    key = json.dumps([document["date"], document["vehicle_id"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_page_cursor(cursor):
+    """(date, vehicle_id) from encode_page_cursor; raises ValueError for anything else."""
+    try:
+        date, vehicle_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date, int(vehicle_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid 'cursor'; pass the next_cursor of the previous page.")
+
+def find_routes_page(args):
+    """
+    One page of routes in (date, vehicle_id) order, using keyset pagination on
+    the date_vehicle_id index: a page starts strictly after the cursor's key, so
+    it costs the same however deep it is and stays stable while routes are added.
+    Request arguments:
+      - the route_query filters (vehicleId, status, date, dateFrom, dateTo)
+      - limit:   page size (default DEFAULT_PAGE_SIZE, at most MAX_PAGE_SIZE)
+      - cursor:  next_cursor of the previous page
+      - include: "route_sequence" to return each route's stops
+    Raises ValueError for malformed arguments.
+    :return: (routes, next_cursor), next_cursor is None on the last page
+    """
+    query = route_query(args)
+    try:
+        limit = int(args.get("limit") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("'limit' must be a number.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}.")
+
+    if args.get("cursor"):
+        date, vehicle_id = decode_page_cursor(args["cursor"])
+        after = {"$or": [{"date": {"$gt": date}}, {"date": date, "vehicle_id": {"$gt": vehicle_id}}]}
+        query = {"$and": [query, after]} if query else after
+
+    projection = {"_id": 0} if args.get("include") == "route_sequence" else ROUTE_SUMMARY_PROJECTION
+    # One extra document tells whether there is a next page
+    routes = list(routes_collection.find(query, projection)
+                  .sort([("date", ASCENDING), ("vehicle_id", ASCENDING)])
+                  .limit(limit + 1))
+    if len(routes) <= limit:
+        return routes, None
+    return routes[:limit], encode_page_cursor(routes[limit - 1])
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from pymongo import MongoClient
 import logging
+from models.route_model import find_routes_page, find_route_dates
 
 # Initialize the Blueprint for delivery
 delivery_blueprint = Blueprint('delivery', __name__)
@@ -13,19 +14,40 @@ routes_collection = db.routes
 @delivery_blueprint.route('/getAllDeliveries', methods=['GET'])
 def get_all_deliveries():
     """
-    Fetch all deliveries from the database.
-    Returns a list of deliveries with their details.
+    Fetch one page of deliveries (see find_routes_page for the filter, limit,
+    cursor and include parameters) as {"deliveries": [...], "next_cursor": ...}.
+    The response carries an ETag; a matching If-None-Match gets an empty 304.
     """
     try:
-        deliveries = list(routes_collection.find({}, {"_id": 0}))
-        if not deliveries:
+        try:
+            deliveries, next_cursor = find_routes_page(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        if not deliveries and not request.args.get("cursor"):
             return jsonify({"message": "No deliveries found"}), 404
-        return jsonify({"deliveries": deliveries}), 200
+        response = jsonify({"deliveries": deliveries, "next_cursor": next_cursor})
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logging.error(f"Error fetching deliveries: {e}")
         return jsonify({"message": "Error fetching deliveries", "error": str(e)}), 500
 
 
+@delivery_blueprint.route('/getDeliveryDates', methods=['GET'])
+def get_delivery_dates():
+    """
+    Fetch the distinct delivery dates as {"dates": [...]}, so clients can list
+    one date's deliveries at a time instead of loading them all.
+    The response carries an ETag; a matching If-None-Match gets an empty 304.
+    """
+    try:
+        response = jsonify({"dates": find_route_dates()})
+        response.add_etag()
+        return response.make_conditional(request)
+    except Exception as e:
+        logging.error(f"Error fetching delivery dates: {e}")
+        return jsonify({"message": "Error fetching delivery dates", "error": str(e)}), 500
+
 @delivery_blueprint.route('/updateDeliveryStatus', methods=['POST'])
 def update_delivery_status():
     """
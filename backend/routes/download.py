@@ -1,89 +1,135 @@
-from flask import Blueprint, jsonify, send_file
-from pymongo import MongoClient
-import pandas as pd
-import os
+from flask import Blueprint, Response, request, jsonify
+from pymongo import MongoClient, ASCENDING
+from datetime import datetime
+from itertools import chain
+import logging
+
+from utils.export import export_chunks, get_export_format
+from models.route_model import route_query
 
 download_blueprint = Blueprint('download', __name__)
 client = MongoClient("mongodb://localhost:27017/")
 db = client.RouteSync
 
-DOWNLOAD_FOLDER = 'downloads'
-os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+# Stop rows read per aggregation cursor round trip while streaming an export
+EXPORT_CURSOR_BATCH = 5_000
+
+# Export columns and the route document field each one comes from; route_sequence
+# is unwound, so "$route_sequence.<field>" is the stop and "$stop_index" its position
+VEHICLE_EXPORT_FIELDS = {
+    "Dest Geo Lat": "$route_sequence.Dest Geo Lat",
+    "Dest Geo Lon": "$route_sequence.Dest Geo Lon",
+    "Distributor Id": "$route_sequence.Distributor Id",
+    "Distributor Name": "$route_sequence.Distributor Name",
+    "Stop Number": {"$add": ["$stop_index", 1]},
+    "Vehicle": "$vehicle_id",
+    "Date": "$date",
+}
+STATUS_EXPORT_FIELDS = {
+    "Vehicle ID": "$vehicle_id",
+    "Date": "$date",
+    "Status": "$status",
+    "Stop Number": {"$add": ["$stop_index", 1]},
+    "Latitude": "$route_sequence.Dest Geo Lat",
+    "Longitude": "$route_sequence.Dest Geo Lon",
+    "Distributor Name": "$route_sequence.Distributor Name",
+}
+
+def _stop_rows(query, fields):
+    """
+    Flatten matching routes into one row per stop inside Mongo: filter, order by
+    the (vehicle_id, date) index, $unwind route_sequence with its array index as
+    the stop number, then project to the export columns. Rows are pulled in
+    batches of EXPORT_CURSOR_BATCH as the response is streamed.
+    Fields a document lacks (stops saved before "Distributor Id" was stored)
+    come out as None, so typed export columns stay one type.
+    :return: iterator of row tuples aligned with `fields`
+    """
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"vehicle_id": ASCENDING, "date": ASCENDING}},
+        {"$unwind": {"path": "$route_sequence", "includeArrayIndex": "stop_index"}},
+        {"$project": {"_id": 0, **fields}},
+    ]
+    cursor = db.routes.aggregate(pipeline, batchSize=EXPORT_CURSOR_BATCH, allowDiskUse=True)
+    return (tuple(row.get(column) for column in fields) for row in cursor)
+
+def _streamed_export(rows, file_stem, format_name, columns):
+    """
+    Streaming attachment response for `rows`; nothing is written to disk and the
+    header row goes out before the first document batch is converted.
+    """
+    mimetype, extension = get_export_format(format_name)
+
+    def generate():
+        try:
+            yield from export_chunks(rows, columns, format_name)
+        except Exception as e:
+            # Headers are already sent, so the client only sees a truncated file
+            logging.error(f"Error while streaming export {file_stem}: {e}")
+            raise
+
+    return Response(generate(), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{file_stem}.{extension}"',
+    })
 
 @download_blueprint.route('/download/<vehicle_id>', methods=['GET'])
 def download_vehicle_route(vehicle_id):
+    """
+    Stream one vehicle's routes (or all, for "all") as one row per stop.
+    Query parameters: "format" (csv, csv.gz or parquet) and the route_query
+    filters (date, dateFrom, dateTo, status).
+    """
     try:
-        query = {} if vehicle_id == "all" else {"vehicle_id": int(vehicle_id)}
-        cursor = db.routes.find(query)
-
-        data_list = []
-        vehicle_date = None  # To store the vehicle date for the filename
-
-        for document in cursor:
-            vehicle_id = document["vehicle_id"]
-            route_sequence = document["route_sequence"]
-            vehicle_date = document["date"]  # Fetch the date from the document
-            for stop_num, route in enumerate(route_sequence, start=1):
-                route["Stop Number"] = stop_num
-                route["Vehicle"] = vehicle_id
-                route["Date"] = document["date"]
-                data_list.append(route)
-
-        if not data_list:
-            return jsonify({'message': 'No route found for the given vehicle'}), 404
+        format_name = request.args.get("format", "csv")
+        get_export_format(format_name)
+        query = route_query({**request.args.to_dict(), "vehicleId": vehicle_id})
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data_list)
+    try:
+        rows = _stop_rows(query, VEHICLE_EXPORT_FIELDS)
+        first = next(rows, None)
+        if first is None:
+            return jsonify({'message': 'No route found for the given vehicle'}), 404
 
         # Generate file name
         if vehicle_id == "all":
-            file_name = f"All_Vehicles_Routes({datetime.now().strftime('%Y-%m-%d')}).csv"
+            file_stem = f"All_Vehicles_Routes({datetime.now().strftime('%Y-%m-%d')})"
         else:
+            vehicle_date = first[list(VEHICLE_EXPORT_FIELDS).index("Date")]
             if not vehicle_date:
                 return jsonify({'message': 'No date found for the specified vehicle'}), 404
             formatted_date = vehicle_date.replace("/", "-")  # Format date to avoid invalid characters
-            file_name = f"Vehicle_{vehicle_id}({formatted_date}).csv"
-
-        # Save to CSV
-        file_path = os.path.join(DOWNLOAD_FOLDER, file_name)
-        df.to_csv(file_path, index=False)
+            file_stem = f"Vehicle_{vehicle_id}({formatted_date})"
 
-        return send_file(file_path, as_attachment=True)
+        return _streamed_export(chain([first], rows), file_stem, format_name, list(VEHICLE_EXPORT_FIELDS))
 
     except Exception as e:
         return jsonify({'message': 'An error occurred while downloading routes', 'error': str(e)}), 500
 
 @download_blueprint.route('/downloadAllWithStatus', methods=['GET'])
 def download_all_routes_with_status():
+    """
+    Stream routes with their delivery status as one row per stop.
+    Query parameters: "format" (csv, csv.gz or parquet) and the route_query
+    filters (vehicleId, date, dateFrom, dateTo, status).
+    """
     try:
-        deliveries = list(db.routes.find({}, {"_id": 0}))
+        format_name = request.args.get("format", "csv")
+        get_export_format(format_name)
+        query = route_query(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
 
-        if not deliveries:
+    try:
+        rows = _stop_rows(query, STATUS_EXPORT_FIELDS)
+        first = next(rows, None)
+        if first is None:
             return jsonify({'message': 'No deliveries found'}), 404
 
-        # Prepare data for CSV
-        data_list = []
-        for delivery in deliveries:
-            for route in delivery.get("route_sequence", []):
-                data_list.append({
-                    "Vehicle ID": delivery["vehicle_id"],
-                    "Date": delivery["date"],
-                    "Status": delivery["status"],
-                    "Stop Number": route.get("Stop Number", ""),
-                    "Latitude": route.get("Dest Geo Lat", ""),
-                    "Longitude": route.get("Dest Geo Lon", ""),
-                    "Distributor Name": route.get("Distributor Name", ""),
-                })
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data_list)
-
-        # Save to CSV
-        file_name = f"All_Vehicle_Routes_With_Status.csv"
-        file_path = os.path.join(DOWNLOAD_FOLDER, file_name)
-        df.to_csv(file_path, index=False)
-
-        return send_file(file_path, as_attachment=True)
+        return _streamed_export(chain([first], rows), "All_Vehicle_Routes_With_Status", format_name,
+                                list(STATUS_EXPORT_FIELDS))
 
     except Exception as e:
         return jsonify({'message': 'An error occurred while downloading all routes with status', 'error': str(e)}), 500
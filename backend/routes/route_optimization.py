@@ -1,11 +1,21 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-import pandas as pd
-from utils.optimization_utils import optimize_routes
+from utils.optimization_utils import optimize_routes, to_route_sequence, resolve_config, skipped_run_stats
+from utils.ingest import partition_by_vehicle, ingest_upload, read_upload, DELIVERY_DATE_COLUMN
+from utils.job_queue import job_queue
+from utils.route_cache import route_cache
+from utils.incremental import reoptimize_route, StopNotFound
+from utils.distance_metrics import tour_length_km
+from utils.fleet import apply_fleet
 from pymongo import MongoClient
+import io
 import os
+import json
 import logging
-from models.route_model import save_route
+from datetime import datetime
+from uuid import uuid4
+from models.route_model import save_route, save_routes, find_routes_page
+from models.job_model import create_job, get_job, record_vehicle_route, request_cancel, is_cancel_requested, update_job
 
 route_optimization_blueprint = Blueprint('route_optimization', __name__)
 
@@ -16,86 +26,369 @@ client = MongoClient("mongodb://localhost:27017/")
 db = client.RouteSync
 routes_collection = db.routes
 
-ALLOWED_EXTENSIONS = {'csv'}
+# Upload file extensions accepted; the actual format is detected from the file's bytes
+ALLOWED_EXTENSIONS = {'csv', 'gz', 'zst', 'parquet', 'feather', 'arrow', 'arrows'}
+
+# Raw request bodies read as an upload (instead of a multipart form)
+RAW_UPLOAD_MIMETYPES = {
+    "text/csv",
+    "application/gzip",
+    "application/zstd",
+    "application/octet-stream",
+    "application/vnd.apache.parquet",
+    "application/vnd.apache.arrow.file",
+    "application/vnd.apache.arrow.stream",
+}
 
 # Helper function to check file type
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-@route_optimization_blueprint.route('/upload', methods=['POST'])
-def upload_csv():
-    vehicle_id = request.form.get("vehicleId", "all")
-    if "file" not in request.files:
-        return jsonify({"message": "No file uploaded"}), 400
+# Fleet-mode fields of a stored route (see fleet.apply_fleet) that a stop delta
+# invalidates; /reoptimize drops them since stop demands are not stored
+FLEET_ROUTE_FIELDS = ("load", "stops")
+
+# Optimization settings an upload form may override, with their parsers
+UPLOAD_CONFIG_FIELDS = {
+    "num_generations": int,
+    "population_size": int,
+    "patience": int,
+    "target_gap": float,
+    "time_budget": float,
+}
+
+def config_from_form(form):
+    """
+    Per-upload optimization overrides from form fields named as in
+    UPLOAD_CONFIG_FIELDS. Raises ValueError for values that are not positive
+    numbers (target_gap may be 0) or that resolve_config rejects, so background
+    jobs fail at submission rather than in the worker.
+    """
+    config = {}
+    for key, parse in UPLOAD_CONFIG_FIELDS.items():
+        value = form.get(key)
+        if value in (None, ""):
+            continue
+        try:
+            config[key] = parse(value)
+        except ValueError:
+            raise ValueError(f"'{key}' must be a number.")
+        if config[key] < 0 or (config[key] == 0 and key != "target_gap"):
+            raise ValueError(f"'{key}' must be positive.")
+    resolve_config(config)
+    return config
+
+def upload_source():
+    """
+    The uploaded file of the current request as (stream, filename, params):
+      - raw body (see RAW_UPLOAD_MIMETYPES): request.stream itself, with options
+        from the query string, so large files are read straight off the socket;
+        this is what the frontend sends;
+      - multipart form: the "file" part, with options from the form fields.
+        Werkzeug parses the whole form before the handler runs and spools parts
+        over 500 KB to a temporary file, so this path does touch disk.
+    Raises ValueError with a user-facing message if no usable file was sent.
+    """
+    if request.mimetype in RAW_UPLOAD_MIMETYPES:
+        return request.stream, request.args.get("filename", "upload.csv"), request.args
 
+    if "file" not in request.files:
+        raise ValueError("No file uploaded")
     file = request.files["file"]
     if file.filename == '':
-        return jsonify({"message": "No file selected"}), 400
-
+        raise ValueError("No file selected")
     if not allowed_file(file.filename):
-        return jsonify({"message": "Invalid file type"}), 400
+        raise ValueError("Invalid file type")
+    return file.stream, file.filename, request.form
+
+def audit_path_for(filename, params):
+    """
+    Where to keep an audit copy of the upload, if the request asked for one
+    ("audit" = 1/true/yes). Names are unique so uploads never overwrite each other.
+    """
+    if str(params.get("audit", "")).lower() not in ("1", "true", "yes"):
+        return None
+    return os.path.join(UPLOAD_FOLDER, f"{datetime.now():%Y%m%d-%H%M%S}_{uuid4().hex[:8]}_{secure_filename(filename)}")
+
+def optimize_and_save(data, partitions, route_fields=None, **optimize_kwargs):
+    """
+    Optimize every vehicle partition and bulk-save the routes.
+    `route_fields` ({vehicle_id: {field: value}}) adds per-vehicle fields such as
+    fleet-mode load to both the saved document and the response. GA run stats
+    (generations_used, stop_reason, best_so_far) are added the same way.
+    Extra keyword arguments (progress_callback, should_cancel, config, ...) are
+    passed through to optimize_routes.
+    Returns (routes for the response, saved counts).
+    """
+    delivery_dates = {int(p.vehicle_id): p.delivery_date for p in partitions}
+    run_stats = {}
+    optimized_routes = optimize_routes(data, partitions=partitions, stats=run_stats, **optimize_kwargs)
+    final_output = []
+    routes_to_save = []
+
+    for vehicle, stops in optimized_routes.items():
+        delivery_date = delivery_dates[int(vehicle)]
+        # Stops already carry distributor id/name from their source row
+        route_sequence = to_route_sequence(stops)
+        total_distance_km = tour_length_km([[stop["lat"], stop["lon"]] for stop in stops])
+        extra_fields = {
+            "total_distance_km": total_distance_km,
+            **run_stats.get(int(vehicle), {}),
+            **(route_fields or {}).get(int(vehicle), {}),
+        }
+
+        routes_to_save.append((vehicle, delivery_date, route_sequence, extra_fields))
+        final_output.append({"Vehicle": vehicle, "Route": route_sequence, **extra_fields})
+
+    # One bulk upsert keyed on (vehicle_id, date) ensures no duplicates
+    return final_output, save_routes(routes_to_save)
 
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(file_path)
+def run_upload_job(job_id, content, vehicle_id="all", config=None):
+    """
+    Job body for /jobs uploads: parse, optimize with per-vehicle progress
+    reporting and cancellation checks, then save.
+    """
+    data, partitions = ingest_upload(io.BytesIO(content), vehicle_id)
+    update_job(job_id, total_vehicles=sum(1 for p in partitions if len(p.delivery_points)))
 
+    _, saved = optimize_and_save(
+        data,
+        partitions,
+        progress_callback=lambda vehicle, stops: record_vehicle_route(job_id, vehicle, to_route_sequence(stops)),
+        should_cancel=lambda: is_cancel_requested(job_id),
+        config=config
+    )
+    return saved
+
+@route_optimization_blueprint.route('/upload', methods=['POST'])
+def upload_csv():
+    """
+    Optimize an uploaded sheet (multipart "file" field, or a raw body): CSV,
+    gzip/zstd CSV, Parquet or Arrow IPC / Feather.
+    A raw body is parsed in chunks straight from the request (a multipart file
+    is first spooled by Werkzeug, see upload_source); it is only written to the
+    uploads folder when "audit" is set.
+    """
     try:
-        data = pd.read_csv(file_path)
-
-        if "expected_delivery_date" not in data.columns:
-            logging.error("Missing 'expected_delivery_date' column in the CSV.")
-            return jsonify({"message": "Missing 'expected_delivery_date' column in the uploaded CSV."}), 400
-
-        data["expected_delivery_date"] = data["expected_delivery_date"].fillna("Unknown Date")
-
-        if vehicle_id != "all":
-            data = data[data["Vehicle Id"] == int(vehicle_id)]
-
-        optimized_routes = optimize_routes(data)
-        final_output = []
-
-        for vehicle, route_coords in optimized_routes.items():
-            delivery_date = data[data["Vehicle Id"] == int(vehicle)]["expected_delivery_date"].iloc[0]
-            route_sequence = []
-
-            for index, coord in enumerate(route_coords):
-                route_sequence.append({
-                    "Dest Geo Lat": coord[0],
-                    "Dest Geo Lon": coord[1],
-                    "Distributor Name": (
-                        "Origin/Warehouse" if index == 0 or index == len(route_coords) - 1
-                        else next(
-                            (
-                                row["Distributor Name"]
-                                for _, row in data.iterrows()
-                                if round(row["Dest Geo Lat"], 6) == round(coord[0], 6)
-                                and round(row["Dest Geo Lon"], 6) == round(coord[1], 6)
-                            ),
-                            "Unknown Distributor"
-                        )
-                    )
-                })
-
-            # Use the save_route function to ensure no duplicates
-            save_route(vehicle, delivery_date, route_sequence)
-            final_output.append({"Vehicle": vehicle, "Route": route_sequence})
+        stream, filename, params = upload_source()
+        vehicle_id = params.get("vehicleId", "all")
+        config = config_from_form(params)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        try:
+            # Parsed, validated and partitioned once; the optimizer and the delivery dates share it
+            data, partitions = ingest_upload(stream, vehicle_id, audit_path=audit_path_for(filename, params))
+        except ValueError as e:
+            logging.error(str(e))
+            return jsonify({"message": str(e)}), 400
+
+        final_output, saved = optimize_and_save(data, partitions, config=config)
 
         return jsonify({
             "message": "Routes optimized and saved successfully",
-            "routes": final_output
+            "routes": final_output,
+            "saved": saved
         }), 200
 
+    except ValueError as e:
+        # Bad values in the sheet or settings (e.g. a non-numeric Distributor Id)
+        logging.error(str(e))
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         logging.error(f"Error during route optimization: {e}")
         return jsonify({"message": "An error occurred during route optimization", "error": str(e)}), 500
 
 
+@route_optimization_blueprint.route('/fleet', methods=['POST'])
+def optimize_fleet():
+    """
+    Fleet (CVRP) mode: redistribute each origin's stops across a vehicle list
+    with capacities, once per expected_delivery_date, then optimize every
+    vehicle's tour for each day with the GA.
+    Expects form fields: file, vehicles (JSON list of {"vehicle_id", "capacity",
+    "origin_id" (needed for multi-origin uploads)}), optional method ("sweep" or "kmeans").
+    Load is the row count per stop unless the sheet has a "Demand" column.
+    The response's "vehicles" holds {delivery date: {vehicle_id: load}}.
+    """
+    try:
+        stream, filename, params = upload_source()
+        vehicles = json.loads(params.get("vehicles") or "[]")
+        config = config_from_form(params)
+        data = read_upload(stream, audit_path=audit_path_for(filename, params))
+        data, loads = apply_fleet(
+            data,
+            vehicles,
+            method=params.get("method", "sweep"),
+            distance_metric=resolve_config()["distance_metric"]
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        logging.error(f"Invalid fleet request: {e}")
+        return jsonify({"message": f"Invalid fleet request: {e}"}), 400
+
+    try:
+        final_output, saved = [], {"inserted": 0, "updated": 0}
+        # A vehicle gets one route per day, so each day is optimized and saved on its own
+        for delivery_date, day_rows in data.groupby(DELIVERY_DATE_COLUMN, sort=False, observed=True):
+            day_output, day_saved = optimize_and_save(
+                day_rows, partition_by_vehicle(day_rows), route_fields=loads[delivery_date], config=config
+            )
+            final_output += day_output
+            saved = {key: saved[key] + day_saved[key] for key in saved}
+        return jsonify({
+            "message": "Fleet routes optimized and saved successfully",
+            "routes": final_output,
+            "vehicles": loads,
+            "total_fleet_distance_km": sum(route["total_distance_km"] for route in final_output),
+            "saved": saved
+        }), 200
+    except ValueError as e:
+        logging.error(str(e))
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error during fleet optimization: {e}")
+        return jsonify({"message": "An error occurred during fleet optimization", "error": str(e)}), 500
+
+
 @route_optimization_blueprint.route('/getRoutedDeliveries', methods=['GET'])
 def get_deliveries():
+    """
+    One page of routed deliveries as {"deliveries": [...], "next_cursor": ...};
+    see find_routes_page for the filter, limit, cursor and include parameters.
+    Supports If-None-Match against the response's ETag.
+    """
     try:
-        # Fetch deliveries from the database
-        deliveries = list(routes_collection.find({}, {"_id": 0}))
-        return jsonify({"deliveries": deliveries}), 200
+        try:
+            deliveries, next_cursor = find_routes_page(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        response = jsonify({"deliveries": deliveries, "next_cursor": next_cursor})
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logging.error(f"Error fetching deliveries: {e}")
         return jsonify({"message": "Error fetching deliveries", "error": str(e)}), 500
+
+
+@route_optimization_blueprint.route('/reoptimize', methods=['POST'])
+def reoptimize_stored_route():
+    """
+    Apply a stop delta to a stored route without a full GA run.
+    Expects JSON: vehicleId, date, and optional "add" (stops with Dest Geo Lat/Lon,
+    Distributor Id, Distributor Name) and "remove" (stops selected by Distributor Id
+    or by Dest Geo Lat/Lon). A removal that matches no stop is a 404 and leaves
+    the route unchanged. The GA run stats are replaced (stop_reason
+    "reoptimized") and fleet load/stop counts are dropped.
+    """
+    try:
+        data = request.get_json() or {}
+        vehicle_id = data.get("vehicleId")
+        date = data.get("date")
+        add_stops = data.get("add") or []
+        remove_stops = data.get("remove") or []
+
+        if vehicle_id is None or not date:
+            return jsonify({"message": "Vehicle ID and date are required"}), 400
+        if not add_stops and not remove_stops:
+            return jsonify({"message": "Nothing to change: provide stops to add or remove"}), 400
+        if any("Dest Geo Lat" not in stop or "Dest Geo Lon" not in stop for stop in add_stops):
+            return jsonify({"message": "Added stops need 'Dest Geo Lat' and 'Dest Geo Lon'"}), 400
+
+        route = routes_collection.find_one({"vehicle_id": int(vehicle_id), "date": date}, {"_id": 0})
+        if not route:
+            return jsonify({"message": "No route found for the given vehicle and date"}), 404
+
+        new_stops = [
+            {
+                "Dest Geo Lat": float(stop["Dest Geo Lat"]),
+                "Dest Geo Lon": float(stop["Dest Geo Lon"]),
+                "Distributor Id": stop.get("Distributor Id"),
+                "Distributor Name": stop.get("Distributor Name", "Unknown Distributor"),
+            }
+            for stop in add_stops
+        ]
+        try:
+            route_sequence, total_distance_km = reoptimize_route(route["route_sequence"], new_stops, remove_stops)
+        except StopNotFound as e:
+            return jsonify({"message": str(e)}), 404
+        save_route(int(vehicle_id), date, route_sequence,
+                   {"total_distance_km": total_distance_km, **skipped_run_stats("reoptimized")},
+                   unset_fields=FLEET_ROUTE_FIELDS)
+
+        return jsonify({
+            "message": "Route re-optimized successfully",
+            "Vehicle": int(vehicle_id),
+            "Route": route_sequence,
+            "total_distance_km": total_distance_km
+        }), 200
+    except ValueError as e:
+        # Malformed vehicle id, coordinates or removal selectors
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error re-optimizing route: {e}")
+        return jsonify({"message": "Error re-optimizing route", "error": str(e)}), 500
+
+
+@route_optimization_blueprint.route('/cache/stats', methods=['GET'])
+def get_route_cache_stats():
+    """Hit/miss counters of the optimized-route cache."""
+    return jsonify(route_cache.stats()), 200
+
+
+@route_optimization_blueprint.route('/jobs', methods=['POST'])
+def submit_optimization_job():
+    """
+    Accept an upload and optimize it in the background.
+    Returns a job id immediately; poll /jobs/<job_id> for progress and results.
+    The body is kept in memory for the worker (and written to the uploads
+    folder only when "audit" is set).
+    """
+    try:
+        stream, filename, params = upload_source()
+        vehicle_id = params.get("vehicleId", "all")
+        config = config_from_form(params)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        content = stream.read()
+        audit_path = audit_path_for(filename, params)
+        if audit_path:
+            with open(audit_path, "wb") as audit_file:
+                audit_file.write(content)
+        job_id = create_job(secure_filename(filename), vehicle_id)
+        job_queue.submit(job_id, lambda jid: run_upload_job(jid, content, vehicle_id, config))
+        return jsonify({"message": "Optimization job queued", "job_id": job_id, "status": "queued"}), 202
+    except Exception as e:
+        logging.error(f"Error queuing optimization job: {e}")
+        return jsonify({"message": "Error queuing optimization job", "error": str(e)}), 500
+
+
+@route_optimization_blueprint.route('/jobs/<job_id>', methods=['GET'])
+def get_optimization_job(job_id):
+    """Status, per-vehicle progress and partial routes of an optimization job."""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({"message": "Job not found"}), 404
+
+        total = job.get("total_vehicles")
+        job["progress"] = (job["completed_vehicles"] / total) if total else None
+        return jsonify(job), 200
+    except Exception as e:
+        logging.error(f"Error fetching optimization job: {e}")
+        return jsonify({"message": "Error fetching optimization job", "error": str(e)}), 500
+
+
+@route_optimization_blueprint.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_optimization_job(job_id):
+    """Request cancellation; a running job stops after its current vehicle."""
+    try:
+        job = request_cancel(job_id)
+        if not job:
+            return jsonify({"message": "Job not found"}), 404
+        return jsonify({"message": "Cancellation requested", "job_id": job_id, "status": job["status"]}), 200
+    except Exception as e:
+        logging.error(f"Error cancelling optimization job: {e}")
+        return jsonify({"message": "Error cancelling optimization job", "error": str(e)}), 500
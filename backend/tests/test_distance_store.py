@@ -0,0 +1,97 @@
+import json
+import multiprocessing
+import numpy as np
+
+from utils import distance_store
+from utils.distance_store import DistanceStore, location_key
+from utils.distance_metrics import haversine_matrix
+
+def locations(start, count):
+    rng = np.random.default_rng(start)
+    keys = [location_key("distributor", start + i) for i in range(count)]
+    return keys, rng.uniform([31.3, 72.9], [31.6, 73.2], size=(count, 2))
+
+def test_matrix_matches_the_metric_and_is_reused(tmp_path):
+    keys, points = locations(0, 20)
+    calls = []
+    store = DistanceStore(str(tmp_path), provider=lambda a, b: calls.append(len(a)) or haversine_matrix(a, b))
+
+    first = store.matrix_for(keys, points)
+    calls.clear()
+    second = DistanceStore(str(tmp_path)).matrix_for(keys, points)
+
+    np.testing.assert_allclose(first, haversine_matrix(points), rtol=1e-5)
+    np.testing.assert_allclose(second, first, rtol=1e-6)
+    assert calls == []
+
+def test_stores_sharing_a_directory_keep_each_others_rows(tmp_path, monkeypatch):
+    # Two handles on one directory stand in for two worker processes
+    monkeypatch.setattr(distance_store, "INITIAL_CAPACITY", 4)
+    first, second = DistanceStore(str(tmp_path)), DistanceStore(str(tmp_path))
+    all_keys, all_points = [], []
+    for batch in range(6):
+        keys, points = locations(100 * batch, 5)
+        (first if batch % 2 else second).matrix_for(keys, points)
+        all_keys += keys
+        all_points.append(points)
+
+    reopened = DistanceStore(str(tmp_path))
+    assert sorted(row for row, lat, lon in reopened.index.values()) == list(range(len(all_keys)))
+    points = np.vstack(all_points)
+    np.testing.assert_allclose(reopened.matrix_for(all_keys, points), haversine_matrix(points), rtol=1e-5)
+
+def _fill(directory, start):
+    store = DistanceStore(directory)
+    for batch in range(10):
+        store.matrix_for(*locations(start + 10 * batch, 10))
+
+def test_concurrent_processes_grow_one_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(distance_store, "INITIAL_CAPACITY", 4)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_fill, args=(str(tmp_path), start)) for start in (0, 1000)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    store = DistanceStore(str(tmp_path))
+    assert len(store.index) == 200
+    assert sorted(row for row, lat, lon in store.index.values()) == list(range(200))
+    keys, points = zip(*[
+        (key, point)
+        for start in (0, 1000) for batch in range(10)
+        for key, point in zip(*locations(start + 10 * batch, 10))
+    ])
+    points = np.array(points)
+    np.testing.assert_allclose(store.matrix_for(list(keys), points), haversine_matrix(points), rtol=1e-5)
+
+def test_moved_location_is_recomputed(tmp_path):
+    keys = [location_key("origin", 17), location_key("distributor", 5), location_key("distributor", 6)]
+    points = np.array([[31.337319, 73.057297], [31.4528231, 73.1144196], [31.4068728, 73.1126684]])
+    DistanceStore(str(tmp_path)).matrix_for(keys, points)
+
+    # Distributor 5 moved about 100 km; its stored distances must not be reused
+    moved = points.copy()
+    moved[1] = [32.3, 73.5]
+    store = DistanceStore(str(tmp_path))
+    np.testing.assert_allclose(store.matrix_for(keys, moved), haversine_matrix(moved), rtol=1e-5)
+    assert store.index[keys[1]] == [1, 32.3, 73.5]
+
+    # And the new distances are what later uploads read back
+    calls = []
+    reopened = DistanceStore(str(tmp_path), provider=lambda a, b: calls.append(len(a)) or haversine_matrix(a, b))
+    np.testing.assert_allclose(reopened.matrix_for(keys, moved), haversine_matrix(moved), rtol=1e-5)
+    assert calls == []
+
+def test_index_without_coordinates_is_recomputed(tmp_path):
+    keys, points = locations(0, 3)
+    store = DistanceStore(str(tmp_path))
+    store.matrix_for(keys, points)
+    # A store written before rows kept their coordinates, holding a stale distance
+    store._matrix[0, 1] = store._matrix[1, 0] = 999.0
+    store._matrix.flush()
+    with open(store.index_path, "w") as index_file:
+        json.dump({key: row for key, (row, lat, lon) in store.index.items()}, index_file)
+
+    np.testing.assert_allclose(DistanceStore(str(tmp_path)).matrix_for(keys, points), haversine_matrix(points), rtol=1e-5)
@@ -0,0 +1,84 @@
+import io
+import csv
+import sys
+import gzip
+from flask import Flask
+import pytest
+
+from utils.export import export_chunks, get_export_format
+from routes import download
+
+COLUMNS = ["Vehicle", "Date", "Stop Number"]
+ROWS = [(2154, "01/01/2025", 1), (2154, "01/01/2025", 2), (57, "02/01/2025", 1)]
+
+@pytest.fixture
+def without_pyarrow(monkeypatch):
+    # A None entry makes `import pyarrow` raise ImportError
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+
+def read_csv(data):
+    return [tuple(row) for row in csv.reader(io.StringIO(data.decode("utf-8")))]
+
+def test_csv_and_gzip_exports_round_trip():
+    expected = [tuple(COLUMNS)] + [tuple(map(str, row)) for row in ROWS]
+    assert read_csv(b"".join(export_chunks(iter(ROWS), COLUMNS, "csv"))) == expected
+    assert read_csv(gzip.decompress(b"".join(export_chunks(iter(ROWS), COLUMNS, "csv.gz")))) == expected
+
+def test_parquet_export_round_trips():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    table = pa.parquet.read_table(pa.BufferReader(b"".join(export_chunks(iter(ROWS), COLUMNS, "parquet"))))
+    assert table.column_names == COLUMNS
+    assert list(zip(*table.to_pydict().values())) == ROWS
+
+def test_parquet_without_pyarrow_is_rejected_up_front(without_pyarrow):
+    with pytest.raises(ValueError, match="pyarrow"):
+        get_export_format("parquet")
+    with pytest.raises(ValueError, match="pyarrow"):
+        export_chunks(iter(ROWS), COLUMNS, "parquet")
+    assert get_export_format("csv") == ("text/csv", "csv")
+
+def download_client(monkeypatch, documents):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().RouteSync
+    db.routes.insert_many(documents)
+    monkeypatch.setattr(download, "db", db)
+    app = Flask(__name__)
+    app.register_blueprint(download.download_blueprint)
+    return app.test_client()
+
+def test_download_without_pyarrow_returns_400(monkeypatch, without_pyarrow):
+    client = download_client(monkeypatch, [
+        {"vehicle_id": 2154, "date": "01/01/2025", "status": "In Progress",
+         "route_sequence": [{"Dest Geo Lat": 31.4, "Dest Geo Lon": 73.1}]},
+    ])
+
+    for url in ("/download/2154?format=parquet", "/downloadAllWithStatus?format=parquet"):
+        response = client.get(url)
+        assert response.status_code == 400
+        assert "pyarrow" in response.get_json()["message"]
+
+    response = client.get("/download/2154?format=csv")
+    assert response.status_code == 200
+    assert read_csv(response.data)[0][0] == "Dest Geo Lat"
+
+def test_parquet_download_of_old_and_new_routes(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    old_stop = {"Dest Geo Lat": 31.4, "Dest Geo Lon": 73.1, "Distributor Name": "Metro"}
+    new_stop = {**old_stop, "Distributor Id": 200088}
+    client = download_client(monkeypatch, [
+        # Saved before stops carried their "Distributor Id"
+        {"vehicle_id": 57, "date": "01/01/2025", "status": "Complete", "route_sequence": [old_stop]},
+        {"vehicle_id": 2154, "date": "01/01/2025", "status": "In Progress", "route_sequence": [new_stop, old_stop]},
+    ])
+
+    response = client.get("/download/all?format=parquet")
+    assert response.status_code == 200
+    table = pa.parquet.read_table(pa.BufferReader(response.data))
+    assert table.column("Distributor Id").to_pylist() == [None, 200088, None]
+    assert table.column("Stop Number").to_pylist() == [1, 1, 2]
+
+    response = client.get("/download/all?format=csv")
+    assert [row[2] for row in read_csv(response.data)] == ["Distributor Id", "", "200088", ""]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fleet import FLEET_METHODS, assign_fleet, apply_fleet
+
+ORIGIN = (31.4, 73.0)
+
+def random_stops(count, seed):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform([31.3, 72.9], [31.5, 73.1], size=(count, 2))
+    demands = rng.integers(1, 6, size=count).astype(float)
+    return points, demands
+
+@pytest.mark.parametrize("method", sorted(FLEET_METHODS))
+@pytest.mark.parametrize("seed", range(5))
+def test_clusters_respect_capacities(method, seed):
+    points, demands = random_stops(60, seed)
+    capacities = np.array([40.0, 60.0, 50.0, 80.0])
+    assert demands.sum() <= capacities.sum()
+
+    assignment = FLEET_METHODS[method](ORIGIN, points, demands, capacities)
+
+    assert assignment.shape == (60,)
+    loads = np.bincount(assignment, weights=demands, minlength=len(capacities))
+    assert (loads <= capacities + 1e-9).all()
+
+@pytest.mark.parametrize("method", sorted(FLEET_METHODS))
+def test_savings_refinement_respects_capacities(method):
+    points, demands = random_stops(40, 11)
+    capacities = [50.0, 50.0, 80.0]
+    assignment = assign_fleet(ORIGIN, points, demands, capacities, method)
+    loads = np.bincount(assignment, weights=demands, minlength=len(capacities))
+    assert (loads <= np.array(capacities) + 1e-9).all()
+
+def test_demand_over_fleet_capacity_is_rejected():
+    points, demands = random_stops(10, 0)
+    with pytest.raises(ValueError, match="exceeds fleet capacity"):
+        assign_fleet(ORIGIN, points, demands, [demands.sum() / 2])
+
+def upload(dates, stops_per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = len(dates) * stops_per_day
+    return pd.DataFrame({
+        "Vehicle Id": np.full(rows, 99, dtype="int32"),
+        "expected_delivery_date": np.repeat(dates, stops_per_day),
+        "Origin Id": 17,
+        "Origin Geo Lat": ORIGIN[0],
+        "Origin Geo Lon": ORIGIN[1],
+        "Dest Geo Lat": rng.uniform(31.3, 31.5, size=rows),
+        "Dest Geo Lon": rng.uniform(72.9, 73.1, size=rows),
+    })
+
+def test_each_delivery_date_gets_its_own_capacity():
+    # 2 x 8 stops fit two vehicles of 5 each day, but not both days at once
+    data = upload(["01/01/2025", "02/01/2025"], 8)
+    vehicles = [{"vehicle_id": 1, "capacity": 5}, {"vehicle_id": 2, "capacity": 5}]
+
+    planned, loads = apply_fleet(data, vehicles)
+
+    assert set(loads) == {"01/01/2025", "02/01/2025"}
+    for day_loads in loads.values():
+        assert sum(load["stops"] for load in day_loads.values()) == 8
+        assert all(load["load"] <= load["capacity"] for load in day_loads.values())
+    per_day = planned.groupby(["expected_delivery_date", "Vehicle Id"]).size()
+    assert (per_day <= 5).all()
+    assert set(planned["Vehicle Id"]) == {1, 2}
+
+def test_one_day_over_capacity_is_rejected():
+    data = upload(["01/01/2025"], 12)
+    with pytest.raises(ValueError, match="exceeds fleet capacity"):
+        apply_fleet(data, [{"vehicle_id": 1, "capacity": 5}, {"vehicle_id": 2, "capacity": 5}])
+
+def test_vehicle_ids_that_do_not_fit_the_upload_are_rejected():
+    data = upload(["01/01/2025"], 4)
+    with pytest.raises(ValueError, match="out of range"):
+        apply_fleet(data, [{"vehicle_id": 3_000_000_000, "capacity": 10}])
@@ -0,0 +1,70 @@
+from flask import Flask
+import pytest
+
+from utils.incremental import reoptimize_route, StopNotFound
+from models import route_model
+from routes import route_optimization
+
+ORIGIN = {"Dest Geo Lat": 31.34, "Dest Geo Lon": 73.06, "Distributor Id": None, "Distributor Name": "Origin/Warehouse"}
+
+def stop(distributor_id, lat, lon):
+    return {"Dest Geo Lat": lat, "Dest Geo Lon": lon, "Distributor Id": distributor_id, "Distributor Name": f"D{distributor_id}"}
+
+ROUTE = [ORIGIN, stop(1, 31.40, 73.10), stop(2, 31.41, 73.09), stop(3, 31.42, 73.08), ORIGIN]
+
+def distributor_ids(route_sequence):
+    return sorted(stop["Distributor Id"] for stop in route_sequence[1:-1])
+
+@pytest.mark.parametrize("selector", [
+    {"Distributor Id": 3},
+    {"Distributor Id": "3"},
+    {"Dest Geo Lat": "31.42", "Dest Geo Lon": 73.08},
+])
+def test_remove_by_id_or_coordinates(selector):
+    route_sequence, _ = reoptimize_route(ROUTE, remove_stops=[selector])
+    assert distributor_ids(route_sequence) == [1, 2]
+    assert route_sequence[0] == route_sequence[-1] == ORIGIN
+
+def test_removal_matching_no_stop_is_reported():
+    with pytest.raises(StopNotFound, match="'Distributor Id': 9"):
+        reoptimize_route(ROUTE, remove_stops=[{"Distributor Id": 1}, {"Distributor Id": 9}])
+
+@pytest.mark.parametrize("selector", [{"Distributor Id": "D-3"}, {"Distributor Name": "D3"}])
+def test_malformed_removal_is_rejected(selector):
+    with pytest.raises(ValueError):
+        reoptimize_route(ROUTE, remove_stops=[selector])
+
+@pytest.fixture
+def client(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().RouteSync.routes
+    monkeypatch.setattr(route_model, "routes_collection", collection)
+    monkeypatch.setattr(route_optimization, "routes_collection", collection)
+    collection.insert_one({
+        "vehicle_id": 57, "date": "01/01/2025", "route_sequence": ROUTE, "status": "In Progress",
+        "total_distance_km": 20.0, "generations_used": 120, "stop_reason": "patience",
+        "best_so_far": [25.0, 20.0], "load": 30.0, "capacity": 40.0, "stops": 3,
+    })
+    app = Flask(__name__)
+    app.register_blueprint(route_optimization.route_optimization_blueprint)
+    return app.test_client(), collection
+
+def test_reoptimize_endpoint_replaces_stale_run_fields(client):
+    client, collection = client
+    response = client.post("/reoptimize", json={"vehicleId": 57, "date": "01/01/2025",
+                                                "remove": [{"Distributor Id": "2"}]})
+    assert response.status_code == 200
+
+    stored = collection.find_one({"vehicle_id": 57}, {"_id": 0})
+    assert distributor_ids(stored["route_sequence"]) == [1, 3]
+    assert stored["total_distance_km"] == response.get_json()["total_distance_km"]
+    assert (stored["generations_used"], stored["stop_reason"], stored["best_so_far"]) == (0, "reoptimized", [])
+    assert "load" not in stored and "stops" not in stored
+    assert stored["capacity"] == 40.0
+
+@pytest.mark.parametrize("remove, status", [([{"Distributor Id": 9}], 404), ([{"Distributor Id": "x"}], 400)])
+def test_reoptimize_endpoint_rejects_bad_removals(client, remove, status):
+    client, collection = client
+    response = client.post("/reoptimize", json={"vehicleId": 57, "date": "01/01/2025", "remove": remove})
+    assert response.status_code == status
+    assert collection.find_one({"vehicle_id": 57})["route_sequence"] == ROUTE
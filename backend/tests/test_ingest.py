@@ -0,0 +1,79 @@
+import io
+import pandas as pd
+import pytest
+
+from utils.ingest import read_upload, ingest_upload, UNKNOWN_DATE
+
+HEADER = ("dispatch_id,dispatch_created_on,expected_delivery_date,Origin Id,Origin Geo Lat,Origin Geo Lon,"
+          "Distributor Id,Distributor Name,Dest Geo Lat,Dest Geo Lon,Vehicle Id\n")
+
+def sheet(*rows):
+    return io.BytesIO((HEADER + "".join(row + "\n" for row in rows)).encode())
+
+ROWS = [
+    "1,31/12/2024,01/01/2025,17,31.337319,73.057297,201308,K.F.C,31.4528231,73.1144196,2154",
+    "2,31/12/2024,,17,31.337319,73.057297,,K.F.C,31.4068728,73.1126684,2154",
+    "3,30/12/2024,01/01/2025,17,31.337319,73.057297,200088,Metro,31.4315939,73.081087,57",
+    "4,30/12/2024,01/01/2025,17,31.337319,73.057297,200089,Metro,31.4315939,73.081087,",
+]
+
+def test_compact_dtypes():
+    data = read_upload(sheet(*ROWS), chunksize=2)
+
+    assert len(data) == 3  # the row without a Vehicle Id is dropped
+    assert str(data["Vehicle Id"].dtype) == "int32"
+    assert str(data["Distributor Id"].dtype) == "Int32"
+    assert str(data["Origin Id"].dtype) == "Int32"
+    assert isinstance(data["expected_delivery_date"].dtype, pd.CategoricalDtype)
+    assert data["expected_delivery_date"].tolist() == ["01/01/2025", UNKNOWN_DATE, "01/01/2025"]
+    assert data["Dest Geo Lat"].tolist() == [31.4528231, 31.4068728, 31.4315939]
+
+def test_vehicle_filter_and_partitions():
+    data, partitions = ingest_upload(sheet(*ROWS), vehicle_id="57")
+    assert data["Vehicle Id"].tolist() == [57]
+    assert [int(partition.vehicle_id) for partition in partitions] == [57]
+
+@pytest.mark.parametrize("column, value", [
+    ("Vehicle Id", "3000000000"),
+    ("Distributor Id", "-3000000000"),
+    ("dispatch_id", "2147483648"),
+])
+def test_ids_out_of_int32_range_are_rejected(column, value):
+    row = dict(zip(HEADER.strip().split(","), ROWS[0].split(",")))
+    row[column] = value
+    with pytest.raises(ValueError, match=f"'{column}' value {value} is out of range"):
+        read_upload(sheet(",".join(row.values())))
+
+def test_largest_int32_id_is_kept():
+    data = read_upload(sheet(ROWS[0].rsplit(",", 1)[0] + ",2147483647"))
+    assert data["Vehicle Id"].tolist() == [2147483647]
+
+def test_missing_columns_are_reported():
+    with pytest.raises(ValueError, match="Dest Geo Lon"):
+        read_upload(io.BytesIO(HEADER.replace(",Dest Geo Lon", "").encode()))
+
+def test_timestamp_date_columns_in_parquet_become_sheet_dates():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    import json
+    from datetime import date, datetime
+
+    table = pa.table({
+        "dispatch_id": [1, 2, 3],
+        "dispatch_created_on": pa.array([datetime(2024, 12, 31, 9, 30), datetime(2024, 12, 30), None],
+                                        pa.timestamp("us")),
+        "expected_delivery_date": pa.array([date(2025, 1, 1), None, date(2025, 1, 2)], pa.date32()),
+        "Origin Geo Lat": [31.337319] * 3,
+        "Origin Geo Lon": [73.057297] * 3,
+        "Dest Geo Lat": [31.4528231, 31.4068728, 31.4315939],
+        "Dest Geo Lon": [73.1144196, 73.1126684, 73.081087],
+        "Vehicle Id": [2154, 2154, 57],
+    })
+    buffer = io.BytesIO()
+    pa.parquet.write_table(table, buffer, row_group_size=2)
+
+    data = read_upload(io.BytesIO(buffer.getvalue()), chunksize=2)
+
+    assert data["expected_delivery_date"].tolist() == ["01/01/2025", UNKNOWN_DATE, "02/01/2025"]
+    assert data["dispatch_created_on"].tolist()[:2] == ["31/12/2024", "30/12/2024"]
+    json.dumps(data["expected_delivery_date"].tolist() + data["dispatch_created_on"].dropna().tolist())
@@ -0,0 +1,34 @@
+import os
+import time
+import numpy as np
+
+from utils import island_ga
+from utils.island_ga import genetic_algorithm_islands
+
+def points(count, seed=0):
+    return np.random.default_rng(seed).uniform([31.3, 72.9], [31.6, 73.2], size=(count, 2))
+
+def test_islands_return_a_valid_route():
+    np.random.seed(0)
+    coordinates = points(20)
+    route = genetic_algorithm_islands(20, 20, 0.1, 20, coordinates[0], coordinates,
+                                      islands=2, migration_interval=5)
+    assert sorted(route.route) == list(range(1, 20))
+
+def test_a_crashed_island_does_not_stall_the_others(monkeypatch):
+    run_island = island_ga._run_island
+
+    def crash_island_one(island, *args):
+        if island == 1:
+            os._exit(1)
+        run_island(island, *args)
+
+    monkeypatch.setattr(island_ga, "_run_island", crash_island_one)
+    np.random.seed(0)
+    coordinates = points(20)
+    started = time.monotonic()
+    route = genetic_algorithm_islands(20, 1000, 0.1, 20, coordinates[0], coordinates,
+                                      islands=3, migration_interval=5)
+    # Far below MIGRATION_TIMEOUT: the barrier is aborted once island 1 is gone
+    assert time.monotonic() - started < 30
+    assert sorted(route.route) == list(range(1, 20))
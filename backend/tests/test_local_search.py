@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from utils.local_search import improve_route, or_opt, relocate, build_neighbour_lists
+
+def tour_cost(route, distance_matrix):
+    tour = np.r_[0, route, 0]
+    return distance_matrix[tour[:-1], tour[1:]].sum()
+
+def asymmetric_matrix(num_points, seed):
+    rng = np.random.default_rng(seed)
+    matrix = rng.uniform(1, 100, size=(num_points, num_points))
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+def symmetric_matrix(num_points, seed):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 10, size=(num_points, 2))
+    return np.linalg.norm(points[:, np.newaxis] - points[np.newaxis], axis=2)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_asymmetric_matrix_terminates_and_improves(seed):
+    distance_matrix = asymmetric_matrix(16, seed)
+    route = np.random.default_rng(seed).permutation(np.arange(1, 16))
+
+    improved = improve_route(route, distance_matrix)
+
+    assert sorted(improved) == list(range(1, 16))
+    assert tour_cost(improved, distance_matrix) <= tour_cost(route, distance_matrix) + 1e-9
+
+@pytest.mark.parametrize("move", [or_opt, relocate])
+def test_asymmetric_moves_strictly_shorten_the_tour(move):
+    # Every applied move must be a real improvement, otherwise moves can cycle forever
+    distance_matrix = asymmetric_matrix(16, 7)
+    dist = distance_matrix.tolist()
+    neighbours = build_neighbour_lists(distance_matrix, 10)
+    tour = [0] + list(np.random.default_rng(7).permutation(np.arange(1, 16))) + [0]
+    positions = [0] * 16
+    for pos, node in enumerate(tour[1:-1], start=1):
+        positions[node] = pos
+
+    cost = tour_cost(tour[1:-1], distance_matrix)
+    for _ in range(1000):
+        if not move(tour, dist, neighbours, positions):
+            break
+        new_cost = tour_cost(tour[1:-1], distance_matrix)
+        assert new_cost < cost
+        cost = new_cost
+    else:
+        pytest.fail("move kept applying after 1000 improvements")
+
+def test_symmetric_matrix_reaches_a_short_tour():
+    distance_matrix = symmetric_matrix(30, 1)
+    route = np.random.default_rng(1).permutation(np.arange(1, 30))
+    improved = improve_route(route, distance_matrix)
+    assert sorted(improved) == list(range(1, 30))
+    assert tour_cost(improved, distance_matrix) < 0.6 * tour_cost(route, distance_matrix)
+
+def test_unknown_move():
+    with pytest.raises(ValueError):
+        improve_route(np.arange(1, 5), symmetric_matrix(5, 0), moves=("three_opt",))
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from utils.optimization_utils import build_stop_records, optimize_routes, resolve_config, UNKNOWN_DISTRIBUTOR
+from utils.route_cache import route_cache
+from routes.route_optimization import config_from_form
+
+def test_build_stop_records():
+    rows = pd.DataFrame({
+        "Dest Geo Lat": [31.4, 31.5],
+        "Dest Geo Lon": [73.1, 73.2],
+        "Distributor Id": pd.array([201308, None], dtype="Int32"),
+        "Distributor Name": ["K.F.C", None],
+    }, index=[7, 3])
+
+    stops = build_stop_records(rows)
+
+    assert stops == [
+        {"lat": 31.4, "lon": 73.1, "distributor_id": 201308, "distributor_name": "K.F.C", "row_index": 7},
+        {"lat": 31.5, "lon": 73.2, "distributor_id": None, "distributor_name": UNKNOWN_DISTRIBUTOR, "row_index": 3},
+    ]
+
+def test_build_stop_records_rejects_non_numeric_distributor_id():
+    rows = pd.DataFrame({"Dest Geo Lat": [31.4], "Dest Geo Lon": [73.1], "Distributor Id": ["D-77"]})
+    with pytest.raises(ValueError, match="D-77"):
+        build_stop_records(rows)
+
+def upload(stops_per_vehicle):
+    rows = []
+    for vehicle_id, count in stops_per_vehicle.items():
+        for stop in range(count):
+            rows.append({
+                "Vehicle Id": vehicle_id,
+                "dispatch_created_on": "31/12/2024",
+                "expected_delivery_date": "01/01/2025",
+                "Origin Geo Lat": 31.34,
+                "Origin Geo Lon": 73.06,
+                "Distributor Id": 1000 * vehicle_id + stop,
+                "Distributor Name": f"D{stop}",
+                "Dest Geo Lat": 31.40 + 0.011 * stop + 0.001 * vehicle_id,
+                "Dest Geo Lon": 73.10 - 0.007 * stop,
+            })
+    return pd.DataFrame(rows)
+
+def test_run_stats_cover_ga_cached_and_single_stop_vehicles():
+    data = upload({1: 6, 2: 1})
+    config = {"num_generations": 5, "population_size": 10, "seed": 3}
+
+    route_cache.clear()
+    stats = {}
+    optimize_routes(data, config=config, stats=stats)
+    assert set(stats) == {1, 2}
+    assert stats[1]["stop_reason"] == "max_generations"
+    assert stats[2] == {"generations_used": 0, "stop_reason": "trivial", "best_so_far": []}
+
+    stats = {}
+    optimize_routes(data, config=config, stats=stats)
+    assert stats[1] == {"generations_used": 0, "stop_reason": "cached", "best_so_far": []}
+
+def test_tours_are_not_cached_while_the_rl_model_is_loading(monkeypatch):
+    from utils.model_provider import rl_model_provider
+    data = upload({1: 6})
+    config = {"num_generations": 5, "population_size": 10, "seed": 3}
+    route_cache.clear()
+
+    monkeypatch.setattr(rl_model_provider, "_state", "loading")
+    stats = {}
+    optimize_routes(data, config=config, stats=stats)
+    optimize_routes(data, config=config, stats=stats)
+    assert stats[1]["stop_reason"] == "max_generations"
+
+    # Once loading is over (here: failed, so GA-only for good) tours are cached again
+    monkeypatch.setattr(rl_model_provider, "_state", "failed")
+    optimize_routes(data, config=config)
+    optimize_routes(data, config=config, stats=stats)
+    assert stats[1]["stop_reason"] == "cached"
+
+@pytest.mark.parametrize("population_size", [1, 2, 3])
+def test_population_smaller_than_the_minimum_is_rejected(population_size):
+    with pytest.raises(ValueError, match="'population_size' must be at least 4"):
+        resolve_config({"population_size": population_size})
+    with pytest.raises(ValueError, match="'population_size' must be at least 4"):
+        config_from_form({"population_size": str(population_size)})
+    with pytest.raises(ValueError, match="'population_size' must be at least 4"):
+        optimize_routes(upload({1: 6}), config={"population_size": population_size})
+
+def test_smallest_population_runs():
+    assert config_from_form({"population_size": "4"}) == {"population_size": 4}
+    routes = optimize_routes(upload({1: 6}), config={"population_size": 4, "num_generations": 3, "use_cache": False})
+    assert len(routes[1]) == 8
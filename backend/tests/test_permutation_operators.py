@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from utils.permutation_operators import CROSSOVER_OPERATORS, get_crossover_operator
+
+def random_parents(num_pairs, route_length, rng):
+    genes = np.arange(1, route_length + 1)
+    parents1 = np.array([rng.permutation(genes) for _ in range(num_pairs)])
+    parents2 = np.array([rng.permutation(genes) for _ in range(num_pairs)])
+    return parents1, parents2
+
+@pytest.mark.parametrize("name", sorted(CROSSOVER_OPERATORS))
+@pytest.mark.parametrize("route_length", [1, 2, 3, 4, 10, 57])
+def test_children_are_permutations(name, route_length):
+    rng = np.random.default_rng(route_length)
+    np.random.seed(route_length)
+    parents1, parents2 = random_parents(64, route_length, rng)
+
+    children = CROSSOVER_OPERATORS[name](parents1, parents2)
+
+    assert children.shape == parents1.shape
+    assert (np.sort(children, axis=1) == np.arange(1, route_length + 1)).all()
+
+# ERX keeps the parents' edges but may walk the shared cycle in either direction
+@pytest.mark.parametrize("name", ["single_cut", "ox", "pmx"])
+def test_identical_parents_give_the_parent(name):
+    np.random.seed(0)
+    parents = np.array([[4, 0, 3, 1, 2]] * 8)
+    assert (CROSSOVER_OPERATORS[name](parents, parents.copy()) == parents).all()
+
+def test_unknown_operator():
+    with pytest.raises(ValueError):
+        get_crossover_operator("cycle")
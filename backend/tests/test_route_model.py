@@ -0,0 +1,71 @@
+from pymongo.errors import DuplicateKeyError
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from models import route_model
+
+@pytest.fixture
+def routes(monkeypatch):
+    collection = mongomock.MongoClient().RouteSync.routes
+    monkeypatch.setattr(route_model, "routes_collection", collection)
+    return collection
+
+def sequence(*distributor_ids):
+    return [{"Dest Geo Lat": 31.4, "Dest Geo Lon": 73.1, "Distributor Id": d, "Distributor Name": "D"}
+            for d in distributor_ids]
+
+def test_save_routes_counts_inserts_and_updates(routes):
+    route_model.ensure_route_indexes()
+    saved = route_model.save_routes([
+        (2154, "01/01/2025", sequence(1, 2), {"total_distance_km": 12.5}),
+        (2155, "01/01/2025", sequence(3)),
+    ])
+    assert saved == {"inserted": 2, "updated": 0}
+
+    # The same (vehicle_id, date) uploaded again is an update, not a second document
+    saved = route_model.save_routes([
+        (2154, "01/01/2025", sequence(2, 1), {"total_distance_km": 11.0}),
+        (2154, "02/01/2025", sequence(4)),
+    ])
+    assert saved == {"inserted": 1, "updated": 1}
+    assert routes.count_documents({}) == 3
+
+    stored = routes.find_one({"vehicle_id": 2154, "date": "01/01/2025"}, {"_id": 0})
+    assert stored == {
+        "vehicle_id": 2154,
+        "date": "01/01/2025",
+        "route_sequence": sequence(2, 1),
+        "total_distance_km": 11.0,
+        "status": "In Progress",
+    }
+
+def test_save_routes_without_routes(routes):
+    assert route_model.save_routes([]) == {"inserted": 0, "updated": 0}
+
+def test_save_route_upserts_one_route(routes):
+    route_model.save_route(57, "02/01/2025", sequence(1))
+    route_model.save_route(57, "02/01/2025", sequence(1, 2))
+    assert [doc["route_sequence"] for doc in routes.find({"vehicle_id": 57})] == [sequence(1, 2)]
+
+def test_ensure_route_indexes(routes):
+    route_model.ensure_route_indexes()
+    route_model.ensure_route_indexes()  # idempotent
+
+    indexes = routes.index_information()
+    assert indexes["vehicle_id_date_unique"]["key"] == [("vehicle_id", 1), ("date", 1)]
+    assert indexes["vehicle_id_date_unique"]["unique"] is True
+    assert indexes["date_vehicle_id"]["key"] == [("date", 1), ("vehicle_id", 1)]
+
+    routes.insert_one({"vehicle_id": 1, "date": "01/01/2025"})
+    with pytest.raises(DuplicateKeyError):
+        routes.insert_one({"vehicle_id": 1, "date": "01/01/2025"})
+
+def test_find_route_dates(routes):
+    assert route_model.find_route_dates() == []
+    route_model.save_routes([
+        (2154, "02/01/2025", sequence(1)),
+        (2155, "01/01/2025", sequence(2)),
+        (2154, "01/01/2025", sequence(3)),
+    ])
+    assert route_model.find_route_dates() == ["01/01/2025", "02/01/2025"]
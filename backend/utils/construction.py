@@ -0,0 +1,151 @@
+import numpy as np
+
+# Hilbert curve resolution: coordinates are quantised to a 2^order x 2^order grid
+HILBERT_ORDER = 16
+
+def nearest_neighbour_tours(distance_matrix, first_stops):
+    """
+    Nearest-neighbour tours, one per entry of `first_stops`, built side by side:
+    each step picks every tour's closest unvisited delivery in one vectorized
+    argmin, so k starts cost O(k * n^2) array work instead of k Python loops.
+    :param first_stops: delivery indices (1..n-1) each tour visits right after the origin
+    :return: (k, n-1) array of routes
+    """
+    distance_matrix = np.asarray(distance_matrix, dtype=float)
+    num_points = len(distance_matrix)
+    first_stops = np.asarray(first_stops, dtype=int)
+    rows = np.arange(len(first_stops))
+
+    routes = np.empty((len(first_stops), num_points - 1), dtype=int)
+    visited = np.zeros((len(first_stops), num_points), dtype=bool)
+    visited[:, 0] = True
+    current = first_stops
+    for step in range(num_points - 1):
+        routes[:, step] = current
+        visited[rows, current] = True
+        if step == num_points - 2:
+            break
+        candidates = np.where(visited, np.inf, distance_matrix[current])
+        current = np.argmin(candidates, axis=1)
+    return routes
+
+def savings_tour(distance_matrix):
+    """
+    Clarke-Wright savings for a single vehicle: start from origin -> i -> origin
+    for every delivery and merge route ends in order of saving
+    d(0, i) + d(0, j) - d(i, j), skipping merges that would close a cycle or
+    give a stop three neighbours. Asymmetric matrices use the mean of both directions.
+    O(n^2 log n) for sorting the savings.
+    :return: route array over deliveries 1..n-1
+    """
+    matrix = np.asarray(distance_matrix, dtype=float)
+    matrix = (matrix + matrix.T) / 2
+    num_deliveries = len(matrix) - 1
+    if num_deliveries < 3:
+        return np.arange(1, num_deliveries + 1)
+
+    savings = matrix[0, 1:, np.newaxis] + matrix[np.newaxis, 0, 1:] - matrix[1:, 1:]
+    upper_i, upper_j = np.triu_indices(num_deliveries, k=1)
+    order = np.argsort(-savings[upper_i, upper_j], kind="stable")
+
+    degree = np.zeros(num_deliveries, dtype=int)
+    neighbours = [[] for _ in range(num_deliveries)]
+    parent = list(range(num_deliveries))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    links = 0
+    for i, j in zip(upper_i[order].tolist(), upper_j[order].tolist()):
+        if degree[i] == 2 or degree[j] == 2:
+            continue
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        parent[root_i] = root_j
+        degree[i] += 1
+        degree[j] += 1
+        neighbours[i].append(j)
+        neighbours[j].append(i)
+        links += 1
+        if links == num_deliveries - 1:
+            break
+
+    # Walk the single remaining path from one end
+    path = [int(np.flatnonzero(degree < 2)[0])]
+    previous = -1
+    while len(path) < num_deliveries:
+        following = [node for node in neighbours[path[-1]] if node != previous]
+        previous = path[-1]
+        path.append(following[0])
+    route = np.asarray(path) + 1
+
+    # Drive the path in whichever direction is shorter (matters for asymmetric matrices)
+    reverse = route[::-1]
+    distance_matrix = np.asarray(distance_matrix, dtype=float)
+    forward_cost = distance_matrix[0, route[0]] + distance_matrix[route[:-1], route[1:]].sum() + distance_matrix[route[-1], 0]
+    reverse_cost = distance_matrix[0, reverse[0]] + distance_matrix[reverse[:-1], reverse[1:]].sum() + distance_matrix[reverse[-1], 0]
+    return route if forward_cost <= reverse_cost else reverse
+
+def hilbert_index(points, order=HILBERT_ORDER):
+    """
+    Position of each (lat, lon) point along a Hilbert curve over the points'
+    bounding box, computed for all points at once (one pass per bit).
+    """
+    points = np.asarray(points, dtype=float)
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, 1e-12)
+    side = 2 ** order
+    cells = np.minimum(((points - low) / span * side).astype(np.int64), side - 1)
+    x, y = cells[:, 1].copy(), cells[:, 0].copy()
+
+    index = np.zeros(len(points), dtype=np.int64)
+    step = side // 2
+    while step > 0:
+        rx = (x & step) > 0
+        ry = (y & step) > 0
+        index += step * step * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        step //= 2
+    return index
+
+def hilbert_tour(points_coordinates, distance_matrix):
+    """
+    Visit deliveries in Hilbert curve order (O(n log n)), entering the cycle
+    at the edge where inserting the origin costs least.
+    :return: route array over deliveries 1..n-1
+    """
+    distance_matrix = np.asarray(distance_matrix, dtype=float)
+    cycle = np.argsort(hilbert_index(np.asarray(points_coordinates)[1:]), kind="stable") + 1
+    if len(cycle) < 3:
+        return cycle
+    before, after = np.roll(cycle, 1), cycle
+    insertion = distance_matrix[before, 0] + distance_matrix[0, after] - distance_matrix[before, after]
+    return np.roll(cycle, -int(np.argmin(insertion)))
+
+def construction_routes(points_coordinates, distance_matrix, count):
+    """
+    Up to `count` distinct seed routes: Clarke-Wright savings, Hilbert order,
+    then nearest-neighbour tours starting from the deliveries closest to the origin.
+    :return: (k, n-1) array of routes, k <= count
+    """
+    num_deliveries = len(distance_matrix) - 1
+    if count <= 0 or num_deliveries < 2:
+        return np.empty((0, max(num_deliveries, 0)), dtype=int)
+
+    routes = [savings_tour(distance_matrix), hilbert_tour(points_coordinates, distance_matrix)]
+    if count > len(routes):
+        first_stops = np.argsort(np.asarray(distance_matrix)[0, 1:], kind="stable")[:count - len(routes)] + 1
+        routes.extend(nearest_neighbour_tours(distance_matrix, first_stops))
+
+    routes = np.array(routes, dtype=int)
+    first_occurrences = np.unique(routes, axis=0, return_index=True)[1]
+    return routes[np.sort(first_occurrences)][:count]
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Mean Earth radius in kilometres
+EARTH_RADIUS_KM = 6371.0088
+
+# Every kernel takes (points, other=None) and returns the len(points) x len(other)
+# matrix of distances from each of `points` to each of `other` (default: points).
+
+def _split(points, other):
+    points = np.asarray(points, dtype=float)
+    other = points if other is None else np.asarray(other, dtype=float)
+    return points[:, 0][:, np.newaxis], points[:, 1][:, np.newaxis], other[:, 0][np.newaxis, :], other[:, 1][np.newaxis, :]
+
+def euclidean_matrix(points, other=None):
+    """
+    Straight-line distance over raw (lat, lon) degrees, as the GA originally used.
+    Fast but not in real units and distorted away from the equator.
+    """
+    lat1, lon1, lat2, lon2 = _split(points, other)
+    dlat, dlon = lat1 - lat2, lon1 - lon2
+    return np.sqrt(dlat * dlat + dlon * dlon)
+
+def haversine_matrix(points, other=None):
+    """
+    Great-circle distance in km between every pair of (lat, lon) points,
+    computed in one broadcast.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in _split(points, other))
+    a = np.sin((lat1 - lat2) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon1 - lon2) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def equirectangular_matrix(points, other=None):
+    """
+    Equirectangular approximation in km: cheaper than haversine (no arcsin)
+    and accurate to well under 1% at city scale.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in _split(points, other))
+    x = (lon1 - lon2) * np.cos((lat1 + lat2) / 2)
+    y = lat1 - lat2
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+def road_matrix(points, other=None):
+    """
+    Shortest road-path distance in km over the configured offline OSM extract
+    (see road_network). Imported lazily so formula metrics never load the graph.
+    """
+    from .road_network import road_matrix as build_road_matrix
+    return build_road_matrix(points, other)
+
+# Metrics selectable through the "distance_metric" config key
+DISTANCE_METRICS = {
+    "euclidean": euclidean_matrix,
+    "haversine": haversine_matrix,
+    "equirectangular": equirectangular_matrix,
+    "road": road_matrix,
+}
+
+# Metrics backed by a loaded graph: optimize_routes builds their matrices in the
+# calling process instead of loading the graph again in every worker
+GRAPH_METRICS = {"road"}
+
+def get_distance_metric(name):
+    """
+    Look up a matrix builder by name, raising ValueError for unknown names.
+    """
+    if name not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric '{name}'. Choose from {sorted(DISTANCE_METRICS)}.")
+    return DISTANCE_METRICS[name]
+
+def tour_length_km(coordinates):
+    """
+    Great-circle length in km of a path visiting `coordinates` ([[lat, lon], ...]) in order.
+    """
+    radians = np.radians(np.asarray(coordinates, dtype=float))
+    if len(radians) < 2:
+        return 0.0
+    lat, lon = radians[:, 0], radians[:, 1]
+    a = (np.sin(np.diff(lat) / 2) ** 2
+         + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+    return float(np.sum(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))))
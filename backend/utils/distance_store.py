@@ -0,0 +1,212 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialised within a process
+    fcntl = None
+
+from .distance_metrics import get_distance_metric
+
+# Initial number of ids a store file holds; it doubles when full
+INITIAL_CAPACITY = 256
+
+# Decimal places of the lat/lon stored with each id (about 0.1 m); a location
+# uploaded at other coordinates has its stored distances cleared
+COORDINATE_DECIMALS = 6
+
+def location_key(kind, location_id):
+    """
+    Store key for a warehouse ("origin", Origin Id) or a distributor
+    ("distributor", Distributor Id). Returns None when the id is unknown,
+    which makes that point uncacheable.
+    """
+    if location_id is None:
+        return None
+    return f"{kind}:{int(location_id)}"
+
+@contextmanager
+def _file_lock(path):
+    """
+    Exclusive inter-process lock on `path` (created if needed) for the block.
+    """
+    with open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class DistanceStore:
+    """
+    Persistent pairwise distance cache across uploads, keyed by location id.
+      - <directory>/<metric>_distances.npy : float32 (capacity x capacity) matrix,
+        memory-mapped, NaN where a pair has not been computed yet
+      - <directory>/<metric>_index.json    : {location key: [row, lat, lon]}
+    Row i / column j hold the distance from location i to location j, so
+    asymmetric (road network) distances are stored as-is. Each id keeps the
+    coordinates its distances were computed for; when it comes back at other
+    coordinates (a moved warehouse or distributor) its row and column are
+    cleared and recomputed.
+    Several processes (e.g. gunicorn workers) may share a directory: every read
+    and write holds an flock on <directory>/<metric>.lock and first reloads the
+    index and matrix if another process changed them.
+    """
+    def __init__(self, directory, metric="haversine", provider=None):
+        """
+        :param provider: callable (points, other) -> matrix; defaults to the
+                         formula kernel named by `metric`
+        """
+        self.directory = directory
+        self.metric = metric
+        self.provider = provider or get_distance_metric(metric)
+        self.matrix_path = os.path.join(directory, f"{metric}_distances.npy")
+        self.index_path = os.path.join(directory, f"{metric}_index.json")
+        self.lock_path = os.path.join(directory, f"{metric}.lock")
+        self._lock = threading.Lock()
+        self.index = {}
+        self._matrix = None
+        self._index_stamp = None
+        self._matrix_inode = None
+        os.makedirs(directory, exist_ok=True)
+
+        with self._lock, _file_lock(self.lock_path):
+            if os.path.exists(self.index_path) and os.path.exists(self.matrix_path):
+                self._refresh()
+            else:
+                self._matrix = self._allocate(INITIAL_CAPACITY)
+                self._save_index()
+
+    def _refresh(self):
+        """
+        Reload the index and the matrix mapping if another process rewrote them
+        since this process last read or wrote them. Call with the file lock held.
+        """
+        stat = os.stat(self.index_path)
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._index_stamp:
+            with open(self.index_path) as index_file:
+                # Rows saved without coordinates ({key: row}) count as moved on next use
+                self.index = {
+                    key: entry if isinstance(entry, list) else [entry, None, None]
+                    for key, entry in json.load(index_file).items()
+                }
+            self._index_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if os.stat(self.matrix_path).st_ino != self._matrix_inode:
+            self._matrix = None
+            self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+            self._matrix_inode = os.stat(self.matrix_path).st_ino
+
+    def _allocate(self, capacity, previous=None):
+        """
+        Create (or grow) the memory-mapped matrix file, copying any existing block.
+        """
+        temp_path = self.matrix_path + ".tmp"
+        matrix = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.float32, shape=(capacity, capacity))
+        matrix[:] = np.nan
+        if previous is not None:
+            size = len(previous)
+            matrix[:size, :size] = previous
+        matrix.flush()
+        del matrix
+        os.replace(temp_path, self.matrix_path)
+        self._matrix_inode = os.stat(self.matrix_path).st_ino
+        return np.load(self.matrix_path, mmap_mode="r+")
+
+    def _rows_for(self, keys, points):
+        """
+        Row of each key, registering new keys (growing the file when needed) and
+        clearing the row and column of keys whose point moved. Keys that are None
+        get row -1. Call with the file lock held.
+        """
+        coordinates = {
+            key: [round(float(lat), COORDINATE_DECIMALS), round(float(lon), COORDINATE_DECIMALS)]
+            for key, (lat, lon) in zip(keys, points) if key is not None
+        }
+        moved = [key for key, point in coordinates.items() if key in self.index and self.index[key][1:] != point]
+        for key in moved:
+            row = self.index[key][0]
+            self._matrix[row, :] = np.nan
+            self._matrix[:, row] = np.nan
+            self.index[key] = [row] + coordinates[key]
+        if moved:
+            self._matrix.flush()
+            logging.debug(f"Distance store: cleared {len(moved)} moved locations")
+
+        new_keys = [key for key in coordinates if key not in self.index]
+        if new_keys:
+            needed = len(self.index) + len(new_keys)
+            if needed > len(self._matrix):
+                capacity = len(self._matrix)
+                while capacity < needed:
+                    capacity *= 2
+                previous = np.array(self._matrix)
+                del self._matrix
+                self._matrix = self._allocate(capacity, previous)
+            for key in new_keys:
+                self.index[key] = [len(self.index)] + coordinates[key]
+        if new_keys or moved:
+            # Persist new rows straight away so other processes never reuse them
+            self._save_index()
+        return np.array([self.index[key][0] if key is not None else -1 for key in keys], dtype=int)
+
+    def _save_index(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(self.index, index_file)
+        os.replace(temp_path, self.index_path)
+        stat = os.stat(self.index_path)
+        self._index_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def matrix_for(self, keys, points):
+        """
+        Distance matrix for `points` (same order as `keys`), reading stored pairs
+        first and asking the provider only for rows/columns with missing pairs.
+        :param keys: location keys from location_key(); None for unidentified points
+        :param points: (n, 2) array of (lat, lon)
+        :return: (n, n) float64 matrix
+        """
+        points = np.asarray(points, dtype=float)
+        # A repeated key (e.g. one distributor at two coordinates) is ambiguous; only its first point is stored
+        seen = set()
+        keys = [key if key not in seen and not seen.add(key) else None for key in keys]
+        with self._lock, _file_lock(self.lock_path):
+            self._refresh()
+            rows = self._rows_for(keys, points)
+            known = rows >= 0
+            matrix = np.full((len(points), len(points)), np.nan)
+            matrix[np.ix_(known, known)] = self._matrix[np.ix_(rows[known], rows[known])]
+            np.fill_diagonal(matrix, 0.0)
+
+            missing = np.isnan(matrix)
+            if missing.any():
+                # Points with a missing pair in their row or column get recomputed
+                stale = np.flatnonzero(missing.any(axis=1) | missing.any(axis=0))
+                matrix[stale, :] = self.provider(points[stale], points)
+                matrix[:, stale] = self.provider(points, points[stale])
+
+                stale_known = stale[known[stale]]
+                if len(stale_known):
+                    known_idx = np.flatnonzero(known)
+                    self._matrix[np.ix_(rows[stale_known], rows[known_idx])] = matrix[np.ix_(stale_known, known_idx)]
+                    self._matrix[np.ix_(rows[known_idx], rows[stale_known])] = matrix[np.ix_(known_idx, stale_known)]
+                    self._matrix.flush()
+                logging.debug(f"Distance store: computed {len(stale)} of {len(points)} rows")
+            return matrix
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_distance_store(directory, metric="haversine"):
+    """
+    Process-wide DistanceStore for (directory, metric), opened on first use.
+    """
+    with _stores_lock:
+        if (directory, metric) not in _stores:
+            _stores[(directory, metric)] = DistanceStore(directory, metric)
+        return _stores[(directory, metric)]
@@ -0,0 +1,129 @@
+import io
+import csv
+import zlib
+
+# Rows written per CSV block / Parquet row group when streaming an export
+EXPORT_BATCH_ROWS = 5_000
+
+# Export formats selectable through the "format" query parameter: (mimetype, file extension)
+# Parquet needs the optional `pyarrow` package
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet exports require the 'pyarrow' package; use format=csv instead.")
+    return pa
+
+def get_export_format(name):
+    """
+    Look up an export format by name, raising ValueError for unknown names and
+    for formats whose optional package is not installed, so callers can reject
+    them before a response is started.
+    """
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{name}'. Choose from {sorted(EXPORT_FORMATS)}.")
+    if name == "parquet":
+        _pyarrow()
+    return EXPORT_FORMATS[name]
+
+def _batches(rows, size=EXPORT_BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def csv_chunks(rows, columns):
+    """
+    Encode rows (tuples aligned with `columns`) as UTF-8 CSV, one block of
+    bytes per EXPORT_BATCH_ROWS rows; the header is sent on its own first.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+def gzip_chunks(chunks):
+    """
+    Gzip a stream of byte chunks incrementally.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that keeps what was written until take() hands it out.
+    """
+    def __init__(self):
+        self.pieces = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pieces.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data, self.pieces = b"".join(self.pieces), []
+        return data
+
+def parquet_chunks(rows, columns):
+    """
+    Encode rows as a Parquet file with one row group per EXPORT_BATCH_ROWS rows,
+    yielding the bytes of each row group as soon as it is written.
+    Needs the optional `pyarrow` package. Column types come from the first batch
+    (all-empty columns become strings).
+    """
+    pa = _pyarrow()
+    sink = _ChunkSink()
+    writer = None
+    for batch in _batches(rows):
+        table = pa.Table.from_arrays([pa.array(values) for values in zip(*batch)], names=columns)
+        if writer is None:
+            schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            writer = pa.parquet.ParquetWriter(sink, schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.take()
+    if writer is None:
+        writer = pa.parquet.ParquetWriter(sink, pa.schema([(column, pa.string()) for column in columns]))
+    writer.close()
+    yield sink.take()
+
+def export_chunks(rows, columns, format_name="csv"):
+    """
+    Stream rows (an iterable of tuples aligned with `columns`) as bytes in the
+    given EXPORT_FORMATS format, without building the whole file in memory.
+    """
+    get_export_format(format_name)
+    if format_name == "parquet":
+        return parquet_chunks(rows, columns)
+    chunks = csv_chunks(rows, columns)
+    return gzip_chunks(chunks) if format_name == "csv.gz" else chunks
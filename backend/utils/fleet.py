@@ -0,0 +1,271 @@
+import numpy as np
+
+from .distance_metrics import EARTH_RADIUS_KM
+from .routing_algorithm import build_distance_matrix
+from .incremental import cheapest_insertion
+from .ingest import VEHICLE_COLUMN, DELIVERY_DATE_COLUMN, ORIGIN_COLUMNS, ORIGIN_ID_COLUMN, DEST_COLUMNS
+
+# Optional per-row demand column; without it every row (dispatch line) counts as 1
+DEMAND_COLUMN = "Demand"
+
+# Lloyd iterations for capacitated k-means
+KMEANS_ITERATIONS = 50
+
+# Passes of the inter-cluster savings refinement
+SAVINGS_MAX_PASSES = 10
+
+def _project(origin, points):
+    """
+    Equirectangular (x, y) in km of `points` relative to `origin`; enough for
+    angles and cluster centroids at city scale.
+    """
+    points = np.radians(np.asarray(points, dtype=float))
+    lat0, lon0 = np.radians(origin[0]), np.radians(origin[1])
+    x = (points[:, 1] - lon0) * np.cos((points[:, 0] + lat0) / 2)
+    y = points[:, 0] - lat0
+    return EARTH_RADIUS_KM * np.column_stack((x, y))
+
+def _check_fits(demands, capacities):
+    if demands.sum() > capacities.sum():
+        raise ValueError(f"Total demand {demands.sum():g} exceeds fleet capacity {capacities.sum():g}.")
+    if len(demands) and demands.max() > capacities.max():
+        raise ValueError(f"A stop's demand {demands.max():g} exceeds the largest vehicle capacity {capacities.max():g}.")
+
+def sweep_clusters(origin, points, demands, capacities):
+    """
+    Sweep heuristic: order stops by polar angle around the origin, starting
+    after the widest empty sector, and fill vehicles in turn.
+    :return: vehicle index (into capacities) for every point
+    """
+    xy = _project(origin, points)
+    angles = np.arctan2(xy[:, 1], xy[:, 0])
+    order = np.argsort(angles, kind="stable")
+    if len(order) > 1:
+        sorted_angles = angles[order]
+        gaps = np.diff(np.r_[sorted_angles, sorted_angles[0] + 2 * np.pi])
+        order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    # Each vehicle takes its capacity share of the demand still unassigned, so a
+    # roomy fleet is split evenly instead of filling the first vehicle
+    assignment = np.empty(len(points), dtype=int)
+    vehicle, load = 0, 0.0
+    remaining_demand = demands.sum()
+    target = remaining_demand * capacities[0] / capacities.sum()
+    for point in order:
+        while vehicle < len(capacities) and (
+            load + demands[point] > capacities[vehicle]
+            or (load >= target and vehicle < len(capacities) - 1)
+        ):
+            vehicle, load = vehicle + 1, 0.0
+            if vehicle < len(capacities):
+                target = remaining_demand * capacities[vehicle] / capacities[vehicle:].sum()
+        if vehicle == len(capacities):
+            raise ValueError("Stops do not fit the fleet in sweep order; add capacity or try method 'kmeans'.")
+        assignment[point] = vehicle
+        load += demands[point]
+        remaining_demand -= demands[point]
+    return assignment
+
+def kmeans_clusters(origin, points, demands, capacities):
+    """
+    Capacitated k-means with one cluster per vehicle, seeded from the sweep
+    clusters. Each iteration assigns stops in order of regret (gap between their
+    nearest and second-nearest centroid) to the nearest centroid with room left.
+    :return: vehicle index (into capacities) for every point
+    """
+    xy = _project(origin, points)
+    assignment = sweep_clusters(origin, points, demands, capacities)
+    centroids = np.zeros((len(capacities), 2))
+    for _ in range(KMEANS_ITERATIONS):
+        for vehicle in range(len(capacities)):
+            members = assignment == vehicle
+            if members.any():
+                centroids[vehicle] = xy[members].mean(axis=0)
+
+        distances = np.linalg.norm(xy[:, np.newaxis, :] - centroids[np.newaxis, :, :], axis=2)
+        ranked = np.sort(distances, axis=1)
+        regret = ranked[:, 1] - ranked[:, 0] if len(capacities) > 1 else ranked[:, 0]
+
+        new_assignment = np.empty_like(assignment)
+        remaining = capacities.astype(float)
+        for point in np.argsort(-regret, kind="stable"):
+            for vehicle in np.argsort(distances[point], kind="stable"):
+                if demands[point] <= remaining[vehicle]:
+                    break
+            else:
+                # No centroid has room in regret order; keep the feasible sweep split
+                return assignment
+            new_assignment[point] = vehicle
+            remaining[vehicle] -= demands[point]
+
+        if np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+    return assignment
+
+# Clustering methods selectable through the fleet "method" parameter
+FLEET_METHODS = {
+    "sweep": sweep_clusters,
+    "kmeans": kmeans_clusters,
+}
+
+def get_fleet_method(name):
+    """
+    Look up a clustering method by name, raising ValueError for unknown names.
+    """
+    if name not in FLEET_METHODS:
+        raise ValueError(f"Unknown fleet method '{name}'. Choose from {sorted(FLEET_METHODS)}.")
+    return FLEET_METHODS[name]
+
+def _insertion_tour(stops, distance_matrix):
+    route = np.array([], dtype=int)
+    for stop in stops:
+        route = cheapest_insertion(route, stop, distance_matrix)
+    return route
+
+def refine_by_savings(assignment, demands, capacities, distance_matrix):
+    """
+    Move single stops between clusters while it shortens the fleet.
+    Each cluster keeps a cheapest-insertion tour; a stop moves when the saving
+    from removing it from its tour beats its cheapest insertion cost into
+    another cluster with capacity left.
+    :param distance_matrix: over origin (0) + points (1..n)
+    """
+    assignment = assignment.copy()
+    loads = np.bincount(assignment, weights=demands, minlength=len(capacities))
+    tours = [_insertion_tour(np.flatnonzero(assignment == vehicle) + 1, distance_matrix)
+             for vehicle in range(len(capacities))]
+
+    for _ in range(SAVINGS_MAX_PASSES):
+        moved = False
+        for point in range(len(assignment)):
+            stop, current = point + 1, assignment[point]
+            tour = np.concatenate(([0], tours[current], [0]))
+            position = int(np.flatnonzero(tour == stop)[0])
+            before, after = tour[position - 1], tour[position + 1]
+            saving = (distance_matrix[before, stop] + distance_matrix[stop, after]
+                      - distance_matrix[before, after])
+
+            best_vehicle, best_cost = None, saving - 1e-9
+            for vehicle in range(len(capacities)):
+                if vehicle == current or loads[vehicle] + demands[point] > capacities[vehicle]:
+                    continue
+                other = np.concatenate(([0], tours[vehicle], [0]))
+                cost = np.min(distance_matrix[other[:-1], stop] + distance_matrix[stop, other[1:]]
+                              - distance_matrix[other[:-1], other[1:]])
+                if cost < best_cost:
+                    best_vehicle, best_cost = vehicle, cost
+
+            if best_vehicle is not None:
+                tours[current] = tours[current][tours[current] != stop]
+                tours[best_vehicle] = cheapest_insertion(tours[best_vehicle], stop, distance_matrix)
+                loads[current] -= demands[point]
+                loads[best_vehicle] += demands[point]
+                assignment[point] = best_vehicle
+                moved = True
+        if not moved:
+            break
+    return assignment
+
+def assign_fleet(origin, points, demands, capacities, method="sweep", distance_metric="haversine"):
+    """
+    Split one origin's stops across its vehicles: spatial clustering, then the
+    savings refinement on `distance_metric`.
+    :return: vehicle index (into capacities) for every point
+    """
+    points = np.asarray(points, dtype=float)
+    demands = np.asarray(demands, dtype=float)
+    capacities = np.asarray(capacities, dtype=float)
+    _check_fits(demands, capacities)
+    assignment = get_fleet_method(method)(origin, points, demands, capacities)
+    distance_matrix = build_distance_matrix(np.vstack(([origin], points)), distance_metric)
+    return refine_by_savings(assignment, demands, capacities, distance_matrix)
+
+def _vehicle_ids(fleet, dtype):
+    """
+    The fleet's vehicle ids as an array of the upload's Vehicle Id dtype,
+    raising ValueError for ids that do not fit it.
+    """
+    ids = [int(vehicle["vehicle_id"]) for vehicle in fleet]
+    limits = np.iinfo(np.dtype(getattr(dtype, "numpy_dtype", dtype)))
+    for vehicle_id in ids:
+        if not limits.min <= vehicle_id <= limits.max:
+            raise ValueError(f"vehicle_id {vehicle_id} is out of range ({limits.min} to {limits.max}).")
+    return np.array(ids, dtype=dtype)
+
+def _plan_groups(data):
+    """
+    Rows grouped by (origin, expected_delivery_date): every day's stops at an
+    origin are planned against the full fleet capacity on their own.
+    :return: ([(origin key, delivery date, rows), ...], number of origins)
+    """
+    origin_columns = [ORIGIN_ID_COLUMN] if ORIGIN_ID_COLUMN in data else ORIGIN_COLUMNS
+    date_columns = [DELIVERY_DATE_COLUMN] if DELIVERY_DATE_COLUMN in data else []
+    groups = []
+    for key, rows in data.groupby(origin_columns + date_columns, sort=False, observed=True):
+        origin_key = key[0] if len(origin_columns) == 1 else key[:len(origin_columns)]
+        groups.append((origin_key, key[-1] if date_columns else None, rows))
+    return groups, len(data[origin_columns].drop_duplicates())
+
+def apply_fleet(data, vehicles, method="sweep", distance_metric="haversine"):
+    """
+    Fleet mode: ignore the uploaded Vehicle Id assignment and redistribute every
+    origin's stops across `vehicles`, separately for each expected_delivery_date,
+    so the regular per-vehicle GA can solve each day's clusters.
+    :param vehicles: [{"vehicle_id": int, "capacity": number, "origin_id": optional}, ...];
+                     origin_id is required when the upload has several origins
+    :return: (rows with "Vehicle Id" rewritten,
+              {delivery date: {vehicle_id: {"load", "capacity", "stops"}}})
+    """
+    if not vehicles:
+        raise ValueError("Fleet mode needs at least one vehicle.")
+    get_fleet_method(method)
+    groups, num_origins = _plan_groups(data)
+    if num_origins > 1 and ORIGIN_ID_COLUMN not in data:
+        raise ValueError(f"The upload has several origins but no '{ORIGIN_ID_COLUMN}' column.")
+    if num_origins > 1 and any(vehicle.get("origin_id") is None for vehicle in vehicles):
+        raise ValueError("The upload has several origins; give every vehicle an 'origin_id'.")
+
+    data = data.copy()
+    loads = {}
+    assigned = []
+    for origin_key, delivery_date, rows in groups:
+        fleet = [
+            vehicle for vehicle in vehicles
+            if num_origins == 1 or int(vehicle["origin_id"]) == int(origin_key)
+        ]
+        if not fleet:
+            raise ValueError(f"No vehicles given for origin {origin_key}.")
+
+        rows = rows[np.isfinite(rows[DEST_COLUMNS].to_numpy(dtype=float)).all(axis=1)]
+        if rows.empty:
+            continue
+        # One stop per destination; its demand is the sum over its rows
+        location_keys = list(zip(rows[DEST_COLUMNS[0]].round(6), rows[DEST_COLUMNS[1]].round(6)))
+        locations, location_of_row = np.unique(np.array(location_keys), axis=0, return_inverse=True)
+        location_of_row = location_of_row.reshape(-1)
+        row_demands = rows[DEMAND_COLUMN].fillna(0).to_numpy(dtype=float) if DEMAND_COLUMN in rows else np.ones(len(rows))
+        demands = np.bincount(location_of_row, weights=row_demands, minlength=len(locations))
+
+        origin = tuple(rows[ORIGIN_COLUMNS].iloc[0].to_numpy(dtype=float))
+        capacities = [float(vehicle["capacity"]) for vehicle in fleet]
+        try:
+            assignment = assign_fleet(origin, locations, demands, capacities, method, distance_metric)
+        except ValueError as e:
+            raise ValueError(f"{e} (origin {origin_key}, {delivery_date})" if delivery_date is not None else str(e))
+
+        vehicle_ids = _vehicle_ids(fleet, data[VEHICLE_COLUMN].dtype)
+        data.loc[rows.index, VEHICLE_COLUMN] = vehicle_ids[assignment[location_of_row]]
+        assigned.append(rows.index)
+        day_loads = loads.setdefault(delivery_date, {})
+        for index, vehicle in enumerate(fleet):
+            members = assignment == index
+            day_loads[int(vehicle["vehicle_id"])] = {
+                "load": float(demands[members].sum()),
+                "capacity": capacities[index],
+                "stops": int(members.sum()),
+            }
+
+    # Rows without usable destinations are left out of the fleet plan
+    kept = np.concatenate([index.to_numpy() for index in assigned]) if assigned else []
+    return data[data.index.isin(kept)], loads
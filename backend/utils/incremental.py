@@ -0,0 +1,106 @@
+import numpy as np
+
+from .routing_algorithm import build_distance_matrix, route_distance
+from .local_search import improve_route
+
+def cheapest_insertion(route, new_point, distance_matrix):
+    """
+    Insert delivery index `new_point` where it adds the least distance.
+    All insertion positions of the closed tour origin -> route -> origin are
+    priced at once: d(a, new) + d(new, b) - d(a, b) for every edge (a, b).
+    :param route: 1D array of delivery indices (origin 0 excluded)
+    :return: the new route array
+    """
+    tour = np.concatenate(([0], route, [0])).astype(int)
+    before, after = tour[:-1], tour[1:]
+    added_cost = (
+        distance_matrix[before, new_point]
+        + distance_matrix[new_point, after]
+        - distance_matrix[before, after]
+    )
+    position = int(np.argmin(added_cost))
+    return np.insert(np.asarray(route, dtype=int), position, new_point)
+
+class StopNotFound(LookupError):
+    """Raised by reoptimize_route when a removal selector matches no stop of the route."""
+
+def _stop_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _parse_selector(selector):
+    """
+    Normalise a removal selector, given either as {"Distributor Id": ...} (a
+    number, or a numeric string) or as {"Dest Geo Lat": ..., "Dest Geo Lon": ...},
+    to ("id", int) or ("point", (lat, lon) rounded to 6 places).
+    Raises ValueError for selectors that are neither.
+    """
+    distributor_id = selector.get("Distributor Id")
+    if distributor_id not in (None, ""):
+        if _stop_id(distributor_id) is None:
+            raise ValueError(f"Distributor Id '{distributor_id}' is not a whole number.")
+        return "id", _stop_id(distributor_id)
+    try:
+        return "point", (round(float(selector["Dest Geo Lat"]), 6), round(float(selector["Dest Geo Lon"]), 6))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Stops to remove need a 'Distributor Id' or 'Dest Geo Lat' and 'Dest Geo Lon'.")
+
+def _matches(stop, selector):
+    """
+    True if a route_sequence stop matches a selector from _parse_selector.
+    """
+    kind, value = selector
+    if kind == "id":
+        return _stop_id(stop.get("Distributor Id")) == value
+    return (round(float(stop["Dest Geo Lat"]), 6), round(float(stop["Dest Geo Lon"]), 6)) == value
+
+def reoptimize_route(route_sequence, add_stops=None, remove_stops=None, metric="haversine",
+                     local_search_moves=("two_opt", "or_opt", "relocate"), neighbour_count=10):
+    """
+    Update a stored route for a stop delta without re-running the GA:
+      1) drop stops matching `remove_stops`,
+      2) insert each of `add_stops` at its cheapest position,
+      3) polish with local search, warm-started from the current tour.
+    :param route_sequence: stored route (origin first and last), as saved by save_route
+    :param add_stops: route_sequence-style dicts with "Dest Geo Lat"/"Dest Geo Lon"
+    :param remove_stops: selectors by "Distributor Id" or by coordinates
+    :param metric: distance kernel from distance_metrics (km for haversine/equirectangular)
+    :return: (new route_sequence, total tour distance in the metric's units)
+    Raises ValueError for malformed selectors and StopNotFound when a selector
+    matches no stop, so a mistyped removal never silently rewrites the route.
+    """
+    origin = route_sequence[0]
+    selectors = [_parse_selector(selector) for selector in (remove_stops or [])]
+    unmatched = [
+        original for original, selector in zip(remove_stops or [], selectors)
+        if not any(_matches(stop, selector) for stop in route_sequence[1:-1])
+    ]
+    if unmatched:
+        raise StopNotFound(f"Stops to remove not found in the route: {unmatched}")
+    stops = [
+        stop for stop in route_sequence[1:-1]
+        if not any(_matches(stop, selector) for selector in selectors)
+    ]
+    new_stops = list(add_stops or [])
+    all_stops = stops + new_stops
+    if not all_stops:
+        return [origin, origin], 0.0
+
+    points_coordinates = np.array(
+        [[origin["Dest Geo Lat"], origin["Dest Geo Lon"]]]
+        + [[stop["Dest Geo Lat"], stop["Dest Geo Lon"]] for stop in all_stops],
+        dtype=float
+    )
+    distance_matrix = build_distance_matrix(points_coordinates, metric)
+
+    # Existing stops keep their stored order; new ones (indices after them) are inserted
+    route = np.arange(1, len(stops) + 1)
+    for new_point in range(len(stops) + 1, len(all_stops) + 1):
+        route = cheapest_insertion(route, new_point, distance_matrix)
+
+    route = improve_route(route, distance_matrix, moves=local_search_moves, neighbour_count=neighbour_count)
+
+    new_sequence = [origin] + [all_stops[idx - 1] for idx in route] + [origin]
+    return new_sequence, float(route_distance(route, distance_matrix))
@@ -0,0 +1,355 @@
+import os
+import gzip
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columns the optimizer reads from an uploaded sheet
+VEHICLE_COLUMN = "Vehicle Id"
+DISPATCH_COLUMN = "dispatch_created_on"
+DELIVERY_DATE_COLUMN = "expected_delivery_date"
+ORIGIN_COLUMNS = ["Origin Geo Lat", "Origin Geo Lon"]
+ORIGIN_ID_COLUMN = "Origin Id"
+DEST_COLUMNS = ["Dest Geo Lat", "Dest Geo Lon"]
+
+# Columns an upload must have; checked on the first chunk so bad files fail fast
+REQUIRED_COLUMNS = [DELIVERY_DATE_COLUMN, VEHICLE_COLUMN, DISPATCH_COLUMN] + ORIGIN_COLUMNS + DEST_COLUMNS
+
+# Id columns: parsed as nullable Int64, range-checked, then stored as Int32
+# (a plain Int32 parse wraps ids above 2**31 - 1 around without an error)
+ID_COLUMNS = ["dispatch_id", ORIGIN_ID_COLUMN, "Distributor Id", VEHICLE_COLUMN]
+ID_DTYPE = "Int32"
+
+# Parse dtypes for upload columns (nullable ids where sheets leave gaps); see
+# _compact_chunk for the compact types kept in memory. Coordinates stay float64
+# so stored routes and cache keys keep the sheet's full precision.
+UPLOAD_DTYPES = {
+    **{column: "Int64" for column in ID_COLUMNS},
+    ORIGIN_COLUMNS[0]: "float64",
+    ORIGIN_COLUMNS[1]: "float64",
+    DEST_COLUMNS[0]: "float64",
+    DEST_COLUMNS[1]: "float64",
+}
+CATEGORY_COLUMNS = [DISPATCH_COLUMN, DELIVERY_DATE_COLUMN, "Origin Label", "Distributor Name"]
+
+# Rows parsed per chunk when streaming an upload
+UPLOAD_CHUNK_ROWS = 50_000
+
+# Placeholder for rows without an expected_delivery_date
+UNKNOWN_DATE = "Unknown Date"
+
+# Date columns stored as DD/MM/YYYY strings, like the dates in CSV sheets and on
+# stored routes; typed dates from columnar uploads are formatted to match
+DATE_COLUMNS = [DISPATCH_COLUMN, DELIVERY_DATE_COLUMN]
+SHEET_DATE_FORMAT = "%d/%m/%Y"
+
+# Upload formats recognized by their leading bytes; anything else is read as plain CSV.
+# Parquet and Arrow need the optional `pyarrow` package, zstd CSV needs `zstandard`.
+UPLOAD_FORMATS = [
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "arrow"),                   # Arrow IPC file (Feather v2)
+    (b"\xff\xff\xff\xff", "arrow_stream"),  # Arrow IPC stream
+    (b"\x1f\x8b", "csv.gz"),
+    (b"\x28\xb5\x2f\xfd", "csv.zst"),
+]
+COLUMNAR_FORMATS = {"parquet", "arrow", "arrow_stream"}
+
+# Bytes peeked from an upload to detect its format
+MAGIC_BYTES = 8
+
+# One vehicle's slice of an upload:
+#   rows            - all of the vehicle's rows, sorted by dispatch_created_on
+#   origin          - (lat, lon) of the first dispatched row
+#   origin_index    - DataFrame index label of that row
+#   origin_id       - Origin Id of that row (None if the column is absent or empty)
+#   deliveries      - rows with de-duplicated, finite destination coordinates
+#   delivery_points - float array (n_deliveries, 2) of those coordinates
+#   delivery_date   - expected_delivery_date of the vehicle's first row in upload order
+VehiclePartition = namedtuple(
+    "VehiclePartition",
+    ["vehicle_id", "rows", "origin", "origin_index", "origin_id", "deliveries", "delivery_points",
+     "delivery_date"],
+)
+
+def partition_by_vehicle(data):
+    """
+    Split an upload into per-vehicle partitions in a single pass.
+      - One stable sort by (Vehicle Id, dispatch_created_on) makes each vehicle a
+        contiguous block; block offsets come from where the id changes.
+      - Duplicate and non-finite destinations are masked for the whole frame at
+        once instead of per vehicle.
+      - Each partition holds positional slices of the sorted frame, not a fresh
+        boolean-mask copy per vehicle.
+    Partitions are returned in order of each vehicle's first appearance, matching
+    data["Vehicle Id"].unique(). Rows without a Vehicle Id are ignored.
+    """
+    data = data[data[VEHICLE_COLUMN].notna()]
+    if data.empty:
+        return []
+
+    keys = pd.DataFrame({
+        "vehicle": data[VEHICLE_COLUMN].to_numpy(),
+        "dispatch": data[DISPATCH_COLUMN].to_numpy(),
+    })
+    order = keys.sort_values(["vehicle", "dispatch"], kind="mergesort").index.to_numpy()
+    sorted_data = data.iloc[order]
+
+    vehicle_ids = sorted_data[VEHICLE_COLUMN].to_numpy()
+    starts = np.flatnonzero(np.r_[True, vehicle_ids[1:] != vehicle_ids[:-1]])
+    ends = np.r_[starts[1:], len(sorted_data)]
+    first_positions = np.minimum.reduceat(order, starts)
+
+    dest_points = sorted_data[DEST_COLUMNS].to_numpy(dtype=float)
+    keep = (
+        ~sorted_data.duplicated(subset=[VEHICLE_COLUMN] + DEST_COLUMNS).to_numpy()
+        & np.isfinite(dest_points).all(axis=1)
+    )
+    origins = sorted_data[ORIGIN_COLUMNS].to_numpy(dtype=float)
+    origin_ids = (
+        sorted_data[ORIGIN_ID_COLUMN].to_numpy()
+        if ORIGIN_ID_COLUMN in sorted_data else np.full(len(sorted_data), None)
+    )
+    delivery_dates = (
+        data[DELIVERY_DATE_COLUMN].to_numpy()[first_positions]
+        if DELIVERY_DATE_COLUMN in data else [None] * len(starts)
+    )
+
+    partitions = []
+    for block in np.argsort(first_positions, kind="stable"):
+        start, end = starts[block], ends[block]
+        block_keep = keep[start:end]
+        partitions.append(VehiclePartition(
+            vehicle_id=vehicle_ids[start],
+            rows=sorted_data.iloc[start:end],
+            origin=(origins[start, 0], origins[start, 1]),
+            origin_index=sorted_data.index[start],
+            origin_id=None if pd.isna(origin_ids[start]) else origin_ids[start],
+            deliveries=sorted_data.iloc[start:end][block_keep],
+            delivery_points=dest_points[start:end][block_keep],
+            delivery_date=delivery_dates[block],
+        ))
+    return partitions
+
+def _compact_chunk(chunk, vehicle_id):
+    """
+    Narrow one parsed chunk: drop rows without a Vehicle Id (or of other vehicles
+    when one is requested), narrow ids to ID_DTYPE, fill missing delivery dates
+    and make repeated strings categorical. Columnar chunks are cast to
+    UPLOAD_DTYPES here (CSV chunks already are) and their timestamp date columns
+    formatted as SHEET_DATE_FORMAT strings.
+    Raises ValueError for ids that do not fit ID_DTYPE.
+    """
+    chunk = chunk.astype({column: dtype for column, dtype in UPLOAD_DTYPES.items() if column in chunk})
+    limits = np.iinfo(ID_DTYPE.lower())
+    for column in ID_COLUMNS:
+        if column in chunk:
+            values = chunk[column]
+            out_of_range = (values.notna() & ((values < limits.min) | (values > limits.max))).to_numpy(dtype=bool)
+            if out_of_range.any():
+                raise ValueError(f"'{column}' value {values[out_of_range].iloc[0]} is out of range "
+                                 f"({limits.min} to {limits.max}).")
+            chunk[column] = values.astype(ID_DTYPE)
+    chunk = chunk[chunk[VEHICLE_COLUMN].notna()]
+    if vehicle_id != "all":
+        chunk = chunk[chunk[VEHICLE_COLUMN] == int(vehicle_id)]
+    chunk = chunk.astype({VEHICLE_COLUMN: "int32"})
+    for column in DATE_COLUMNS:
+        if column in chunk and pd.api.types.is_datetime64_any_dtype(chunk[column]):
+            chunk[column] = chunk[column].dt.strftime(SHEET_DATE_FORMAT)
+    chunk[DELIVERY_DATE_COLUMN] = chunk[DELIVERY_DATE_COLUMN].fillna(UNKNOWN_DATE)
+    for column in CATEGORY_COLUMNS:
+        if column in chunk:
+            chunk[column] = chunk[column].astype("category")
+    return chunk
+
+def _concat_chunks(chunks):
+    """
+    Concatenate chunks, merging each categorical column's per-chunk categories
+    (a plain concat would fall back to object strings).
+    """
+    data = pd.concat(chunks)
+    for column in CATEGORY_COLUMNS:
+        if column in data and len(chunks) > 1:
+            data[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return data
+
+class _TeeReader:
+    """
+    File-like wrapper that copies every byte read from `stream` into `copy`.
+    """
+    def __init__(self, stream, copy):
+        self.stream = stream
+        self.copy = copy
+
+    def read(self, size=-1):
+        block = self.stream.read(size)
+        self.copy.write(block)
+        return block
+
+class _PrefixedReader:
+    """
+    File-like wrapper that replays `prefix` (bytes already peeked from `stream`)
+    before the rest of the stream, so non-seekable request bodies can be sniffed.
+    """
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            block, self.prefix = self.prefix + self.stream.read(), b""
+            return block
+        block, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(block) < size:
+            block += self.stream.read(size - len(block))
+        return block
+
+def detect_format(head):
+    """
+    Upload format ("csv", "csv.gz", "csv.zst", "parquet", "arrow" or
+    "arrow_stream") from the first MAGIC_BYTES bytes of a file.
+    """
+    for magic, name in UPLOAD_FORMATS:
+        if head.startswith(magic):
+            return name
+    return "csv"
+
+def _pyarrow(format_name):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError(f"Reading {format_name} uploads requires the 'pyarrow' package; upload a CSV instead.")
+    return pyarrow
+
+def _csv_chunks(stream, format_name, chunksize):
+    if format_name == "csv.gz":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    elif format_name == "csv.zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Reading zstd-compressed uploads requires the 'zstandard' package; upload a plain or gzip CSV instead.")
+        stream = zstandard.ZstdDecompressor().stream_reader(stream)
+    return pd.read_csv(stream, chunksize=chunksize, dtype=UPLOAD_DTYPES, encoding="utf-8-sig")
+
+def _columnar_chunks(source, format_name, chunksize):
+    """
+    Record batches of a Parquet or Arrow IPC upload as DataFrames, indexed by
+    upload row position like CSV chunks. `source` is a path (memory-mapped) or
+    the whole file as bytes.
+    """
+    pa = _pyarrow(format_name)
+    if format_name == "parquet":
+        if isinstance(source, bytes):
+            source = pa.BufferReader(source)
+        batches = pa.parquet.ParquetFile(source, memory_map=True).iter_batches(batch_size=chunksize)
+    else:
+        source = pa.memory_map(source) if not isinstance(source, bytes) else pa.BufferReader(source)
+        if format_name == "arrow":
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(position) for position in range(reader.num_record_batches))
+        else:
+            batches = pa.ipc.open_stream(source)
+
+    offset = 0
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunksize):
+            # Arrow date32 columns come out as datetime64, like timestamps
+            chunk = batch.slice(start, chunksize).to_pandas(date_as_object=False)
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+def _upload_chunks(source, chunksize, audit_path):
+    """
+    Detect the upload's format and yield its rows as DataFrame chunks.
+    `source` is a file-like stream or a path; CSV is streamed, columnar formats
+    need random access and are memory-mapped from the path (or the audit copy)
+    when there is one, else read into memory.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            format_name = detect_format(file.read(MAGIC_BYTES))
+            if format_name not in COLUMNAR_FORMATS:
+                file.seek(0)
+                yield from _csv_chunks(file, format_name, chunksize)
+                return
+        yield from _columnar_chunks(os.fspath(source), format_name, chunksize)
+        return
+
+    head = source.read(MAGIC_BYTES)
+    format_name = detect_format(head)
+    stream = _PrefixedReader(head, source)
+    if format_name not in COLUMNAR_FORMATS:
+        if audit_path is not None:
+            with open(audit_path, "wb") as audit_file:
+                yield from _csv_chunks(_TeeReader(stream, audit_file), format_name, chunksize)
+        else:
+            yield from _csv_chunks(stream, format_name, chunksize)
+        return
+
+    if audit_path is None:
+        yield from _columnar_chunks(stream.read(), format_name, chunksize)
+        return
+    with open(audit_path, "wb") as audit_file:
+        while True:
+            block = stream.read(1 << 20)
+            if not block:
+                break
+            audit_file.write(block)
+    yield from _columnar_chunks(audit_path, format_name, chunksize)
+
+def read_upload(source, vehicle_id="all", chunksize=UPLOAD_CHUNK_ROWS, audit_path=None):
+    """
+    Parse an upload chunk by chunk, without staging it on disk, into a compact
+    DataFrame (see UPLOAD_DTYPES). CSV (plain, gzip or zstd), Parquet and Arrow
+    IPC / Feather files are told apart by their leading bytes (detect_format)
+    and validated the same way; the first chunk is checked before the rest is
+    read. Raises ValueError with a user-facing message for unusable files.
+    :param source: file-like stream, or a path (columnar files are then memory-mapped)
+    :param vehicle_id: "all", or a Vehicle Id to keep only that vehicle's rows
+    :param audit_path: if given, the raw bytes are also written there as they are read
+    """
+    parse_errors = (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, TypeError,
+                    EOFError, gzip.BadGzipFile)
+    try:
+        import pyarrow
+        parse_errors += (pyarrow.ArrowException,)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        parse_errors += (zstandard.ZstdError,)
+    except ImportError:
+        pass
+
+    try:
+        chunks = []
+        for position, chunk in enumerate(_upload_chunks(source, chunksize, audit_path)):
+            if position == 0:
+                missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+                if DELIVERY_DATE_COLUMN in missing:
+                    raise ValueError("Missing 'expected_delivery_date' column in the uploaded file.")
+                if missing:
+                    raise ValueError(f"Missing columns in the uploaded file: {', '.join(missing)}.")
+            chunks.append(_compact_chunk(chunk, vehicle_id))
+    except parse_errors as e:
+        raise ValueError(f"Could not parse the uploaded file: {e}")
+
+    if not chunks:
+        raise ValueError("The uploaded file is empty.")
+    return _concat_chunks(chunks)
+
+def ingest_upload(source, vehicle_id="all", chunksize=UPLOAD_CHUNK_ROWS, audit_path=None):
+    """
+    Streaming ingest stage: parse and validate the upload (read_upload), then
+    split it into the per-vehicle partitions the optimizer consumes.
+    :return: (data, partitions)
+    """
+    data = read_upload(source, vehicle_id, chunksize, audit_path)
+    return data, partition_by_vehicle(data)
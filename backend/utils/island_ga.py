@@ -0,0 +1,162 @@
+import queue
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+import numpy as np
+
+from .routing_algorithm import (
+    Route, build_distance_matrix, population_distances,
+    initial_population_array, evolve_generation_array, genetic_algorithm_array,
+)
+from .permutation_operators import CROSSOVER_OPERATORS, get_crossover_operator
+
+# Seconds an island waits for the others at a migration point before giving up.
+# Only a last resort: the parent aborts the barrier as soon as an island dies.
+MIGRATION_TIMEOUT = 300
+
+def island_settings(num_islands, mutation_rate, crossover_operator):
+    """
+    Per-island (mutation_rate, crossover operator), so islands explore differently:
+      - mutation rates spread from half to double the base rate,
+      - operators cycle through CROSSOVER_OPERATORS, starting with the configured one.
+    """
+    scales = np.geomspace(0.5, 2.0, num_islands) if num_islands > 1 else np.ones(1)
+    operators = [crossover_operator] + [name for name in CROSSOVER_OPERATORS if name != crossover_operator]
+    return [
+        (float(min(mutation_rate * scale, 1.0)), operators[island % len(operators)])
+        for island, scale in enumerate(scales)
+    ]
+
+def _run_island(island, num_islands, seed, population_size, num_generations, mutation_rate,
+                crossover_operator, distance_matrix, rl_prediction, seed_routes, migration_interval,
+                migrants, stopping, shm_name, barrier, results):
+    """
+    Evolve one island. Every `migration_interval` generations each island
+    publishes its best `migrants` routes to its slot in shared memory, then
+    replaces its worst routes with those of the previous island (ring topology).
+    Island 0 tracks the best route across all islands with `stopping` and decides
+    when to stop, so all islands leave at the same migration point.
+    """
+    np.random.seed(seed)
+    route_length = len(distance_matrix) - 1
+    crossover_fn = get_crossover_operator(crossover_operator)
+    buffer = shared_memory.SharedMemory(name=shm_name)
+    try:
+        routes = np.ndarray((num_islands, migrants, route_length), dtype=np.int64, buffer=buffer.buf)
+        stop_flag = np.ndarray((1,), dtype=np.int64, buffer=buffer.buf, offset=routes.nbytes)
+
+        population = initial_population_array(population_size, route_length, rl_prediction, seed_routes)
+        fitness = population_distances(population, distance_matrix)
+        generation = 0
+        while generation < num_generations:
+            for _ in range(min(migration_interval, num_generations - generation)):
+                population, fitness = evolve_generation_array(
+                    population, fitness, crossover_fn, mutation_rate, distance_matrix
+                )
+            generation += min(migration_interval, num_generations - generation)
+
+            routes[island] = population[np.argsort(fitness)[:migrants]]
+            barrier.wait(MIGRATION_TIMEOUT)
+            if island == 0 and stopping is not None:
+                overall_best = population_distances(routes[:, 0], distance_matrix).min()
+                stop_flag[0] = int(stopping.update(generation, overall_best))
+            incoming = routes[(island - 1) % num_islands].copy()
+            barrier.wait(MIGRATION_TIMEOUT)
+
+            worst = np.argpartition(fitness, population_size - migrants)[population_size - migrants:]
+            population[worst] = incoming
+            fitness[worst] = population_distances(incoming, distance_matrix)
+            if stop_flag[0]:
+                break
+    except BrokenBarrierError:
+        logging.error(f"Island {island}: migration barrier broken; returning its best route so far")
+    finally:
+        buffer.close()
+
+    if island == 0 and stopping is not None:
+        stopping.finish(generation)
+    best = int(np.argmin(fitness))
+    results.put((island, population[best], float(fitness[best]), generation, stopping if island == 0 else None))
+
+def genetic_algorithm_islands(
+    population_size, num_generations, mutation_rate,
+    num_points, start_point, points_coordinates, rl_prediction=None,
+    crossover_operator="single_cut", distance_matrix=None, stopping=None, seed_routes=None,
+    islands=4, migration_interval=10, migrants=2
+):
+    """
+    Island-model GA for large single routes: `islands` sub-populations of
+    `population_size` evolve in their own processes (each with its own mutation
+    rate and crossover operator, see island_settings) and exchange their best
+    routes through shared memory every `migration_interval` generations.
+    Stops after `num_generations` or when `stopping` (a StoppingCriteria,
+    checked at migration points on the best route of any island) says so.
+    Same signature and return type as genetic_algorithm_array, plus the island
+    options; with islands <= 1 it simply runs genetic_algorithm_array.
+    The RL route seeds island 0; seed_routes are dealt round-robin across islands.
+    """
+    if distance_matrix is None:
+        distance_matrix = build_distance_matrix(points_coordinates)
+    route_length = num_points - 1
+    if islands <= 1 or route_length < 2:
+        return genetic_algorithm_array(
+            population_size, num_generations, mutation_rate, num_points, start_point,
+            points_coordinates, rl_prediction, crossover_operator, distance_matrix, stopping, seed_routes
+        )
+
+    migrants = max(1, min(migrants, population_size // 2))
+    # Island seeds come from the caller's RNG, so a seeded run is reproducible without a time budget
+    seeds = np.random.randint(0, 2 ** 31 - 1, size=islands)
+
+    context = multiprocessing.get_context()
+    barrier = context.Barrier(islands)
+    results = context.Queue()
+    buffer = shared_memory.SharedMemory(create=True, size=(islands * migrants * route_length + 1) * 8)
+    try:
+        np.ndarray((1,), dtype=np.int64, buffer=buffer.buf, offset=islands * migrants * route_length * 8)[0] = 0
+        processes = [
+            context.Process(
+                target=_run_island,
+                args=(island, islands, int(seeds[island]), population_size, num_generations,
+                      island_mutation_rate, island_operator, distance_matrix,
+                      rl_prediction if island == 0 else None,
+                      seed_routes[island::islands] if seed_routes is not None else None,
+                      migration_interval, migrants,
+                      stopping, buffer.name, barrier, results),
+                name=f"ga-island-{island}",
+            )
+            for island, (island_mutation_rate, island_operator)
+            in enumerate(island_settings(islands, mutation_rate, crossover_operator))
+        ]
+        for process in processes:
+            process.start()
+        # Drain results before joining so no island blocks on a full queue
+        island_results = []
+        while len(island_results) < islands:
+            try:
+                island_results.append(results.get(timeout=1))
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+            # An island that crashed never reaches the next migration point; release
+            # the others so they return their best routes instead of waiting it out
+            dead = [process.name for process in processes if process.exitcode not in (None, 0)]
+            if dead and not barrier.broken:
+                logging.error(f"Island GA: {', '.join(dead)} exited unexpectedly; stopping the other islands")
+                barrier.abort()
+        for process in processes:
+            process.join()
+    finally:
+        buffer.close()
+        buffer.unlink()
+
+    if not island_results:
+        raise RuntimeError("All GA islands exited without a result")
+    # The islands worked on a copy of `stopping`; take back island 0's record
+    for result in island_results:
+        if result[4] is not None and stopping is not None:
+            stopping.update_from(result[4])
+    island, route, distance, generations, _ = min(island_results, key=lambda result: (result[2], result[0]))
+    logging.debug(f"Island GA: best route from island {island} after {generations} generations ({distance:.3f})")
+    return Route(np.asarray(route), start_point, points_coordinates, distance_matrix)
@@ -0,0 +1,44 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from models.job_model import start_job, update_job
+from .optimization_utils import OptimizationCancelled
+
+# Number of optimization jobs run concurrently by this process
+JOB_WORKERS = int(os.environ.get("OPTIMIZATION_JOB_WORKERS", 2))
+
+class JobQueue:
+    """
+    Runs optimization jobs on a local thread pool.
+    Job state lives in Mongo (models.job_model), so any app worker can answer
+    status polls and cancel requests for a job started by another.
+    """
+    def __init__(self, max_workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="optimization-job")
+
+    def submit(self, job_id, work):
+        """
+        Queue `work(job_id)` for a job created with job_model.create_job.
+        Its return value is stored as the job's "saved" summary on success.
+        """
+        self._executor.submit(self._run, job_id, work)
+
+    def _run(self, job_id, work):
+        if not start_job(job_id):
+            logging.info(f"Optimization job {job_id} was cancelled before it started")
+            return
+
+        try:
+            saved = work(job_id)
+        except OptimizationCancelled:
+            logging.info(f"Optimization job {job_id} cancelled")
+            update_job(job_id, status="cancelled")
+        except Exception as e:
+            logging.error(f"Optimization job {job_id} failed: {e}")
+            update_job(job_id, status="failed", error=str(e))
+        else:
+            update_job(job_id, status="completed", saved=saved)
+
+# Shared queue used by the route optimization blueprint
+job_queue = JobQueue()
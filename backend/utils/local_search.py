@@ -0,0 +1,155 @@
+import numpy as np
+
+# Improvements smaller than this are treated as floating-point noise
+IMPROVEMENT_EPSILON = 1e-12
+
+def build_neighbour_lists(distance_matrix, neighbour_count=10):
+    """
+    For every point, the indices of its `neighbour_count` nearest delivery points
+    (origin 0 and the point itself excluded), nearest first.
+    """
+    num_points = len(distance_matrix)
+    neighbour_count = max(0, min(neighbour_count, num_points - 2))
+    if neighbour_count == 0:
+        return [[] for _ in range(num_points)]
+
+    masked = np.array(distance_matrix, dtype=float, copy=True)
+    np.fill_diagonal(masked, np.inf)
+    masked[:, 0] = np.inf
+    nearest = np.argpartition(masked, neighbour_count - 1, axis=1)[:, :neighbour_count]
+    order = np.argsort(np.take_along_axis(masked, nearest, axis=1), axis=1)
+    return np.take_along_axis(nearest, order, axis=1).tolist()
+
+def _reversal_delta(tour, dist, lo, hi):
+    """
+    Cost change of reversing tour[lo..hi] (inclusive): two edges out, two edges in.
+    """
+    before, first, last, after = tour[lo - 1], tour[lo], tour[hi], tour[hi + 1]
+    return dist[before][last] + dist[first][after] - dist[before][first] - dist[last][after]
+
+def two_opt(tour, dist, neighbours, positions):
+    """
+    One sweep of neighbour-list 2-opt. For each edge touching a point and one of
+    its neighbours, try the reversal that makes them adjacent; apply the first
+    improving move found. Returns True if the tour changed.
+    Assumes a symmetric distance matrix (reversal keeps inner leg costs).
+    """
+    last_stop = len(tour) - 2
+    for i in range(0, last_stop + 1):
+        a = tour[i]
+        for c in neighbours[a]:
+            j = positions[c]
+            # Successor variant (edges after a and c) and predecessor variant (edges before)
+            for lo, hi in ((min(i, j) + 1, max(i, j)), (min(i, j), max(i, j) - 1)):
+                if lo < 1 or hi > last_stop or lo >= hi:
+                    continue
+                if _reversal_delta(tour, dist, lo, hi) < -IMPROVEMENT_EPSILON:
+                    tour[lo:hi + 1] = tour[lo:hi + 1][::-1]
+                    for pos in range(lo, hi + 1):
+                        positions[tour[pos]] = pos
+                    return True
+    return False
+
+def _segment_moves(tour, dist, neighbours, positions, segment_length):
+    """
+    Try moving each run of `segment_length` stops next to a neighbour of its first
+    or last stop, in either orientation. Each candidate is priced from the three
+    removed and three added edges; a reversed segment also pays the change in its
+    inner legs, which is non-zero on asymmetric (e.g. road network) matrices.
+    The first improving move is applied.
+    """
+    last_stop = len(tour) - 2
+    for lo in range(1, last_stop - segment_length + 2):
+        hi = lo + segment_length - 1
+        first, last = tour[lo], tour[hi]
+        prev, nxt = tour[lo - 1], tour[hi + 1]
+        removal_gain = dist[prev][first] + dist[last][nxt] - dist[prev][nxt]
+        reversal_cost = sum(dist[tour[pos + 1]][tour[pos]] - dist[tour[pos]][tour[pos + 1]]
+                            for pos in range(lo, hi))
+
+        for anchor in set(neighbours[first]) | set(neighbours[last]):
+            k = positions[anchor]
+            if lo <= k <= hi:
+                continue
+            # Insert between (anchor, its successor) and between (its predecessor, anchor)
+            for u_pos in (k, k - 1):
+                if u_pos < 0 or u_pos + 1 > last_stop + 1 or lo - 1 <= u_pos <= hi:
+                    continue
+                u, v = tour[u_pos], tour[u_pos + 1]
+                forward = dist[u][first] + dist[last][v]
+                backward = dist[u][last] + dist[first][v] + reversal_cost
+                insertion_cost = min(forward, backward) - dist[u][v]
+                if insertion_cost - removal_gain < -IMPROVEMENT_EPSILON:
+                    segment = tour[lo:hi + 1]
+                    if backward < forward:
+                        segment = segment[::-1]
+                    rest = tour[:lo] + tour[hi + 1:]
+                    insert_at = u_pos + 1 if u_pos < lo else u_pos + 1 - segment_length
+                    tour[:] = rest[:insert_at] + segment + rest[insert_at:]
+                    for pos, node in enumerate(tour[1:-1], start=1):
+                        positions[node] = pos
+                    return True
+    return False
+
+def or_opt(tour, dist, neighbours, positions, segment_lengths=(2, 3)):
+    """
+    Or-opt: move chains of 2-3 consecutive stops to a better place in the tour.
+    Returns True if the tour changed.
+    """
+    return any(
+        _segment_moves(tour, dist, neighbours, positions, length)
+        for length in segment_lengths
+    )
+
+def relocate(tour, dist, neighbours, positions):
+    """
+    Relocate: move a single stop next to one of its nearest neighbours.
+    Returns True if the tour changed.
+    """
+    return _segment_moves(tour, dist, neighbours, positions, 1)
+
+# Moves selectable through the "local_search_moves" config key
+LOCAL_SEARCH_MOVES = {
+    "two_opt": two_opt,
+    "or_opt": or_opt,
+    "relocate": relocate,
+}
+
+def improve_route(route, distance_matrix, moves=("two_opt", "or_opt", "relocate"),
+                  neighbour_count=10, max_passes=100):
+    """
+    Polish a GA route with local search until no move improves it, or the work
+    bound is reached: at most max_passes passes over the moves, and at most
+    max_passes * len(route) applied moves in total.
+    :param route: 1D array of delivery indices (origin 0 excluded), as in Route.route
+    :param distance_matrix: (num_points, num_points) matrix with row 0 as the origin
+    :return: the improved route as a 1D integer array of the same indices
+    """
+    for move in moves:
+        if move not in LOCAL_SEARCH_MOVES:
+            raise ValueError(f"Unknown local search move '{move}'. Choose from {sorted(LOCAL_SEARCH_MOVES)}.")
+    if len(route) < 3:
+        return np.asarray(route).copy()
+
+    # Reversals change inner leg costs on asymmetric (e.g. road network) matrices
+    if "two_opt" in moves and not np.allclose(distance_matrix, np.transpose(distance_matrix)):
+        moves = tuple(move for move in moves if move != "two_opt")
+
+    dist = np.asarray(distance_matrix, dtype=float).tolist()
+    neighbours = build_neighbour_lists(distance_matrix, neighbour_count)
+    tour = [0] + [int(node) for node in route] + [0]
+    positions = [0] * len(distance_matrix)
+    for pos, node in enumerate(tour[1:-1], start=1):
+        positions[node] = pos
+
+    move_budget = max_passes * len(route)
+    for _ in range(max_passes):
+        improved = False
+        for move in moves:
+            while move_budget > 0 and LOCAL_SEARCH_MOVES[move](tour, dist, neighbours, positions):
+                move_budget -= 1
+                improved = True
+        if not improved or move_budget == 0:
+            break
+
+    return np.array(tour[1:-1], dtype=np.asarray(route).dtype)
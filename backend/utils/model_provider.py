@@ -0,0 +1,83 @@
+import os
+import logging
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Overridable via the RL_MODEL_PATH environment variable / app.config["RL_MODEL_PATH"]
+DEFAULT_MODEL_PATH = os.path.join(BACKEND_DIR, "ml_models", "vehicle_route_model_best.keras")
+
+class ModelProvider:
+    """
+    Lazily loads the RL model in a background thread.
+    TensorFlow is only imported inside the loader thread, so importing this
+    module (and the blueprints that use it) stays cheap. Until loading has
+    finished, get() returns None and callers fall back to GA-only seeding.
+    """
+    def __init__(self, model_path=None):
+        self.model_path = model_path or os.environ.get("RL_MODEL_PATH", DEFAULT_MODEL_PATH)
+        self._model = None
+        self._state = "idle"  # idle -> loading -> ready | failed
+        self._error = None
+        self._lock = threading.Lock()
+
+    def configure(self, model_path):
+        """
+        Point the provider at a different model file (before warm_up).
+        """
+        with self._lock:
+            if self._state == "idle":
+                self.model_path = model_path
+
+    def warm_up(self):
+        """
+        Start loading the model in a daemon thread. Safe to call more than once.
+        """
+        with self._lock:
+            if self._state != "idle":
+                return
+            self._state = "loading"
+        threading.Thread(target=self._load, name="rl-model-warmup", daemon=True).start()
+
+    def _load(self):
+        try:
+            from tensorflow.keras.models import load_model
+            model = load_model(self.model_path)
+        except Exception as e:
+            logging.error(f"Error loading RL model from {self.model_path}: {e}")
+            with self._lock:
+                self._error = str(e)
+                self._state = "failed"
+            return
+
+        with self._lock:
+            self._model = model
+            self._state = "ready"
+        logging.info(f"RL model loaded from {self.model_path}")
+
+    def get(self):
+        """
+        The loaded model, or None if it is still loading, failed, or was never warmed up.
+        Never blocks.
+        """
+        return self._model if self._state == "ready" else None
+
+    def is_ready(self):
+        return self._state == "ready"
+
+    def is_loading(self):
+        return self._state == "loading"
+
+    def status(self):
+        """
+        Health summary for the /health endpoint.
+        """
+        return {
+            "rl_seeding_ready": self.is_ready(),
+            "state": self._state,
+            "model_path": self.model_path,
+            "error": self._error,
+        }
+
+# Shared provider used by optimize_routes and warmed up by app.py
+rl_model_provider = ModelProvider()
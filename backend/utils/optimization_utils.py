@@ -1,124 +1,349 @@
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 import numpy as np
+import pandas as pd
+import logging
+from concurrent.futures import ProcessPoolExecutor
 
-# Import our GA function from routing_algorithm
-from .routing_algorithm import genetic_algorithm
+# GA engines and the per-vehicle solver (TensorFlow-free, safe for worker processes)
+from .route_solver import GA_ENGINES, solve_vehicle, vehicle_seed
+from .permutation_operators import get_crossover_operator
+from .distance_metrics import GRAPH_METRICS, get_distance_metric
+# RL model is loaded lazily in the background; see model_provider
+from .model_provider import rl_model_provider
+from .ingest import partition_by_vehicle
+from .distance_store import get_distance_store, location_key
+from .road_network import road_network_provider
+from .route_cache import route_cache, route_cache_key, tour_from_canonical, tour_to_canonical
 
 # Define constants for the genetic algorithm
 POPULATION_SIZE = 100
 NUM_GENERATIONS = 50
 MUTATION_RATE = 0.1
 
-MODEL_PATH = r"G:\FYP_Sys\backend\ml_models\vehicle_route_model_best.keras"
+# Smallest GA population (per island) the engines can breed from: parents are
+# paired within the fitter half, which needs at least two routes
+MIN_POPULATION_SIZE = 4
 
-# Try loading the RL model
-try:
-    rl_model = load_model(MODEL_PATH)
-    print("Model loaded successfully!")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    rl_model = None  # If loading fails, fallback is None
+# Defaults for optimize_routes; callers override individual keys via `config`
+OPTIMIZATION_CONFIG = {
+    "population_size": POPULATION_SIZE,
+    "num_generations": NUM_GENERATIONS,
+    "mutation_rate": MUTATION_RATE,
+    "engine": "array",
+    # Share of the initial population built by construction heuristics (savings,
+    # Hilbert order, multi-start nearest neighbour); 0 = random seeding only
+    "construction_seeds": 0.1,
+    # Island engine: sub-populations (processes), migration every N generations
+    # and routes exchanged per migration
+    "islands": 4,
+    "migration_interval": 10,
+    "migrants": 2,
+    # Early stopping on top of num_generations (None = off): generations without
+    # improvement, gap to the tour lower bound (0.1 = 10%), seconds per vehicle
+    "patience": None,
+    "target_gap": None,
+    "time_budget": None,
+    # Distance kernel from distance_metrics: "haversine", "equirectangular", "euclidean"
+    # or "road" (shortest paths over the offline OSM extract at ROAD_NETWORK_PATH)
+    "distance_metric": "haversine",
+    # Directory of the persistent id-keyed distance store (None = compute every upload)
+    "distance_store_dir": None,
+    # Permutation operator from permutation_operators: "single_cut", "ox", "pmx" or "erx"
+    "crossover": "ox",
+    # Optional 2-opt / Or-opt / relocate polish of the GA result
+    "local_search": False,
+    "local_search_moves": ("two_opt", "or_opt", "relocate"),
+    "neighbour_count": 10,
+    # Vehicles are solved in a process pool when workers > 1 (or an executor is passed)
+    "workers": 1,
+    # Base seed for reproducible runs; each vehicle derives its own seed from it
+    "seed": None,
+    # Reuse tours for vehicles whose stops, origin and GA parameters are unchanged
+    "use_cache": True,
+}
 
-def optimize_routes(data):
+# Labels used in stop records
+ORIGIN_LABEL = "Origin/Warehouse"
+UNKNOWN_DISTRIBUTOR = "Unknown Distributor"
+
+# Sequence length the RL model was trained on
+RL_MAX_STEPS = 50
+
+class OptimizationCancelled(Exception):
+    """Raised by optimize_routes when its should_cancel callback returns True."""
+
+def resolve_config(config=None):
+    """
+    Merge per-call overrides onto OPTIMIZATION_CONFIG and validate the engine,
+    crossover operator and distance metric names and the population size.
+    """
+    resolved = {**OPTIMIZATION_CONFIG, **(config or {})}
+    if resolved["population_size"] < MIN_POPULATION_SIZE:
+        raise ValueError(f"'population_size' must be at least {MIN_POPULATION_SIZE}.")
+    if resolved["engine"] not in GA_ENGINES:
+        raise ValueError(f"Unknown GA engine '{resolved['engine']}'. Choose from {sorted(GA_ENGINES)}.")
+    get_crossover_operator(resolved["crossover"])
+    get_distance_metric(resolved["distance_metric"])
+    if resolved["distance_metric"] == "road" and not road_network_provider.is_configured():
+        raise ValueError("The 'road' distance metric needs ROAD_NETWORK_PATH set to a local OSM extract.")
+    return resolved
+
+def origin_stop(origin_lat, origin_lon, row_index):
+    """
+    Stop record for the vehicle's origin/warehouse.
+    """
+    return {
+        "lat": float(origin_lat),
+        "lon": float(origin_lon),
+        "distributor_id": None,
+        "distributor_name": ORIGIN_LABEL,
+        "row_index": int(row_index),
+    }
+
+def _distributor_id(value):
+    if pd.isna(value):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Distributor Id '{value}' is not a whole number.")
+
+def build_stop_records(rows):
+    """
+    One stop record per row of `rows`: coordinates plus the distributor id, name
+    and the row's index in the uploaded DataFrame. Columns are read once as
+    arrays rather than row by row. Stops are found again by row_index, not by
+    coordinates. Raises ValueError for a non-numeric Distributor Id.
+    """
+    count = len(rows)
+    ids = rows["Distributor Id"].tolist() if "Distributor Id" in rows else [None] * count
+    names = rows["Distributor Name"].tolist() if "Distributor Name" in rows else [None] * count
+    return [
+        {
+            "lat": float(lat),
+            "lon": float(lon),
+            "distributor_id": _distributor_id(distributor_id),
+            "distributor_name": UNKNOWN_DISTRIBUTOR if pd.isna(name) else str(name),
+            "row_index": int(row_index),
+        }
+        for lat, lon, distributor_id, name, row_index in zip(
+            rows["Dest Geo Lat"].tolist(), rows["Dest Geo Lon"].tolist(), ids, names, rows.index.tolist()
+        )
+    ]
+
+def to_route_sequence(stops):
+    """
+    Convert stop records into the route_sequence documents stored in Mongo.
+    """
+    return [
+        {
+            "Dest Geo Lat": stop["lat"],
+            "Dest Geo Lon": stop["lon"],
+            "Distributor Id": stop["distributor_id"],
+            "Distributor Name": stop["distributor_name"],
+        }
+        for stop in stops
+    ]
+
+def predict_rl_scores(model, vehicle_points):
+    """
+    Run the RL model once for a whole upload.
+      - Every vehicle's points (origin + deliveries) are zero-padded into one
+        (num_vehicles, RL_MAX_STEPS, feature_dim) batch and scored in a single predict call.
+      - Vehicles with more than RL_MAX_STEPS points do not fit the model input;
+        they get no RL seed and run GA-only instead of being silently truncated.
+    Returns a list aligned with vehicle_points: a 1D array of scores for the
+    deliveries, or None where no RL seed is available.
+    """
+    predictions = [None] * len(vehicle_points)
+    eligible = [i for i, points in enumerate(vehicle_points) if len(points) <= RL_MAX_STEPS]
+    skipped = len(vehicle_points) - len(eligible)
+    if skipped:
+        logging.info(f"{skipped} vehicle(s) exceed {RL_MAX_STEPS} stops; using GA-only seeding for them.")
+    if not eligible:
+        return predictions
+
+    # The RL model expects up to "feature_dim" columns; extra columns stay zero
+    feature_dim = model.input_shape[-1]
+    batch = np.zeros((len(eligible), RL_MAX_STEPS, feature_dim), dtype="float32")
+    for row, i in enumerate(eligible):
+        points = vehicle_points[i][:, :feature_dim]
+        batch[row, :len(points), :points.shape[1]] = points
+
+    rl_output = model.predict(batch, verbose=0)
+    logging.debug(f"RL prediction shape for {len(eligible)} vehicle(s): {rl_output.shape}")
+
+    # Each vehicle has (num_points - 1) deliveries to order; its first that many
+    # steps of output channel 0 become the 1D "scores" used to seed the GA route.
+    for row, i in enumerate(eligible):
+        num_deliveries = len(vehicle_points[i]) - 1
+        if rl_output.shape[1] >= num_deliveries:
+            predictions[i] = rl_output[row, :num_deliveries, 0]
+    return predictions
+
+def skipped_run_stats(stop_reason):
+    """
+    Run stats (same fields as StoppingCriteria.stats()) for a vehicle whose route
+    did not need the GA, so every stored route carries the same fields.
+    """
+    return {"generations_used": 0, "stop_reason": stop_reason, "best_so_far": []}
+
+def optimize_routes(data, config=None, executor=None, partitions=None,
+                    progress_callback=None, should_cancel=None, stats=None):
     """
     Main entry point:
       - For each Vehicle ID in the data, extract origin and delivery points.
       - If there's only one delivery point, short-circuit the route.
-      - Otherwise, use RL model predictions to seed the GA for final route optimization.
-    Returns a dictionary of {vehicle_id: [[lat, lon], ...]}.
+      - Otherwise, use RL model predictions (if the model is ready) to seed the GA
+        for final route optimization.
+    `config` overrides keys of OPTIMIZATION_CONFIG (e.g. {"engine": "object"}).
+    GA runs are fanned out to `executor` if given, or to a ProcessPoolExecutor
+    with config["workers"] processes when workers > 1; otherwise they run inline.
+    With config["seed"] set, inline and process-pool runs return identical routes
+    (thread executors share the global RNG, so they are not reproducible).
+    `partitions` (from ingest.partition_by_vehicle) can be passed when the
+    caller already split the upload, so the frame is only partitioned once.
+    With config["use_cache"], vehicles whose stop set, origin and GA parameters
+    match an earlier run are served from route_cache without running the GA
+    (GA-only tours from while the RL model is still loading are not cached).
+    `progress_callback(vehicle_id, stops)` is called as each vehicle's route is
+    finalised; `should_cancel()` is polled between vehicles and aborts the run
+    with OptimizationCancelled when it returns True.
+    If a `stats` dict is passed, it is filled with {vehicle_id: {"generations_used",
+    "stop_reason", "best_so_far"}} for every routed vehicle; vehicles that skip the
+    GA get stop_reason "cached" or "trivial" (a single delivery) and no generations.
+    Returns a dictionary of {vehicle_id: [stop, ...]} where each stop is a dict
+    (see build_stop_records) and the origin stop appears at both ends.
     """
-    optimized_routes = {}
-    vehicles = data["Vehicle Id"].unique()
+    config = resolve_config(config)
 
-    for vehicle_id in vehicles:
-        vehicle_data = data[data["Vehicle Id"] == vehicle_id]
-        vehicle_data = vehicle_data.sort_values(by="dispatch_created_on")
+    def finish(vehicle_id, route_stops):
+        optimized_routes[vehicle_id] = route_stops
+        if progress_callback is not None:
+            progress_callback(vehicle_id, route_stops)
+        if should_cancel is not None and should_cancel():
+            raise OptimizationCancelled()
 
-        # Extract origin
-        origin_lat = vehicle_data.iloc[0]["Origin Geo Lat"]
-        origin_lon = vehicle_data.iloc[0]["Origin Geo Lon"]
+    optimized_routes = {}
+    vehicle_stops = {}
+    cache_keys = {}
+    point_keys = {}
+    ga_inputs = []
+    if partitions is None:
+        partitions = partition_by_vehicle(data)
 
-        # Extract & clean delivery points (removing duplicates, NaNs)
-        delivery_points = vehicle_data[["Dest Geo Lat", "Dest Geo Lon"]].drop_duplicates().values
-        delivery_points = [dp for dp in delivery_points if not np.any(np.isnan(dp))]
+    for partition in partitions:
+        vehicle_id = partition.vehicle_id
+        origin_lat, origin_lon = partition.origin
+        delivery_points = partition.delivery_points
 
         # Edge cases
         if len(delivery_points) == 0:
             print(f"No valid delivery points for vehicle {vehicle_id}. Skipping.")
             continue
 
+        # stops[i] describes points_coordinates[i]: 0 => origin, 1.. => deliveries
+        stops = [origin_stop(origin_lat, origin_lon, partition.origin_index)]
+        stops += build_stop_records(partition.deliveries)
+
         if len(delivery_points) == 1:
             # Single-point route: origin -> delivery -> origin
-            optimized_routes[int(vehicle_id)] = [
-                [origin_lat, origin_lon],
-                delivery_points[0].tolist(),
-                [origin_lat, origin_lon]
-            ]
+            if stats is not None:
+                stats[int(vehicle_id)] = skipped_run_stats("trivial")
+            finish(int(vehicle_id), [stops[0], stops[1], stops[0]])
             print(f"Single delivery point for vehicle {vehicle_id}: {optimized_routes[int(vehicle_id)]}")
             continue
 
         # Combine origin + deliveries in points_coordinates
         # index 0 => origin, indices 1.. => deliveries
-        start_point = np.array([origin_lat, origin_lon])
+        start_point = np.array([origin_lat, origin_lon], dtype=float)
         points_coordinates = np.vstack((start_point, delivery_points))
-        num_points = len(points_coordinates)  # e.g., 8 if 1 origin + 7 deliveries
-
-        # RL model inference (optional)
-        rl_prediction_for_ga = None
-        if rl_model is not None:
-            # The RL model expects up to "feature_dim" columns
-            feature_dim = rl_model.input_shape[-1]
-
-            # 1) Pad the coordinate array if needed
-            padded_points = np.pad(
-                points_coordinates,
-                ((0, 0), (0, feature_dim - points_coordinates.shape[1])),
-                'constant'
-            )
-            # 2) Use pad_sequences to get shape (batch_size=1, timesteps=50, features=feature_dim)
-            padded_points = pad_sequences([padded_points], maxlen=50, padding='post', dtype='float32')
-
-            # 3) RL inference -> shape e.g. (1, 50, 2) or something similar
-            rl_output = rl_model.predict(padded_points)
-            print("RL Prediction Shape:", rl_output.shape)
-            print("RL Prediction Data:", rl_output)
-
-            # We only have (num_points - 1) deliveries to order
-            # So we pick the first (num_points - 1) "scores" from, say, the first dimension of rl_output.
-            # Here we take rl_output[0, :num_points-1, 0], which is shape (num_points-1,).
-            # This becomes our 1D array of "scores" to seed the GA route.
-            if rl_output.shape[1] >= (num_points - 1):
-                rl_prediction_for_ga = rl_output[0, : (num_points - 1), 0]
-            else:
-                # If the model doesn't produce enough steps, fallback to None
-                rl_prediction_for_ga = None
-
-        # Run GA for final optimization
-        best_route = genetic_algorithm(
-            POPULATION_SIZE,
-            NUM_GENERATIONS,
-            MUTATION_RATE,
-            num_points,
-            start_point,
-            points_coordinates,
-            rl_prediction=rl_prediction_for_ga
-        )
 
-        # Convert route indices back to actual lat/lon
-        # best_route.route are delivery indices [1..num_points-1]
-        # We also include the origin at the start and end
-        final_coords = []
-        # origin first
-        final_coords.append(points_coordinates[0].tolist())
-        # deliveries in best_route.route order
-        for idx in best_route.route:
-            final_coords.append(points_coordinates[idx].tolist())
-        # plus returning to origin
-        final_coords.append(points_coordinates[0].tolist())
-
-        optimized_routes[int(vehicle_id)] = final_coords
-        print(f"Optimized route for vehicle {vehicle_id}: {final_coords}")
+        optimized_routes[int(vehicle_id)] = None  # placeholder keeps vehicle order
+        vehicle_stops[int(vehicle_id)] = stops
+
+        # Unchanged vehicles (same stop set, origin and parameters) reuse their cached tour
+        if config["use_cache"]:
+            cache_keys[int(vehicle_id)] = route_cache_key(start_point, delivery_points, config)
+            cached = route_cache.get(cache_keys[int(vehicle_id)])
+            if cached is not None:
+                if stats is not None:
+                    stats[int(vehicle_id)] = skipped_run_stats("cached")
+                tour = tour_from_canonical(cached, delivery_points)
+                finish(int(vehicle_id), [stops[idx] for idx in tour])
+                continue
+
+        ga_inputs.append((int(vehicle_id), points_coordinates))
+        point_keys[int(vehicle_id)] = [location_key("origin", partition.origin_id)] + [
+            location_key("distributor", stop["distributor_id"]) for stop in stops[1:]
+        ]
+
+    # RL model inference (optional): one batched predict call for every vehicle.
+    # Uploads that arrive before the model has finished loading run GA-only;
+    # their tours are not cached, so later uploads get RL-seeded runs instead.
+    rl_loading = rl_model_provider.is_loading()
+    rl_model = rl_model_provider.get()
+    cache_tours = rl_model is not None or not rl_loading
+    rl_predictions = [None] * len(ga_inputs)
+    if rl_model is not None and ga_inputs:
+        rl_predictions = predict_rl_scores(rl_model, [points for _, points in ga_inputs])
+
+    if should_cancel is not None and should_cancel():
+        raise OptimizationCancelled()
+
+    # Known warehouse/distributor pairs come from the persistent store; only new pairs are computed
+    distance_matrices = [None] * len(ga_inputs)
+    if config["distance_store_dir"]:
+        store = get_distance_store(config["distance_store_dir"], config["distance_metric"])
+        distance_matrices = [
+            store.matrix_for(point_keys[vehicle_id], points_coordinates)
+            for vehicle_id, points_coordinates in ga_inputs
+        ]
+    elif config["distance_metric"] in GRAPH_METRICS:
+        metric = get_distance_metric(config["distance_metric"])
+        distance_matrices = [metric(points_coordinates) for _, points_coordinates in ga_inputs]
+
+    ga_tasks = [
+        (vehicle_id, points_coordinates, rl_prediction, config, vehicle_seed(config["seed"], vehicle_id), matrix)
+        for (vehicle_id, points_coordinates), rl_prediction, matrix in zip(ga_inputs, rl_predictions, distance_matrices)
+    ]
+
+    points_by_vehicle = dict(ga_inputs)
+    for vehicle_id, tour, run_stats in _run_ga_tasks(ga_tasks, config, executor):
+        if stats is not None:
+            stats[vehicle_id] = run_stats
+        if vehicle_id in cache_keys and cache_tours:
+            route_cache.put(cache_keys[vehicle_id], tour_to_canonical(tour, points_by_vehicle[vehicle_id][1:]))
+        stops = vehicle_stops[vehicle_id]
+        finish(vehicle_id, [stops[idx] for idx in tour])
+        print(f"Optimized route for vehicle {vehicle_id}: {[[stops[idx]['lat'], stops[idx]['lon']] for idx in tour]}")
 
     return optimized_routes
+
+def _run_ga_tasks(ga_tasks, config, executor=None):
+    """
+    Solve each (vehicle_id, points, rl_prediction, config, seed, distance_matrix) task, inline or
+    on an executor. Results are yielded in task order either way; if the caller
+    stops early (e.g. cancellation), work that has not started is cancelled.
+    """
+    if executor is None and (config["workers"] <= 1 or len(ga_tasks) <= 1):
+        for task in ga_tasks:
+            yield solve_vehicle(*task)
+        return
+
+    if executor is not None:
+        futures = [executor.submit(solve_vehicle, *task) for task in ga_tasks]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+        return
+
+    pool = ProcessPoolExecutor(max_workers=config["workers"])
+    try:
+        futures = [pool.submit(solve_vehicle, *task) for task in ga_tasks]
+        for future in futures:
+            yield future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
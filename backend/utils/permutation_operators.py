@@ -0,0 +1,178 @@
+"""
+Batched permutation crossover operators for the genetic algorithm.
+
+Every operator takes two (num_pairs, route_length) integer arrays of parents,
+where each row is a permutation of the same set of genes (any labels, 0 included),
+and returns a (num_pairs, route_length) array of children. All bookkeeping is
+done with position lookups and boolean masks, so each child costs O(n) instead
+of the O(n^2) `gene not in child` scan.
+"""
+import numpy as np
+
+def _encode(parents1, parents2):
+    """
+    Map arbitrary gene labels onto 0..n-1 so they can be used as array indices.
+    Returns (labels, codes1, codes2); labels[codes] recovers the original genes.
+    """
+    labels = np.sort(parents1[0])
+    return labels, np.searchsorted(labels, parents1), np.searchsorted(labels, parents2)
+
+def _positions(codes):
+    """
+    Inverse permutation per row: positions[r, gene] is the index of gene in codes[r].
+    """
+    num_pairs, route_length = codes.shape
+    positions = np.empty_like(codes)
+    positions[np.arange(num_pairs)[:, np.newaxis], codes] = np.arange(route_length)
+    return positions
+
+def _random_cuts(num_pairs, route_length):
+    """
+    Two sorted cut points per pair, a <= b, delimiting the segment [a, b).
+    """
+    cuts = np.sort(np.random.randint(0, route_length + 1, size=(num_pairs, 2)), axis=1)
+    return cuts[:, :1], cuts[:, 1:]
+
+def _fill_in_order(child, donor, taken, start):
+    """
+    Write the donor genes that are not `taken` into the free slots of `child`,
+    preserving donor order and starting at column `start` (wrapping around).
+    """
+    num_pairs, route_length = child.shape
+    rows = np.arange(num_pairs)[:, np.newaxis]
+    keep = ~taken
+    # Rank of each kept gene among the kept genes of its row (linear cumsum, no sort)
+    rank = np.cumsum(keep, axis=1) - 1
+    slots = (start + rank) % route_length
+    child[np.broadcast_to(rows, child.shape)[keep], slots[keep]] = donor[keep]
+    return child
+
+def single_cut_crossover(parents1, parents2):
+    """
+    The original GA crossover: copy parents1 up to one random cut, then fill the
+    rest with the remaining genes in parents2 order.
+    """
+    labels, codes1, codes2 = _encode(parents1, parents2)
+    num_pairs, route_length = codes1.shape
+    rows = np.arange(num_pairs)[:, np.newaxis]
+    cuts = np.random.randint(0, route_length, size=(num_pairs, 1))
+
+    child = np.where(np.arange(route_length) < cuts, codes1, -1)
+    taken = _positions(codes1)[rows, codes2] < cuts
+    return labels[_fill_in_order(child, codes2, taken, cuts)]
+
+def order_crossover(parents1, parents2):
+    """
+    Order crossover (OX1): keep the parents1 segment [a, b) in place, then fill
+    from position b onwards (wrapping) with the parents2 genes read from position b,
+    skipping genes already in the segment.
+    """
+    labels, codes1, codes2 = _encode(parents1, parents2)
+    num_pairs, route_length = codes1.shape
+    rows = np.arange(num_pairs)[:, np.newaxis]
+    columns = np.arange(route_length)
+    start, end = _random_cuts(num_pairs, route_length)
+
+    in_segment = (columns >= start) & (columns < end)
+    child = np.where(in_segment, codes1, -1)
+
+    # parents2 rotated so reading starts at the second cut
+    donor = codes2[rows, (columns + end) % route_length]
+    donor_pos_in_parent1 = _positions(codes1)[rows, donor]
+    taken = (donor_pos_in_parent1 >= start) & (donor_pos_in_parent1 < end)
+    return labels[_fill_in_order(child, donor, taken, end)]
+
+def pmx_crossover(parents1, parents2):
+    """
+    Partially mapped crossover (PMX): copy the parents1 segment [a, b), keep parents2
+    elsewhere, and resolve duplicates by following the segment mapping
+    parents1[i] -> parents2[i]. Mapping chains are disjoint, so the total
+    number of hops per child is bounded by the segment length.
+    """
+    labels, codes1, codes2 = _encode(parents1, parents2)
+    num_pairs, route_length = codes1.shape
+    columns = np.arange(route_length)
+    start, end = _random_cuts(num_pairs, route_length)
+
+    in_segment = (columns >= start) & (columns < end)
+    child = np.where(in_segment, codes1, codes2)
+    positions1 = _positions(codes1)
+
+    # Outside the segment, genes that parents1's segment already placed are conflicts
+    conflict_rows, conflict_cols = np.nonzero(~in_segment)
+    genes = child[conflict_rows, conflict_cols]
+    while len(genes):
+        gene_pos = positions1[conflict_rows, genes]
+        active = (gene_pos >= start[conflict_rows, 0]) & (gene_pos < end[conflict_rows, 0])
+        # Resolved entries are final; only the active ones take another hop
+        child[conflict_rows[~active], conflict_cols[~active]] = genes[~active]
+        conflict_rows, conflict_cols = conflict_rows[active], conflict_cols[active]
+        genes = codes2[conflict_rows, gene_pos[active]]
+    return labels[child]
+
+def edge_recombination_crossover(parents1, parents2):
+    """
+    Edge recombination (ERX): build each child from the union of both parents'
+    adjacencies, always stepping to the unvisited neighbour with the fewest
+    remaining neighbours. Runs one vectorized step per position across all pairs;
+    dead ends jump to the next unvisited gene of a per-row random order.
+    """
+    labels, codes1, codes2 = _encode(parents1, parents2)
+    num_pairs, route_length = codes1.shape
+    rows = np.arange(num_pairs)
+
+    # Adjacency table (num_pairs, n, 4): left/right neighbours in both parents (cyclic)
+    adjacency = np.empty((num_pairs, route_length, 4), dtype=codes1.dtype)
+    for offset, codes in ((0, codes1), (2, codes2)):
+        adjacency[rows[:, np.newaxis], codes, offset] = np.roll(codes, 1, axis=1)
+        adjacency[rows[:, np.newaxis], codes, offset + 1] = np.roll(codes, -1, axis=1)
+    # Shared edges only need to be counted once
+    duplicate = adjacency[:, :, 2:, np.newaxis] == adjacency[:, :, np.newaxis, :2]
+    adjacency[:, :, 2:][duplicate.any(axis=3)] = -1
+
+    visited = np.zeros((num_pairs, route_length), dtype=bool)
+    fallback_order = np.argsort(np.random.random((num_pairs, route_length)), axis=1)
+    fallback_ptr = np.zeros(num_pairs, dtype=int)
+    child = np.empty_like(codes1)
+
+    current = codes1[:, 0].copy()
+    for step in range(route_length):
+        child[:, step] = current
+        visited[rows, current] = True
+        if step == route_length - 1:
+            break
+
+        candidates = adjacency[rows, current]                        # (num_pairs, 4)
+        valid = (candidates >= 0) & ~visited[rows[:, np.newaxis], np.maximum(candidates, 0)]
+        # Remaining degree of each candidate = its unvisited neighbours
+        their_neighbours = adjacency[rows[:, np.newaxis], np.maximum(candidates, 0)]
+        degree = ((their_neighbours >= 0)
+                  & ~visited[rows[:, np.newaxis, np.newaxis], np.maximum(their_neighbours, 0)]).sum(axis=2)
+        degree = np.where(valid, degree, route_length + 1)
+        best = candidates[rows, np.argmin(degree, axis=1)]
+
+        # Dead end: advance the row's fallback pointer past visited genes
+        stuck = np.flatnonzero(~valid.any(axis=1))
+        for row in stuck:
+            while visited[row, fallback_order[row, fallback_ptr[row]]]:
+                fallback_ptr[row] += 1
+            best[row] = fallback_order[row, fallback_ptr[row]]
+        current = best
+
+    return labels[child]
+
+# Registry used by the GA engines and the "crossover" config key
+CROSSOVER_OPERATORS = {
+    "single_cut": single_cut_crossover,
+    "ox": order_crossover,
+    "pmx": pmx_crossover,
+    "erx": edge_recombination_crossover,
+}
+
+def get_crossover_operator(name):
+    """
+    Look up a crossover operator by name, raising ValueError for unknown names.
+    """
+    if name not in CROSSOVER_OPERATORS:
+        raise ValueError(f"Unknown crossover operator '{name}'. Choose from {sorted(CROSSOVER_OPERATORS)}.")
+    return CROSSOVER_OPERATORS[name]
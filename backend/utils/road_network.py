@@ -0,0 +1,319 @@
+import os
+import bz2
+import gzip
+import heapq
+import logging
+import threading
+import xml.etree.ElementTree as ElementTree
+import numpy as np
+
+from .distance_metrics import EARTH_RADIUS_KM, haversine_matrix
+
+# Overridable via the ROAD_NETWORK_PATH environment variable / app.config["ROAD_NETWORK_PATH"]
+DEFAULT_ROAD_NETWORK_PATH = os.environ.get("ROAD_NETWORK_PATH")
+
+# OSM highway classes a delivery vehicle can drive on
+DRIVABLE_HIGHWAYS = {
+    "motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link",
+    "secondary", "secondary_link", "tertiary", "tertiary_link", "unclassified",
+    "residential", "living_street", "service", "road",
+}
+
+# Highway classes that are one-way unless tagged otherwise
+IMPLIED_ONEWAY = {"motorway", "motorway_link"}
+
+# Multiplier on straight-line distance for pairs with no path in the graph
+UNREACHABLE_DETOUR_FACTOR = 1.3
+
+# First latitude window (degrees, ~1 km) searched when snapping a point to a node
+SNAP_WINDOW_DEGREES = 0.01
+
+def _open_osm(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+def _way_direction(tags):
+    """
+    +1 forward only, -1 reverse only, 0 both directions.
+    """
+    oneway = tags.get("oneway", "")
+    if oneway in ("yes", "true", "1"):
+        return 1
+    if oneway == "-1":
+        return -1
+    if oneway == "no":
+        return 0
+    if tags.get("highway") in IMPLIED_ONEWAY or tags.get("junction") == "roundabout":
+        return 1
+    return 0
+
+def read_osm_xml(path):
+    """
+    Stream an OSM XML extract (.osm, .osm.gz or .osm.bz2) with iterparse.
+    :return: ({node id: (lat, lon)}, [(node refs, direction), ...] of drivable ways)
+    """
+    nodes = {}
+    ways = []
+    with _open_osm(path) as osm_file:
+        for _, element in ElementTree.iterparse(osm_file, events=("end",)):
+            if element.tag == "node":
+                nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                if tags.get("highway") in DRIVABLE_HIGHWAYS:
+                    refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                    ways.append((refs, _way_direction(tags)))
+                element.clear()
+            elif element.tag == "relation":
+                element.clear()
+    return nodes, ways
+
+def read_osm_pbf(path):
+    """
+    Read an OSM PBF extract. Needs the optional `osmium` package.
+    :return: same as read_osm_xml
+    """
+    try:
+        import osmium
+    except ImportError:
+        raise ValueError("Reading .pbf extracts requires the 'osmium' package; convert the extract to .osm XML or install osmium.")
+
+    class Handler(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.nodes = {}
+            self.ways = []
+
+        def node(self, node):
+            self.nodes[node.id] = (node.location.lat, node.location.lon)
+
+        def way(self, way):
+            tags = {tag.k: tag.v for tag in way.tags}
+            if tags.get("highway") in DRIVABLE_HIGHWAYS:
+                self.ways.append(([nd.ref for nd in way.nodes], _way_direction(tags)))
+
+    handler = Handler()
+    handler.apply_file(path)
+    return handler.nodes, handler.ways
+
+def _pairwise_haversine(a, b):
+    """
+    Great-circle km between a[i] and b[i] for every i (edge lengths).
+    """
+    lat1, lon1 = np.radians(a[:, 0]), np.radians(a[:, 1])
+    lat2, lon2 = np.radians(b[:, 0]), np.radians(b[:, 1])
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+class RoadNetwork:
+    """
+    Directed road graph in compressed sparse row form, with edge weights in km.
+      - Points are snapped to the nearest node of the largest connected component;
+        the straight-line snap legs are added to the road distance.
+      - Many-to-many matrices run one Dijkstra per distinct source node that stops
+        as soon as every target node is settled.
+    One-way streets make the matrices asymmetric.
+    """
+    def __init__(self, node_coordinates, edge_sources, edge_targets, edge_lengths):
+        self.node_coordinates = np.asarray(node_coordinates, dtype=float)
+        order = np.argsort(edge_sources, kind="stable")
+        counts = np.bincount(edge_sources, minlength=len(self.node_coordinates))
+        # Plain lists: the Dijkstra inner loop indexes them one element at a time
+        self._indptr = np.r_[0, np.cumsum(counts)].tolist()
+        self._targets = np.asarray(edge_targets)[order].tolist()
+        self._lengths = np.asarray(edge_lengths, dtype=float)[order].tolist()
+
+        component = self._largest_component(edge_sources, edge_targets)
+        lat_order = np.argsort(self.node_coordinates[component, 0])
+        self._snap_nodes = component[lat_order]
+        self._snap_lats = self.node_coordinates[self._snap_nodes, 0]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Build the graph from a local OSM extract (.osm[.gz|.bz2] or .pbf).
+        """
+        nodes, ways = read_osm_pbf(path) if path.endswith(".pbf") else read_osm_xml(path)
+
+        sources, targets = [], []
+        for refs, direction in ways:
+            refs = [ref for ref in refs if ref in nodes]
+            pairs = list(zip(refs[:-1], refs[1:]))
+            if direction >= 0:
+                sources.extend(a for a, _ in pairs)
+                targets.extend(b for _, b in pairs)
+            if direction <= 0:
+                sources.extend(b for _, b in pairs)
+                targets.extend(a for a, _ in pairs)
+        if not sources:
+            raise ValueError(f"No drivable roads found in {path}")
+
+        # Keep only nodes on drivable ways, renumbered 0..n-1
+        osm_ids, edges = np.unique(np.array([sources, targets], dtype=np.int64), return_inverse=True)
+        edges = edges.reshape(2, -1)
+        coordinates = np.array([nodes[osm_id] for osm_id in osm_ids.tolist()], dtype=float)
+
+        lengths = _pairwise_haversine(coordinates[edges[0]], coordinates[edges[1]])
+
+        logging.info(f"Road network loaded from {path}: {len(osm_ids)} nodes, {edges.shape[1]} edges")
+        return cls(coordinates, edges[0], edges[1], lengths)
+
+    def _largest_component(self, edge_sources, edge_targets):
+        """
+        Node ids of the largest weakly connected component, so every snapped
+        point can reach (almost) every other.
+        """
+        num_nodes = len(self.node_coordinates)
+        neighbours = [[] for _ in range(num_nodes)]
+        for a, b in zip(np.asarray(edge_sources).tolist(), np.asarray(edge_targets).tolist()):
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+
+        labels = [-1] * num_nodes
+        best_label, best_size = 0, 0
+        for start in range(num_nodes):
+            if labels[start] != -1:
+                continue
+            labels[start] = start
+            stack, size = [start], 0
+            while stack:
+                node = stack.pop()
+                size += 1
+                for neighbour in neighbours[node]:
+                    if labels[neighbour] == -1:
+                        labels[neighbour] = start
+                        stack.append(neighbour)
+            if size > best_size:
+                best_label, best_size = start, size
+        return np.flatnonzero(np.asarray(labels) == best_label)
+
+    def snap(self, points):
+        """
+        Nearest graph node for each (lat, lon) point.
+        Candidates come from a latitude window that widens until the nearest
+        node found is closer than the window edge, so the result is exact.
+        :return: (node ids, snap distances in km)
+        """
+        points = np.asarray(points, dtype=float)
+        node_ids = np.empty(len(points), dtype=int)
+        snap_km = np.empty(len(points))
+        for i, point in enumerate(points):
+            window = SNAP_WINDOW_DEGREES
+            while True:
+                lo = np.searchsorted(self._snap_lats, point[0] - window, side="left")
+                hi = np.searchsorted(self._snap_lats, point[0] + window, side="right")
+                candidates = self._snap_nodes[lo:hi]
+                if len(candidates):
+                    distances = haversine_matrix(point[np.newaxis, :], self.node_coordinates[candidates])[0]
+                    best = int(np.argmin(distances))
+                    covers_all = lo == 0 and hi == len(self._snap_lats)
+                    if distances[best] <= np.radians(window) * EARTH_RADIUS_KM or covers_all:
+                        node_ids[i], snap_km[i] = candidates[best], distances[best]
+                        break
+                window *= 4
+        return node_ids, snap_km
+
+    def shortest_paths(self, source, targets):
+        """
+        Road distance in km from node `source` to each node in `targets`
+        (inf where unreachable). Dijkstra stops once all targets are settled.
+        """
+        remaining = set(targets)
+        settled = {}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        indptr, edge_targets, edge_lengths = self._indptr, self._targets, self._lengths
+        while heap and remaining:
+            distance, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled[node] = distance
+            remaining.discard(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = edge_targets[edge]
+                candidate = distance + edge_lengths[edge]
+                if candidate < best.get(neighbour, np.inf):
+                    best[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return np.array([settled.get(target, np.inf) for target in targets])
+
+    def matrix(self, points, other=None):
+        """
+        Road distance matrix in km from each of `points` to each of `other`
+        (default: points), with the same (points, other) signature as the
+        formula kernels in distance_metrics. Unreachable pairs fall back to
+        straight-line distance times UNREACHABLE_DETOUR_FACTOR.
+        """
+        points = np.asarray(points, dtype=float)
+        other = points if other is None else np.asarray(other, dtype=float)
+        source_nodes, source_snap = self.snap(points)
+        target_nodes, target_snap = self.snap(other)
+
+        distinct_targets = np.unique(target_nodes).tolist()
+        target_column = {node: column for column, node in enumerate(distinct_targets)}
+        columns = np.array([target_column[node] for node in target_nodes.tolist()], dtype=int)
+        by_source = {
+            node: self.shortest_paths(node, distinct_targets)[columns]
+            for node in np.unique(source_nodes).tolist()
+        }
+
+        road = np.array([by_source[node] for node in source_nodes.tolist()]).reshape(len(points), len(other))
+        matrix = source_snap[:, np.newaxis] + road + target_snap[np.newaxis, :]
+
+        unreachable = ~np.isfinite(matrix)
+        if unreachable.any():
+            logging.warning(f"Road network: {int(unreachable.sum())} unreachable pairs use straight-line distance")
+            matrix[unreachable] = UNREACHABLE_DETOUR_FACTOR * haversine_matrix(points, other)[unreachable]
+
+        # The same point to itself costs nothing, snap legs included
+        same_point = (points[:, np.newaxis, :] == other[np.newaxis, :, :]).all(axis=2)
+        matrix[same_point] = 0.0
+        return matrix
+
+    __call__ = matrix
+
+class RoadNetworkProvider:
+    """
+    Loads the configured OSM extract on first use and keeps it for the process.
+    Everything runs offline from the local file.
+    """
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_ROAD_NETWORK_PATH
+        self._network = None
+        self._lock = threading.Lock()
+
+    def configure(self, path):
+        """
+        Point the provider at a different extract (drops any loaded graph).
+        """
+        with self._lock:
+            self.path = path
+            self._network = None
+
+    def is_configured(self):
+        return bool(self.path)
+
+    def get(self):
+        """
+        The loaded RoadNetwork, loading it on the first call.
+        Raises ValueError if no extract is configured.
+        """
+        with self._lock:
+            if self._network is None:
+                if not self.path:
+                    raise ValueError("No road network configured; set ROAD_NETWORK_PATH to a local OSM extract.")
+                self._network = RoadNetwork.from_file(self.path)
+            return self._network
+
+# Shared provider behind the "road" distance metric; app.py configures the path
+road_network_provider = RoadNetworkProvider()
+
+def road_matrix(points, other=None):
+    """
+    Distance kernel for the "road" metric: shortest road paths in km.
+    """
+    return road_network_provider.get().matrix(points, other)
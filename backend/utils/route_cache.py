@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Coordinates are rounded before hashing so float noise does not miss the cache
+CACHE_COORDINATE_DECIMALS = 6
+
+# Config keys that change the optimized tour; anything else (workers, ...) does not
+CACHE_CONFIG_KEYS = (
+    "population_size", "num_generations", "mutation_rate", "engine", "crossover", "distance_metric",
+    "local_search", "local_search_moves", "neighbour_count", "seed",
+    "construction_seeds", "islands", "migration_interval", "migrants", "patience", "target_gap", "time_budget",
+)
+
+def canonical_order(delivery_points):
+    """
+    Order of delivery_points after rounding and lexicographic sorting, so the same
+    stop set gives the same canonical sequence whatever the upload row order.
+    """
+    rounded = np.round(np.asarray(delivery_points, dtype=float), CACHE_COORDINATE_DECIMALS)
+    return np.lexsort((rounded[:, 1], rounded[:, 0]))
+
+def route_cache_key(origin, delivery_points, config):
+    """
+    Content hash of one vehicle's problem: origin, normalized stop set and GA parameters.
+    """
+    rounded = np.round(np.asarray(delivery_points, dtype=float), CACHE_COORDINATE_DECIMALS)
+    payload = {
+        "origin": [round(float(value), CACHE_COORDINATE_DECIMALS) for value in origin],
+        "stops": rounded[canonical_order(delivery_points)].tolist(),
+        "params": {key: config.get(key) for key in CACHE_CONFIG_KEYS},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=list).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def tour_to_canonical(tour, delivery_points):
+    """
+    Express a tour over points_coordinates indices (0 = origin, i = delivery i-1)
+    as ranks in the canonical stop order, for storage.
+    """
+    rank_of = np.empty(len(delivery_points), dtype=int)
+    rank_of[canonical_order(delivery_points)] = np.arange(len(delivery_points))
+    return [int(rank_of[idx - 1]) for idx in tour[1:-1]]
+
+def tour_from_canonical(ranks, delivery_points):
+    """
+    Inverse of tour_to_canonical for the current upload's row order.
+    """
+    order = canonical_order(delivery_points)
+    return [0] + [int(order[rank]) + 1 for rank in ranks] + [0]
+
+class RouteCache:
+    """
+    Bounded in-memory LRU of optimized tours, optionally backed by a Mongo
+    collection so results survive restarts and are shared across workers.
+    Values are tours in canonical stop ranks (see tour_to_canonical).
+    """
+    def __init__(self, max_entries=1024, collection=None):
+        self.max_entries = max_entries
+        self.collection = collection
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+
+    def set_backing_collection(self, collection):
+        """
+        Persist entries to `collection` (keyed by a unique "key" field).
+        """
+        self.collection = collection
+        try:
+            collection.create_index("key", unique=True)
+        except Exception as e:
+            logging.error(f"Could not create route cache index: {e}")
+
+    def get(self, key):
+        """
+        Cached canonical tour for key, or None. Memory first, then the backing store.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        ranks = None
+        if self.collection is not None:
+            try:
+                document = self.collection.find_one({"key": key}, {"_id": 0, "tour": 1})
+                ranks = document["tour"] if document else None
+            except Exception as e:
+                logging.error(f"Route cache lookup failed: {e}")
+
+        with self._lock:
+            if ranks is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.store_hits += 1
+            self._remember(key, ranks)
+        return ranks
+
+    def put(self, key, ranks):
+        """
+        Store a canonical tour in memory and in the backing store.
+        """
+        with self._lock:
+            self._remember(key, ranks)
+        if self.collection is not None:
+            try:
+                self.collection.update_one({"key": key}, {"$set": {"tour": ranks}}, upsert=True)
+            except Exception as e:
+                logging.error(f"Route cache write failed: {e}")
+
+    def _remember(self, key, ranks):
+        self._entries[key] = ranks
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Hit/miss counters for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "store_hits": self.store_hits,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": self.collection is not None,
+            }
+
+# Shared cache used by optimize_routes; app.py attaches the Mongo collection
+route_cache = RouteCache()
@@ -0,0 +1,89 @@
+import random
+import numpy as np
+
+from .routing_algorithm import genetic_algorithm, genetic_algorithm_array, build_distance_matrix
+from .local_search import improve_route
+from .island_ga import genetic_algorithm_islands
+from .stopping import StoppingCriteria, tour_lower_bound
+from .construction import construction_routes
+
+# GA engines selectable through the "engine" config key:
+#   "object" -> list of Route objects (original implementation)
+#   "array"  -> one (population_size, n_stops) NumPy array, batched fitness
+#   "islands" -> several array-GA sub-populations in processes with migration
+GA_ENGINES = {
+    "object": genetic_algorithm,
+    "array": genetic_algorithm_array,
+    "islands": genetic_algorithm_islands,
+}
+
+# Extra config keys passed through to an engine as keyword arguments
+ENGINE_OPTIONS = {
+    "islands": ("islands", "migration_interval", "migrants"),
+}
+
+def vehicle_seed(base_seed, vehicle_id):
+    """
+    Derive a per-vehicle seed from the run seed, so a vehicle gets the same
+    random stream whichever process (or order) it is solved in.
+    Returns None when no base seed is configured.
+    """
+    if base_seed is None:
+        return None
+    return int(np.random.SeedSequence([int(base_seed), int(vehicle_id)]).generate_state(1)[0])
+
+def solve_vehicle(vehicle_id, points_coordinates, rl_prediction, config, seed=None, distance_matrix=None):
+    """
+    Run the GA (plus optional local search) for one vehicle.
+    Kept free of TensorFlow and Flask so it can run inside a worker process.
+    :param points_coordinates: array of shape (num_points, 2), row 0 is the origin
+    :param rl_prediction: optional 1D array of RL scores for the deliveries
+    :param config: resolved optimization config (see OPTIMIZATION_CONFIG)
+    :param seed: optional seed for both `random` and `np.random`
+    :param distance_matrix: optional precomputed matrix (e.g. from a DistanceStore);
+                            otherwise built from config["distance_metric"]
+    :return: (vehicle_id, tour, stats) where tour lists indices into points_coordinates,
+             starting and ending at the origin (0), and stats is StoppingCriteria.stats()
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    num_points = len(points_coordinates)
+    if distance_matrix is None:
+        distance_matrix = build_distance_matrix(points_coordinates, config["distance_metric"])
+    stopping = StoppingCriteria(
+        patience=config["patience"],
+        target_gap=config["target_gap"],
+        time_budget=config["time_budget"],
+        lower_bound=tour_lower_bound(distance_matrix) if config["target_gap"] is not None else None
+    )
+    best_route = GA_ENGINES[config["engine"]](
+        config["population_size"],
+        config["num_generations"],
+        config["mutation_rate"],
+        num_points,
+        points_coordinates[0],
+        points_coordinates,
+        rl_prediction=rl_prediction,
+        crossover_operator=config["crossover"],
+        distance_matrix=distance_matrix,
+        stopping=stopping,
+        seed_routes=construction_routes(
+            points_coordinates, distance_matrix, int(config["construction_seeds"] * config["population_size"])
+        ),
+        **{key: config[key] for key in ENGINE_OPTIONS.get(config["engine"], ())}
+    )
+
+    if config["local_search"]:
+        best_route.route = improve_route(
+            best_route.route,
+            best_route.distance_matrix,
+            moves=config["local_search_moves"],
+            neighbour_count=config["neighbour_count"]
+        )
+        best_route.distance = best_route.calculate_distance()
+
+    # best_route.route are delivery indices [1..num_points-1];
+    # the origin is added at the start and end
+    return vehicle_id, [0] + [int(idx) for idx in best_route.route] + [0], stopping.stats()
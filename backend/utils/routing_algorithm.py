@@ -1,33 +1,68 @@
 import numpy as np
 import random
 
+from .permutation_operators import get_crossover_operator
+from .distance_metrics import get_distance_metric
+
 def calculate_distance(point1, point2):
     """
     Calculate Euclidean distance between two 2D points.
     """
     return np.linalg.norm(point1 - point2)
 
+def build_distance_matrix(points_coordinates, metric="euclidean"):
+    """
+    Build the full N x N distance matrix for points_coordinates (row 0 is the
+    origin) in one broadcast, so fitness never recomputes a leg.
+    :param metric: name from distance_metrics.DISTANCE_METRICS
+    """
+    return get_distance_metric(metric)(points_coordinates)
+
+def route_distance(route, distance_matrix):
+    """
+    Total tour length origin -> route -> origin, as one gather-and-sum
+    over the precomputed distance matrix.
+    """
+    tour = np.concatenate(([0], route, [0]))
+    return distance_matrix[tour[:-1], tour[1:]].sum()
+
+def population_distances(population, distance_matrix):
+    """
+    Tour lengths for a whole (population_size, n_stops) integer population
+    in one vectorized pass: origin leg + inner legs + return leg.
+    """
+    first_legs = distance_matrix[0, population[:, 0]]
+    inner_legs = distance_matrix[population[:, :-1], population[:, 1:]].sum(axis=1)
+    last_legs = distance_matrix[population[:, -1], 0]
+    return first_legs + inner_legs + last_legs
+
 class Route:
     """
     Represents a specific route (permutation of delivery points) plus its distance.
     The route array does NOT include index 0 (the origin), which is handled separately.
     """
-    def __init__(self, route, start_point, points_coordinates):
+    def __init__(self, route, start_point, points_coordinates, distance_matrix=None):
         """
         :param route: 1D array of indices in [1..(num_points-1)], referencing the deliveries
         :param start_point: np.array([lat, lon]) - same as points_coordinates[0], the origin
         :param points_coordinates: array of shape (num_points, 2) with row 0 as the origin
+        :param distance_matrix: optional (num_points, num_points) matrix from build_distance_matrix
         """
         self.route = route
         self.start_point = start_point
         self.points_coordinates = points_coordinates
+        self.distance_matrix = distance_matrix
         self.distance = self.calculate_distance()
 
     def calculate_distance(self):
         """
         Calculates total distance from origin -> first delivery -> ...
         -> last delivery -> back to origin.
+        Uses the precomputed distance matrix when one is attached.
         """
+        if self.distance_matrix is not None:
+            return route_distance(self.route, self.distance_matrix)
+
         total_distance = 0
         # Start point to the first delivery
         first_delivery_idx = self.route[0]
@@ -48,13 +83,15 @@ class Route:
         return total_distance
 
 def generate_initial_population(
-    population_size, num_points, start_point, points_coordinates, rl_prediction=None
+    population_size, num_points, start_point, points_coordinates, rl_prediction=None,
+    distance_matrix=None, seed_routes=None
 ):
     """
     Create initial population of routes.
       - Each route is a permutation of [1, 2, ..., num_points-1] 
         (index 0 is the origin, so skip it).
       - If rl_prediction is provided, we use it to seed one route.
+      - seed_routes (e.g. from construction.construction_routes) fill the next slots.
     """
     population = []
 
@@ -67,39 +104,39 @@ def generate_initial_population(
         sorted_indices = np.argsort(rl_prediction)  # shape: (num_points-1,)
         # Map each index i -> i+1 to reference points_coordinates
         rl_route = sorted_indices + 1
-        population.append(Route(rl_route, start_point, points_coordinates))
+        population.append(Route(rl_route, start_point, points_coordinates, distance_matrix))
+        population_size -= 1
+
+    for route in (seed_routes if seed_routes is not None else [])[:population_size]:
+        population.append(Route(np.array(route), start_point, points_coordinates, distance_matrix))
         population_size -= 1
 
     # Fill the rest of the population randomly
     for _ in range(population_size):
         # Permutation of [1..(num_points-1)]
         route = np.random.permutation(range(1, num_points))
-        population.append(Route(route, start_point, points_coordinates))
+        population.append(Route(route, start_point, points_coordinates, distance_matrix))
 
     return population
 
-def crossover(parent1, parent2, num_points, start_point, points_coordinates):
+def crossover(
+    parent1, parent2, num_points, start_point, points_coordinates, distance_matrix=None,
+    operator="single_cut"
+):
     """
-    Single-cut crossover:
-      1) Take a random crossover point
-      2) Child's first segment is parent's route up to crossover point
-      3) Fill the remainder with parent's route while preserving order and no duplicates
+    Produce one child route from two parents with the CROSSOVER_OPERATORS entry
+    named by `operator`:
+      - "single_cut": parent1 up to a random cut, the rest in parent2 order (original)
+      - "ox":         order crossover, keeps a parent1 segment in place
+      - "pmx":        partially mapped crossover
+      - "erx":        edge recombination, keeps the parents' adjacencies
+    The operators track placed genes by position, so this is linear in route length
+    (ERX: one vectorized step per position).
+    Raises ValueError for unknown operator names.
     """
-    route_length = num_points - 1  # deliveries only
-    crossover_point = random.randint(0, route_length - 1)
-    child = np.zeros(route_length, dtype=int)
-
-    # Copy from parent1 up to crossover_point
-    child[:crossover_point] = parent1.route[:crossover_point]
-
-    # Fill child with remaining genes from parent2
-    idx = crossover_point
-    for gene in parent2.route:
-        if gene not in child:
-            child[idx] = gene
-            idx += 1
-
-    return Route(child, start_point, points_coordinates)
+    crossover_fn = get_crossover_operator(operator)
+    child = crossover_fn(parent1.route[np.newaxis, :], parent2.route[np.newaxis, :])[0]
+    return Route(child, start_point, points_coordinates, distance_matrix)
 
 def mutate(route, mutation_rate):
     """
@@ -114,24 +151,35 @@ def mutate(route, mutation_rate):
 
 def genetic_algorithm(
     population_size, num_generations, mutation_rate,
-    num_points, start_point, points_coordinates, rl_prediction=None
+    num_points, start_point, points_coordinates, rl_prediction=None,
+    crossover_operator="single_cut", distance_matrix=None, stopping=None, seed_routes=None
 ):
     """
     Main GA loop:
-      1) Generate initial population (seeded with RL if present).
+      0) Build the distance matrix once (unless one is passed in, e.g. haversine
+         or road-network distances); every fitness call is a lookup into it.
+      1) Generate initial population (seeded with RL and construction routes if present).
       2) For each generation:
          a) Sort population by distance.
          b) Select top half for mating.
          c) Crossover and mutate to produce offspring.
          d) Combine offspring + old population, sort, and truncate.
       3) Return best route (lowest distance).
+    An optional StoppingCriteria (see stopping) is checked after every
+    generation and can end the loop before num_generations.
     """
+    if distance_matrix is None:
+        distance_matrix = build_distance_matrix(points_coordinates)
+
     # Generate initial population
     population = generate_initial_population(
-        population_size, num_points, start_point, points_coordinates, rl_prediction
+        population_size, num_points, start_point, points_coordinates, rl_prediction,
+        distance_matrix, seed_routes
     )
 
-    for _ in range(num_generations):
+    generation = 0
+    stopped = stopping is not None and stopping.update(generation, min(route.distance for route in population))
+    while generation < num_generations and not stopped:
         # Sort by distance ascending
         population.sort(key=lambda x: x.distance)
 
@@ -141,8 +189,14 @@ def genetic_algorithm(
         for __ in range(half_pop):
             parent1, parent2 = random.sample(population[:half_pop], 2)
             # Crossover
-            child1 = crossover(parent1, parent2, num_points, start_point, points_coordinates)
-            child2 = crossover(parent2, parent1, num_points, start_point, points_coordinates)
+            child1 = crossover(
+                parent1, parent2, num_points, start_point, points_coordinates, distance_matrix,
+                crossover_operator
+            )
+            child2 = crossover(
+                parent2, parent1, num_points, start_point, points_coordinates, distance_matrix,
+                crossover_operator
+            )
             # Mutate
             offspring.append(mutate(child1, mutation_rate))
             offspring.append(mutate(child2, mutation_rate))
@@ -151,9 +205,109 @@ def genetic_algorithm(
         population.extend(offspring)
         population.sort(key=lambda x: x.distance)
         population = population[:population_size]
+        generation += 1
+        stopped = stopping is not None and stopping.update(generation, population[0].distance)
+    if stopping is not None:
+        stopping.finish(generation)
 
     best_route = population[0]
     # No need to append best_route.route[0] – we handle return-to-origin already in distance calculations
     best_route.distance = best_route.calculate_distance()
 
     return best_route
+
+
+def _batched_mutate(population, mutation_rate):
+    """
+    Swap two distinct positions in each row with probability mutation_rate (in place).
+    """
+    num_routes, route_length = population.shape
+    rows = np.flatnonzero(np.random.random(num_routes) < mutation_rate)
+    if len(rows) == 0 or route_length < 2:
+        return population
+    idx1 = np.random.randint(0, route_length, size=len(rows))
+    idx2 = (idx1 + np.random.randint(1, route_length, size=len(rows))) % route_length
+    population[rows, idx1], population[rows, idx2] = population[rows, idx2], population[rows, idx1]
+    return population
+
+def initial_population_array(population_size, route_length, rl_prediction=None, seed_routes=None):
+    """
+    Random permutations of [1..route_length], one per row; row 0 follows the
+    RL ranking when one is given, and seed_routes (e.g. from
+    construction.construction_routes) replace the rows after it.
+    """
+    population = np.argsort(np.random.random((population_size, route_length)), axis=1) + 1
+    first = 0
+    if rl_prediction is not None:
+        population[0] = np.argsort(rl_prediction) + 1
+        first = 1
+    if seed_routes is not None and len(seed_routes):
+        seeds = np.asarray(seed_routes)[:population_size - first]
+        population[first:first + len(seeds)] = seeds
+    return population
+
+def evolve_generation_array(population, fitness, crossover_fn, mutation_rate, distance_matrix):
+    """
+    One generation of the array GA: top-half mating pool, batched crossover
+    and mutation, then (mu + lambda) survival of the best population_size routes.
+    :return: (population, fitness) for the next generation
+    """
+    population_size = len(population)
+    half_pop = population_size // 2
+
+    # Top half (unordered) is the mating pool
+    mating_pool = population[np.argpartition(fitness, half_pop - 1)[:half_pop]]
+
+    # Two distinct parents per pair
+    first = np.random.randint(0, half_pop, size=half_pop)
+    second = (first + np.random.randint(1, half_pop, size=half_pop)) % half_pop
+    parents1, parents2 = mating_pool[first], mating_pool[second]
+
+    offspring = np.vstack((
+        crossover_fn(parents1, parents2),
+        crossover_fn(parents2, parents1),
+    ))
+    offspring = _batched_mutate(offspring, mutation_rate)
+
+    # Combine and keep the best population_size routes
+    population = np.vstack((population, offspring))
+    fitness = np.concatenate((fitness, population_distances(offspring, distance_matrix)))
+    survivors = np.argpartition(fitness, population_size - 1)[:population_size]
+    return population[survivors], fitness[survivors]
+
+def genetic_algorithm_array(
+    population_size, num_generations, mutation_rate,
+    num_points, start_point, points_coordinates, rl_prediction=None,
+    crossover_operator="single_cut", distance_matrix=None, stopping=None, seed_routes=None
+):
+    """
+    Same GA as genetic_algorithm(), but the population is a single
+    (population_size, num_points - 1) integer array:
+      - fitness for a whole generation is one population_distances() call,
+      - selection uses argpartition instead of sorting Route objects,
+      - crossover (any operator from permutation_operators) and mutation
+        run batched over all parent pairs.
+    Returns a Route, so callers can use either engine interchangeably.
+    An optional StoppingCriteria (see stopping) can end the run before
+    num_generations.
+    """
+    if distance_matrix is None:
+        distance_matrix = build_distance_matrix(points_coordinates)
+    crossover_fn = get_crossover_operator(crossover_operator)
+
+    population = initial_population_array(population_size, num_points - 1, rl_prediction, seed_routes)
+    fitness = population_distances(population, distance_matrix)
+
+    generation = 0
+    stopped = stopping is not None and stopping.update(generation, fitness.min())
+    while generation < num_generations and not stopped:
+        population, fitness = evolve_generation_array(
+            population, fitness, crossover_fn, mutation_rate, distance_matrix
+        )
+        generation += 1
+        stopped = stopping is not None and stopping.update(generation, fitness.min())
+    if stopping is not None:
+        stopping.finish(generation)
+
+    best = int(np.argmin(fitness))
+    return Route(population[best].copy(), start_point, points_coordinates, distance_matrix)
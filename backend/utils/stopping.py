@@ -0,0 +1,107 @@
+import time
+import numpy as np
+
+def _spanning_tree_length(distance_matrix):
+    """
+    Minimum spanning tree length of a symmetric matrix (Prim, O(n^2)).
+    """
+    num_points = len(distance_matrix)
+    in_tree = np.zeros(num_points, dtype=bool)
+    in_tree[0] = True
+    nearest = distance_matrix[0].copy()
+    total = 0.0
+    for _ in range(num_points - 1):
+        candidates = np.where(in_tree, np.inf, nearest)
+        point = int(np.argmin(candidates))
+        total += candidates[point]
+        in_tree[point] = True
+        nearest = np.minimum(nearest, distance_matrix[point])
+    return total
+
+def tour_lower_bound(distance_matrix):
+    """
+    Lower bound on any tour over all points of distance_matrix, used for the
+    target-gap criterion. The larger of:
+      - the 1-tree bound: spanning tree of the deliveries plus the two shortest
+        edges at the origin;
+      - half the sum, over points, of their two shortest edges.
+    Asymmetric matrices use min(d[i, j], d[j, i]) for each pair, which still
+    bounds every directed tour from below.
+    """
+    matrix = np.asarray(distance_matrix, dtype=float)
+    matrix = np.minimum(matrix, matrix.T)
+    if len(matrix) < 3:
+        return float(2 * matrix[0, 1:].sum())
+    origin_edges = np.sort(matrix[0, 1:])[:2].sum()
+    one_tree = origin_edges + _spanning_tree_length(matrix[1:, 1:])
+    masked = matrix.copy()
+    np.fill_diagonal(masked, np.inf)
+    two_edges = np.sort(masked, axis=1)[:, :2].sum() / 2
+    return float(max(one_tree, two_edges))
+
+class StoppingCriteria:
+    """
+    Early stopping for a GA run, on top of its generation cap:
+      - patience:    stop after this many generations without improvement
+      - target_gap:  stop once (best - lower_bound) / lower_bound <= target_gap
+      - time_budget: stop once this many seconds have passed since creation
+    Engines call update() after each generation they check; it records the
+    best-so-far curve as [[generation, best distance], ...] (one point per
+    improvement) and returns True when the run should stop.
+    Picklable, so the island engine can hand it to its processes.
+    """
+    def __init__(self, patience=None, target_gap=None, time_budget=None, lower_bound=None):
+        self.patience = patience
+        self.target_gap = target_gap
+        self.lower_bound = lower_bound
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self.best_so_far = []
+        self.generations_used = 0
+        self.stop_reason = None
+        self._last_improvement = 0
+
+    def update(self, generation, best_distance):
+        """
+        Record the best distance after `generation` generations (0 = initial
+        population). Returns True if a stopping criterion is met.
+        """
+        best_distance = float(best_distance)
+        self.generations_used = generation
+        if not self.best_so_far or best_distance < self.best_so_far[-1][1]:
+            self.best_so_far.append([generation, best_distance])
+            self._last_improvement = generation
+
+        if self.patience is not None and generation - self._last_improvement >= self.patience:
+            self.stop_reason = "patience"
+        elif (self.target_gap is not None and self.lower_bound
+              and (best_distance - self.lower_bound) / self.lower_bound <= self.target_gap):
+            self.stop_reason = "target_gap"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = "time_budget"
+        return self.stop_reason is not None
+
+    def finish(self, generation):
+        """
+        Mark a run that ended on its generation cap.
+        """
+        self.generations_used = generation
+        if self.stop_reason is None:
+            self.stop_reason = "max_generations"
+
+    def update_from(self, other):
+        """
+        Take over the record of a copy that ran elsewhere (e.g. in an island process).
+        """
+        self.best_so_far = other.best_so_far
+        self.generations_used = other.generations_used
+        self.stop_reason = other.stop_reason
+
+    def stats(self):
+        """
+        Summary stored with each optimized route.
+        """
+        return {
+            "generations_used": self.generations_used,
+            "stop_reason": self.stop_reason,
+            "best_so_far": self.best_so_far,
+        }
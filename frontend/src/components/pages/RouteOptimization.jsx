@@ -38,14 +38,16 @@ const RouteOptimization = () => {
       return;
     }
 
-    const formData = new FormData();
-    formData.append("file", file);
-
     try {
+      // Send the file as the raw request body so the server parses it as it
+      // arrives (a multipart form is spooled to disk first)
       await axios.post(
         "http://127.0.0.1:3001/route_optimization/upload",
-        formData,
-        { headers: { "Content-Type": "multipart/form-data" } }
+        file,
+        {
+          headers: { "Content-Type": "application/octet-stream" },
+          params: { filename: file.name },
+        }
       );
 
       alert("Routes generated successfully!");
@@ -58,12 +60,16 @@ const RouteOptimization = () => {
 
   const fetchVehicles = async () => {
     try {
-      const response = await axios.get(
-        "http://127.0.0.1:3001/route_optimization/getRoutedDeliveries"
-      );
-      const inProgressVehicles = response.data.deliveries.filter(
-        (delivery) => delivery.status === "In Progress"
-      );
+      let inProgressVehicles = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(
+          "http://127.0.0.1:3001/route_optimization/getRoutedDeliveries",
+          { params: { status: "In Progress", limit: 1000, cursor } }
+        );
+        inProgressVehicles = inProgressVehicles.concat(response.data.deliveries);
+        cursor = response.data.next_cursor;
+      } while (cursor);
       const vehicleOptions = inProgressVehicles.map((vehicle) => ({
         value: vehicle.vehicle_id,
         label: `Vehicle ${vehicle.vehicle_id}`,
@@ -116,7 +122,13 @@ const RouteOptimization = () => {
 
     try {
       const response = await axios.get(
-        `http://127.0.0.1:3001/route_optimization/getRoutedDeliveries`
+        `http://127.0.0.1:3001/route_optimization/getRoutedDeliveries`,
+        {
+          params: {
+            vehicleId: selectedVehicle.value,
+            include: "route_sequence",
+          },
+        }
       );
       const selectedRoute = response.data.deliveries.find(
         (route) => route.vehicle_id === selectedVehicle.value
@@ -4,35 +4,96 @@ import Sidebar from "../layout/Sidebar";
 import Header from "../layout/Header";
 import axios from "axios";
 
+// Delivery cards fetched per page
+const PAGE_SIZE = 50;
+
 const TrackDeliveries = () => {
   const isOpen = true;
   const [deliveries, setDeliveries] = useState([]);
-  const [filteredDeliveries, setFilteredDeliveries] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
   const [availableDates, setAvailableDates] = useState([]);
   const [selectedDate, setSelectedDate] = useState("");
 
-  // Fetch all deliveries from the backend
+  // Fetch one page of deliveries (with their stops) for the selected date
+  const fetchDeliveriesPage = async (date, cursor) => {
+    try {
+      const response = await axios.get(
+        "http://127.0.0.1:3001/delivery/getAllDeliveries",
+        {
+          params: {
+            limit: PAGE_SIZE,
+            include: "route_sequence",
+            date: date || undefined,
+            cursor: cursor || undefined,
+          },
+        }
+      );
+      return response.data;
+    } catch (error) {
+      if (error.response?.status === 404) {
+        return { deliveries: [], next_cursor: null }; // No deliveries for this date
+      }
+      throw error;
+    }
+  };
+
+  // Fetch the dates that have deliveries
   useEffect(() => {
-    const fetchDeliveries = async () => {
+    const fetchDates = async () => {
       try {
         const response = await axios.get(
-          "http://127.0.0.1:3001/delivery/getAllDeliveries"
-        ); // Fetch all deliveries
-        const allDeliveries = response.data.deliveries || [];
-        setDeliveries(allDeliveries);
-
-        // Extract unique dates from deliveries
-        const dates = [...new Set(allDeliveries.map((d) => d.date))];
-        setAvailableDates(dates);
-        setFilteredDeliveries(allDeliveries);
+          "http://127.0.0.1:3001/delivery/getDeliveryDates"
+        );
+        setAvailableDates(response.data.dates || []);
       } catch (error) {
-        console.error("Error fetching deliveries:", error);
+        console.error("Error fetching delivery dates:", error);
       }
     };
 
-    fetchDeliveries();
+    fetchDates();
   }, []);
 
+  // Fetch the first page whenever the selected date changes
+  useEffect(() => {
+    let ignore = false; // Drop responses for a date that is no longer selected
+    const fetchFirstPage = async () => {
+      setLoading(true);
+      try {
+        const page = await fetchDeliveriesPage(selectedDate, null);
+        if (!ignore) {
+          setDeliveries(page.deliveries || []);
+          setNextCursor(page.next_cursor);
+        }
+      } catch (error) {
+        console.error("Error fetching deliveries:", error);
+      } finally {
+        if (!ignore) setLoading(false);
+      }
+    };
+
+    setDeliveries([]);
+    setNextCursor(null);
+    fetchFirstPage();
+    return () => {
+      ignore = true;
+    };
+  }, [selectedDate]);
+
+  // Append the next page of deliveries
+  const loadMoreDeliveries = async () => {
+    setLoading(true);
+    try {
+      const page = await fetchDeliveriesPage(selectedDate, nextCursor);
+      setDeliveries((prev) => prev.concat(page.deliveries || []));
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error("Error fetching more deliveries:", error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   // Update delivery status (Complete or Incomplete)
   const updateDeliveryStatus = async (vehicleId, status) => {
     try {
@@ -53,13 +114,6 @@ const TrackDeliveries = () => {
               : delivery
           )
         );
-        setFilteredDeliveries((prev) =>
-          prev.map((delivery) =>
-            delivery.vehicle_id === vehicleId
-              ? { ...delivery, status }
-              : delivery
-          )
-        );
       } else {
         alert("Failed to update delivery status.");
       }
@@ -69,17 +123,6 @@ const TrackDeliveries = () => {
     }
   };
 
-  // Filter deliveries by selected date
-  const handleDateChange = (date) => {
-    setSelectedDate(date);
-    if (!date) {
-      setFilteredDeliveries(deliveries); // Reset to all deliveries if no date is selected
-    } else {
-      const filtered = deliveries.filter((delivery) => delivery.date === date);
-      setFilteredDeliveries(filtered);
-    }
-  };
-
   // Download all routes with their status
   const handleDownloadAllWithStatus = async () => {
     try {
@@ -119,7 +162,7 @@ const TrackDeliveries = () => {
             <select
               id="date-filter"
               value={selectedDate}
-              onChange={(e) => handleDateChange(e.target.value)}
+              onChange={(e) => setSelectedDate(e.target.value)}
               className="form-select"
             >
               <option value="">All Dates</option>
@@ -139,8 +182,8 @@ const TrackDeliveries = () => {
             </button>
           </div>
           <div className="track-drivers-content">
-            {filteredDeliveries.length > 0 ? (
-              filteredDeliveries.map((delivery, index) => (
+            {deliveries.length > 0 ? (
+              deliveries.map((delivery, index) => (
                 <div key={index} className="delivery-card">
                   <div className="card-header">
                     <div>
@@ -239,11 +282,24 @@ const TrackDeliveries = () => {
                 </div>
               ))
             ) : (
-              <div className="no-deliveries">
-                No deliveries found for the selected date.
-              </div>
+              !loading && (
+                <div className="no-deliveries">
+                  No deliveries found for the selected date.
+                </div>
+              )
             )}
           </div>
+          {nextCursor && (
+            <div className="load-more-container">
+              <button
+                className="btn btn-primary load-more-btn"
+                onClick={loadMoreDeliveries}
+                disabled={loading}
+              >
+                {loading ? "Loading..." : "Load More Deliveries"}
+              </button>
+            </div>
+          )}
         </div>
       </main>
       <style jsx>{`
@@ -476,6 +532,30 @@ const TrackDeliveries = () => {
         .btn-primary.download-all-btn:hover {
           background-color: #0a3981;
         }
+
+        .load-more-container {
+          display: flex;
+          justify-content: center;
+          margin: 20px 0;
+        }
+
+        .btn-primary.load-more-btn {
+          padding: 10px 20px;
+          border-radius: 5px;
+          background-color: #0056b3;
+          color: white;
+          border: none;
+          cursor: pointer;
+        }
+
+        .btn-primary.load-more-btn:hover {
+          background-color: #0a3981;
+        }
+
+        .btn-primary.load-more-btn:disabled {
+          background-color: #6c757d;
+          cursor: default;
+        }
       `}</style>
     </div>
   );
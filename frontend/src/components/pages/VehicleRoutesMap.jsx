@@ -24,10 +24,16 @@ const VehicleRoutesMap = () => {
   useEffect(() => {
     const fetchRoutes = async () => {
       try {
-        const response = await axios.get(
-          "http://127.0.0.1:3001/delivery/getAllDeliveries"
-        );
-        const deliveries = response.data.deliveries || [];
+        let deliveries = [];
+        let cursor = null;
+        do {
+          const response = await axios.get(
+            "http://127.0.0.1:3001/delivery/getAllDeliveries",
+            { params: { limit: 1000, cursor, include: "route_sequence" } }
+          );
+          deliveries = deliveries.concat(response.data.deliveries || []);
+          cursor = response.data.next_cursor;
+        } while (cursor);
         setRoutes(deliveries);
 
         // Extract unique dates and vehicles